@@ -1,3 +1,10 @@
+import hashlib
+import json
+import os
+import re
+import unicodedata
+
+
 cidades_bahia = [
     "abaíra", "abaíra", "abaeté", "abaiara", "abará", "acaraci", "acajutiba", "adustina",
     "água fria", "aiquara", "alagoinhas", "alcobaça", "alfenas", "alto alegre", "amargosa",
@@ -124,3 +131,125 @@ instituicao = [
     # Outras palavras que identificam instituição
     "fundação", "fundacao", "escola superior"
 ]
+
+
+def remover_acentos(txt):
+    """Remove acentos e normaliza texto para comparação segura."""
+    if txt.isascii():
+        return txt  # NFD de ASCII é o próprio texto, sem marcas
+    return ''.join(
+        c for c in unicodedata.normalize('NFD', txt)
+        if unicodedata.category(c) != 'Mn'
+    )
+
+
+def padrao_trie(termos):
+    """
+    Monta UMA expressão regular em forma de árvore de prefixos para a lista
+    de termos (ex.: "engenharia(?: civil| de (?:software|produção))?").
+    Cada posição do texto é testada descendo a árvore, em vez de testar
+    termo por termo.
+    """
+    trie = {}
+    for termo in termos:
+        no = trie
+        for ch in termo:
+            no = no.setdefault(ch, {})
+        no[""] = {}  # marca fim de termo
+
+    def montar(no):
+        fim = "" in no
+        ramos = [re.escape(ch) + montar(filho) for ch, filho in sorted(no.items()) if ch]
+        if not ramos:
+            return ""
+        if len(ramos) == 1 and not fim:
+            return ramos[0]
+        grupo = "(?:" + "|".join(ramos) + ")"
+        return grupo + "?" if fim else grupo
+
+    return montar(trie)
+
+
+# ---------------------------------------------------------
+# ÍNDICES
+# ---------------------------------------------------------
+# Os conjuntos sem acento e as expressões em árvore de prefixos são
+# gerados com ``python Condicoes.py`` em condicoes_indices.json, que a
+# importação só lê. O arquivo guarda a impressão digital das listas acima:
+# se elas mudarem e o arquivo não for gerado de novo, os índices são
+# montados aqui mesmo, como antes.
+ARQUIVO_INDICES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "condicoes_indices.json")
+
+
+def _impressao_digital():
+    listas = json.dumps([cidades_bahia, cursos, instituicao, palavras_orientador], ensure_ascii=False)
+    return hashlib.sha256(listas.encode("utf-8")).hexdigest()
+
+
+def montar_indices():
+    cidades = frozenset(remover_acentos(c.lower()) for c in cidades_bahia)
+    cursos_sem_acento = frozenset(remover_acentos(c.lower()) for c in cursos)
+    return {
+        "impressao_digital": _impressao_digital(),
+        "cidades_norm": sorted(cidades),
+        "cursos_norm": sorted(cursos_sem_acento),
+        "padroes": {
+            # Termo contido no texto (sem acentos): "engenharia civil" em "curso de engenharia civil"
+            "cursos_norm": padrao_trie(cursos_sem_acento),
+            # Termo contido no texto minúsculo (com acentos)
+            "cursos": padrao_trie(set(cursos)),
+            "instituicao": padrao_trie(set(instituicao)),
+            "orientador": padrao_trie(set(palavras_orientador)),
+            # Instituição no início do texto ou como palavra separada por espaços
+            "instituicao_palavra": padrao_trie({i.lower().strip() for i in instituicao}),
+        },
+    }
+
+
+def _carregar_indices():
+    try:
+        with open(ARQUIVO_INDICES, encoding="utf-8") as arquivo:
+            indices = json.load(arquivo)
+    except (OSError, ValueError):
+        return montar_indices()
+    if indices.get("impressao_digital") != _impressao_digital():
+        return montar_indices()
+    return indices
+
+
+class _PadraoSobDemanda:
+    """
+    Expressão regular compilada no primeiro uso: o ``re.compile`` destas
+    árvores é a parte cara da importação. Depois da compilação os métodos
+    ficam no próprio objeto, sem custo extra por chamada.
+    """
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+
+    def __getattr__(self, nome):
+        valor = getattr(re.compile(self.pattern), nome)
+        setattr(self, nome, valor)
+        return valor
+
+
+_indices = _carregar_indices()
+_padroes = _indices["padroes"]
+
+# Comparação exata: conjuntos com os termos em minúsculo e sem acentos
+cidades_norm = frozenset(_indices["cidades_norm"])
+cursos_norm = frozenset(_indices["cursos_norm"])
+
+re_cursos_norm = _PadraoSobDemanda(_padroes["cursos_norm"])
+re_cursos = _PadraoSobDemanda(_padroes["cursos"])
+re_instituicao = _PadraoSobDemanda(_padroes["instituicao"])
+re_orientador = _PadraoSobDemanda(_padroes["orientador"])
+re_instituicao_palavra = _PadraoSobDemanda(
+    rf"^(?:{_padroes['instituicao_palavra']})|(?<![^ ])(?:{_padroes['instituicao_palavra']})(?![^ ])"
+)
+
+
+if __name__ == "__main__":
+    with open(ARQUIVO_INDICES, "w", encoding="utf-8") as arquivo:
+        json.dump(montar_indices(), arquivo, ensure_ascii=False, indent=1)
+    print(f"{ARQUIVO_INDICES} gerado.")
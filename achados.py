@@ -0,0 +1,84 @@
+"""
+Achados da verificação ABNT: qual regra foi violada, em que parágrafo, com
+que gravidade e com os valores esperado e encontrado.
+
+O relatório antigo (uma frase com emoji por regra) sai de ``regras``, o
+conjunto das regras violadas, e só vira texto na hora de responder. Os
+achados de cada parágrafo só são guardados quando quem chamou pede
+(``Achados(detalhar=True)``); sem isso a verificação anota apenas quais
+regras apareceram e pode parar de ler o documento quando nada mais muda o
+relatório.
+"""
+from collections import Counter
+
+ERRO = "erro"
+AVISO = "aviso"
+
+# Regra → gravidade
+GRAVIDADES = {
+    "margem_superior": ERRO,
+    "margem_inferior": ERRO,
+    "margem_esquerda": ERRO,
+    "margem_direita": ERRO,
+    "fonte_12": ERRO,
+    "alinhamento_justificado": AVISO,
+}
+
+
+class Achado:
+    """
+    Uma regra violada. ``conteiner`` e ``indice`` localizam o parágrafo
+    (``indice`` conta os parágrafos daquele tipo de contêiner, na ordem de
+    ``blocos.iterar_blocos``: ("corpo", 12) é ``doc.paragraphs[12]``); nas
+    regras do documento inteiro, como as margens, os dois ficam None.
+    """
+
+    __slots__ = ("regra", "conteiner", "indice", "esperado", "obtido")
+
+    def __init__(self, regra, conteiner=None, indice=None, esperado=None, obtido=None):
+        self.regra = regra
+        self.conteiner = conteiner
+        self.indice = indice
+        self.esperado = esperado
+        self.obtido = obtido
+
+    @property
+    def gravidade(self):
+        return GRAVIDADES[self.regra]
+
+    def como_dict(self):
+        """Forma compacta para o JSON: campos vazios ficam de fora."""
+        dados = {"regra": self.regra, "gravidade": self.gravidade}
+        for campo in ("conteiner", "indice", "esperado", "obtido"):
+            valor = getattr(self, campo)
+            if valor is not None:
+                dados[campo] = valor
+        return dados
+
+
+class Achados:
+    """Regras violadas de um documento e, com ``detalhar``, cada ocorrência."""
+
+    def __init__(self, detalhar=False):
+        self.regras = set()
+        self.itens = [] if detalhar else None
+
+    @property
+    def detalhar(self):
+        return self.itens is not None
+
+    def registrar(self, regra, conteiner=None, indice=None, esperado=None, obtido=None):
+        self.regras.add(regra)
+        if self.itens is not None:
+            self.itens.append(Achado(regra, conteiner, indice, esperado, obtido))
+
+    def completo(self, regras):
+        """Sem detalhes, nada mais a anotar quando todas as ``regras`` já apareceram."""
+        return self.itens is None and self.regras >= regras
+
+    def resumo(self):
+        """Ocorrências por regra (só com ``detalhar``)."""
+        return dict(Counter(achado.regra for achado in self.itens or ()))
+
+    def como_lista(self):
+        return [achado.como_dict() for achado in self.itens or ()]
@@ -1,25 +1,131 @@
-from flask import Flask, request, send_file
+from flask import Blueprint, Flask, Request, Response, g, request, send_file, stream_with_context, url_for
 from flask_cors import CORS
 from docx import Document
 from docx.enum.text import WD_ALIGN_PARAGRAPH, WD_COLOR_INDEX
 from docx.shared import Pt, Cm, RGBColor
 from docx.oxml.ns import qn
+from docx.text.paragraph import Paragraph
 import tempfile
-import re
-from Condicoes import cidades_bahia, palavras_orientador, cursos, instituicao
-import unicodedata
+import io
+from Condicoes import (
+    cidades_bahia, palavras_orientador, cursos, instituicao,
+    cidades_norm, cursos_norm, re_cursos, re_cursos_norm, re_instituicao,
+    re_instituicao_palavra, re_orientador,
+)
+from documento import obter_snapshot
+from normalizacao import dobrado
+from padroes import (
+    padrao_ano, padrao_autor, padrao_digito_inicial, padrao_espacos, padrao_estado_da_bahia,
+    padrao_keywords, padrao_nome_e_sobrenome, padrao_nome_proprio, padrao_numeracao_e_titulo,
+    padrao_numero_secao, padrao_palavras_chave, padrao_pontuacao, padrao_quatro_digitos,
+    padrao_separador_termos, padrao_sufixo_barra_uf, padrao_sufixo_espaco_uf, padrao_sufixo_virgula_uf,
+    padrao_titulo_apos_referencias,
+)
+from trechos import (
+    W_R, contar_fontes, definir_fonte, definir_tamanho, normalizar_trechos, pintar_de_preto, tamanhos,
+    texto,
+)
+from blocos import CORPO, iterar_blocos
+from resultados import ArmazemDisco, ArmazemResultados
+from cache import criar_cache, diretorio_cache, sha256_stream
+from tarefas import GerenciadorTarefas, FilaCheia, RegistroTarefas
+from metricas import MedicaoPipeline, RegistroMetricas, novo_perfil, relatorio_perfil
+from verificacao import (
+    VerificacaoIndisponivel, eh_corpo, mensagens_formatacao, mensagens_margens, registrar_margens,
+    verificar_alinhamento, verificar_stream, verificar_tamanhos,
+)
+from achados import Achados
+from caracteristicas import e, indices, nao, ou
+from envio import ArquivoEnviado, EnvioRecusado, conferir_docx
+from incremental import MemoriaParagrafos, identidade, memoria_do
+from pacote import salvar_pacote
+from referencias import entradas as entradas_referencias
+from lote import NomesUnicos, ZipStream, assumir_stream, entradas_do_zip, entradas_dos_arquivos
+import json
+import os
+import time
+import logging
+import importlib
+import zipfile
+
+
+# Uploads e arquivos gerados ficam em memória até este tamanho; acima
+# disso vão para um arquivo temporário anônimo, apagado ao ser fechado
+LIMITE_MEMORIA_ARQUIVO = 16 * 1024 * 1024
+
+# Tamanho máximo da requisição (MAX_CONTENT_LENGTH) e do /lote. Acima disso
+# a resposta é 413 sem ler o corpo (ou assim que passa do limite, quando
+# não vem Content-Length). ABNT_MAX_ENVIO_MB e ABNT_MAX_LOTE_MB
+MAX_ENVIO = int(os.environ.get("ABNT_MAX_ENVIO_MB", "50")) * 1024 * 1024
+MAX_LOTE = int(os.environ.get("ABNT_MAX_LOTE_MB", "500")) * 1024 * 1024
+
+
+class RequisicaoABNT(Request):
+    # Todo upload da API é um .docx ou um .zip: o que não começa com a
+    # assinatura do ZIP é recusado no primeiro bloco recebido. O /lote
+    # desliga, porque ignora os arquivos que não são .docx em vez de
+    # recusar o lote inteiro.
+    conferir_assinatura = True
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if self.conferir_assinatura:
+            return ArquivoEnviado(LIMITE_MEMORIA_ARQUIVO)
+        return tempfile.SpooledTemporaryFile(max_size=LIMITE_MEMORIA_ARQUIVO, mode="rb+")
+
+
+log = logging.getLogger(__name__)
+
+# Rotas da API; a aplicação é montada por criar_app()
+rotas = Blueprint("abnt", __name__)
+
+# Detector da capa usado por formatar_capa:
+# "classificar" → classificar_linhas sobre as linhas antes do RESUMO (padrão:
+#                 é o que formatar_capa sempre usou)
+# "janela" → detectar_tipo só nas linhas antes do RESUMO, até estabilizar
+# "legado" → detectar_tipo no documento inteiro, 8 passadas
+# Os dois últimos ainda deixam de reconhecer linhas que classificar_linhas
+# reconhece (títulos curtos, cursos), e formatar_capa descarta as linhas não
+# reconhecidas: só servem para comparação (benchmarks/detector_capa.py).
+DETECTOR_CAPA = "classificar"
+
+# Arquivos formatados pelo /processar, aguardando o download (com
+# ABNT_ESTADO=disco, em ABNT_CACHE_DIR/downloads, para todos os workers),
+# até ABNT_DOWNLOADS_MAX_MB no total
+ESTADO_COMPARTILHADO = os.environ.get("ABNT_ESTADO", "memoria") == "disco"
+MAX_DOWNLOADS = int(os.environ.get("ABNT_DOWNLOADS_MAX_MB", "256")) * 1024 * 1024
+resultados_formatados = (
+    ArmazemDisco(os.path.join(diretorio_cache(), "downloads"), max_bytes=MAX_DOWNLOADS)
+    if ESTADO_COMPARTILHADO else ArmazemResultados(max_bytes=MAX_DOWNLOADS)
+)
+
+# Versão das regras de formatação/verificação. Faz parte da chave do cache:
+# aumente sempre que uma mudança alterar o resultado para o mesmo arquivo.
+VERSAO_PIPELINE = "5"
+
+# Resultados já calculados, indexados pelo SHA-256 do arquivo enviado
+# (None quando ABNT_CACHE=desligado)
+cache_resultados = criar_cache(VERSAO_PIPELINE)
+
+# Guarda no cache, por trabalho, o resultado de cada parágrafo nas etapas
+# por parágrafo; no próximo envio só os que mudaram são formatados de novo
+# (veja incremental.py). Desligado com ABNT_INCREMENTAL=0
+FORMATACAO_INCREMENTAL = os.environ.get("ABNT_INCREMENTAL", "1") != "0"
+
+# Tempos das etapas e das rotas, exportados em /metrics
+metricas = RegistroMetricas()
+
+# /verificar?modo=resumo devolve as ocorrências de cada regra;
+# ?modo=detalhado, os achados (regra, parágrafo, esperado/obtido) paginados
+# com ?pagina= e ?por_pagina=
+MODOS_VERIFICACAO = ("mensagens", "resumo", "detalhado")
+POR_PAGINA = 100
+MAX_POR_PAGINA = 1000
+
+# Permite ?perfil=1 (ou ?perfil=prof) para receber o cProfile da
+# requisição no lugar da resposta. Desligado por padrão: ABNT_PERFIL=1
+PERFIL_HABILITADO = os.environ.get("ABNT_PERFIL") == "1"
 
 
-app = Flask(__name__)
-CORS(app)
-
-
-ja_tem_autor = False
-ja_tem_cidade = False
-ja_tem_instituicao = False
-ja_tem_titulo_capa = False
-ja_tem_curso = False
-ja_tem_ano = False
 
 
 def _normalizar_para_busca(texto):
@@ -29,16 +135,16 @@ def _normalizar_para_busca(texto):
     t = texto.strip().lower()
 
     # remove sufixos comuns: "- ba", "/ba", ", ba", " - bahia", "/bahia", etc.
-    t = re.sub(r'[-/]\s*ba(hia)?\b', '', t)            # "- ba", "/bahia"
-    t = re.sub(r',\s*ba(hia)?\b', '', t)               # ", BA"
-    t = re.sub(r'\s+ba(hia)?\b', '', t)                # " BA" ou " BAHIA"
-    t = re.sub(r'\bestado da bahia\b', '', t)
+    t = padrao_sufixo_barra_uf.sub('', t)       # "- ba", "/bahia"
+    t = padrao_sufixo_virgula_uf.sub('', t)     # ", BA"
+    t = padrao_sufixo_espaco_uf.sub('', t)      # " BA" ou " BAHIA"
+    t = padrao_estado_da_bahia.sub('', t)
 
     # remove pontuação (mantém letras e espaços)
-    t = re.sub(r'[^0-9a-zà-ú\s]', ' ', t, flags=re.IGNORECASE)
+    t = padrao_pontuacao.sub(' ', t)
 
     # colapsa espaços e trim
-    t = re.sub(r'\s+', ' ', t).strip()
+    t = padrao_espacos.sub(' ', t).strip()
     return t
 
 def detectar_tipo(linha, identificados):
@@ -55,7 +161,7 @@ def detectar_tipo(linha, identificados):
     # 2) CIDADE (com lista prévia e UF opcional)
     # ============================================
     if identificados["cidade"] is None:
-        cidade = eh_cidade(texto_original, cidades_bahia)
+        cidade = eh_cidade(texto_original)
         if cidade:
             return "cidade"
 
@@ -68,13 +174,11 @@ def detectar_tipo(linha, identificados):
     # ============================================
     # 4) CURSO / TIPO DE TRABALHO
     # ============================================
+    texto_norm = dobrado(texto_original)
 
     if identificados["curso"] is None:
-
-        texto_norm = remover_acentos(texto_lower)
-        for c in cursos:
-            if texto_norm == remover_acentos(c.lower()):
-                return "curso"
+        if texto_norm in cursos_norm:
+            return "curso"
 
     if "curso de " in texto_norm or "bacharelado em" in texto_norm:
         if len(texto_original.split()) >= 2:
@@ -92,11 +196,11 @@ def detectar_tipo(linha, identificados):
             # Todas começam com Maiúscula
             if all(p[0].isupper() and p[1:].islower() for p in palavras if len(p) > 1):
                 # Não contém palavras de instituição
-                if not any(k in texto_lower for k in instituicao):
+                if not re_instituicao.search(texto_lower):
                     # Não contém curso
-                    if not any(k in texto_lower for k in cursos):
+                    if not re_cursos.search(texto_lower):
                         # Não contém cidade
-                        if not eh_cidade(texto_original, cidades_bahia):
+                        if not eh_cidade(texto_original):
                             return "autor"
 
     # ============================================
@@ -119,8 +223,54 @@ def detectar_tipo(linha, identificados):
     return None
 
 
-def identificar_linhas_da_capa(doc):
-    linhas = [p.text for p in doc.paragraphs]
+def identificar_linhas_da_capa(doc, modo=None):
+    """
+    Identifica as linhas da capa (índices no documento).
+
+    Lê apenas a janela da capa (antes do RESUMO) e repete a varredura só
+    enquanto alguma linha nova for classificada. ``modo="legado"`` reproduz
+    a varredura antiga (documento inteiro, 8 passadas), para comparação.
+    """
+    if modo == "legado":
+        return identificar_linhas_da_capa_legado(doc)
+
+    snap = obter_snapshot(doc)
+    linhas = snap.brutos[:snap.secoes()["capa"][1]]
+
+    identificados = {
+        "instituicao": None,
+        "autor": None,
+        "curso": None,
+        "titulo": None,
+        "subtitulo": None,
+        "cidade": None,
+        "ano": None
+    }
+
+    # Só as linhas ainda não classificadas voltam para a próxima passada
+    pendentes = [i for i, linha in enumerate(linhas) if linha.strip()]
+
+    while pendentes:
+        restantes = []
+        for i in pendentes:
+            tipo = detectar_tipo(linhas[i], identificados)
+
+            if tipo and identificados[tipo] is None:
+                identificados[tipo] = i  # <- trava a linha como aquele tipo
+            else:
+                restantes.append(i)
+
+        # Ponto fixo: nenhuma linha nova classificada → as próximas
+        # passadas repetiriam exatamente o mesmo resultado
+        if len(restantes) == len(pendentes):
+            break
+        pendentes = restantes
+
+    return identificados
+
+
+def identificar_linhas_da_capa_legado(doc):
+    linhas = obter_snapshot(doc).brutos
 
     identificados = {
         "instituicao": None,
@@ -152,23 +302,13 @@ def identificar_linhas_da_capa(doc):
 
 
 def detectar_fonte_principal(doc):
-    contagem_fontes = {}
-
     # Verifica a fonte configurada no estilo Normal
     try:
         estilo_normal = doc.styles["Normal"].font.name
     except:
         estilo_normal = None
 
-    for p in doc.paragraphs:
-        for run in p.runs:
-            fonte = run.font.name or estilo_normal or "Arial"
-            fonte = fonte.strip()
-
-            if fonte not in contagem_fontes:
-                contagem_fontes[fonte] = 0
-
-            contagem_fontes[fonte] += len(run.text)
+    contagem_fontes = contar_fontes(obter_snapshot(doc).paragrafos, estilo_normal)
 
     # Descobre a fonte mais usada
     fonte_predominante = max(contagem_fontes, key=contagem_fontes.get)
@@ -194,7 +334,7 @@ def classificar_capa(texto):
         return "instituicao"
 
     # Autor: costuma ter nome + sobrenome iniciando maiúsculas
-    if re.match(r'^[A-ZÁÀÃÂÉÍÓÚ][a-z].+ [A-ZÁÀÃÂÉÍÓÚ][a-z].+', texto_limpo):
+    if padrao_nome_e_sobrenome.match(texto_limpo):
         return "autor"
 
     # Curso
@@ -202,7 +342,7 @@ def classificar_capa(texto):
         return "curso"
 
     # Título da capa: mais longo, não precisa ser uppercase
-    if len(texto_limpo.split()) >= 4 and not re.match(r'^\d', texto_limpo):
+    if len(texto_limpo.split()) >= 4 and not padrao_digito_inicial.match(texto_limpo):
         return "titulo_capa"
 
     # Subtitulo (se houver)
@@ -214,7 +354,7 @@ def classificar_capa(texto):
         return "cidade"
 
     # Ano (4 dígitos)
-    if re.match(r'^\d{4}$', texto_limpo):
+    if padrao_quatro_digitos.fullmatch(texto_limpo):
         return "ano"
 
     return "outro"
@@ -222,31 +362,19 @@ def classificar_capa(texto):
 def eh_ano(texto):
     texto = (texto or "").strip()
     # procura um ano isolado como 1999, 2025, 2010 (entre limites razoáveis)
-    m = re.search(r"\b(19|20)\d{2}\b", texto)
+    m = padrao_ano.search(texto)
     if m:
         # opcional: retorna o ano encontrado se precisar
         return True
     return False
 
 
-
-from Condicoes import cidades_bahia
-
-
-def remover_acentos(txt):
-    """Remove acentos e normaliza texto para comparação segura."""
-    return ''.join(
-        c for c in unicodedata.normalize('NFD', txt)
-        if unicodedata.category(c) != 'Mn'
-    )
-
 def eh_cidade(texto):
-    texto_norm = remover_acentos(texto.strip().lower())
+    texto_norm = dobrado(texto)
 
     # CIDADES EXATAS
-    for c in cidades_bahia:
-        if remover_acentos(c.lower()) == texto_norm:
-            return True
+    if texto_norm in cidades_norm:
+        return True
 
     # CIDADE + UF (ex: Salvador - BA, Feira de Santana BA)
     if texto_norm.endswith(" ba") or texto_norm.endswith("-ba"):
@@ -254,34 +382,22 @@ def eh_cidade(texto):
 
     return False
 
-print(eh_cidade("Feira de Santana"))
 
 def eh_instituicao(texto):
     texto_lower = texto.lower()
 
-    for inst in instituicao:
-        inst_lower = inst.lower().strip()
-
-        # Evita falso positivo parcial (ex: "centro" dentro de "concentração")
-        if f" {inst_lower} " in f" {texto_lower} ":
-            return True
-
-        if texto_lower.startswith(inst_lower):
-            return True
-
-    return False
+    # Termo no início do texto ou como palavra inteira
+    # (evita falso positivo parcial, ex: "centro" dentro de "concentração")
+    return re_instituicao_palavra.search(texto_lower) is not None
 
 
 def eh_curso(txt): 
-    t = remover_acentos(txt.strip().lower()) 
-    for c in cursos: 
-        if remover_acentos(c.lower()) in t: 
-            return True
-    return False
+    t = dobrado(txt)
+    return re_cursos_norm.search(t) is not None
 
 def eh_autor(t):
     # Nome de pessoa: 2 a 5 palavras com iniciais maiúsculas
-    return re.fullmatch(r"([A-ZÁÉÍÓÚÂÊÔÃÕ][a-záéíóúâêôãõç]+)(\s+[A-ZÁÉÍÓÚÂÊÔÃÕ][a-záéíóúâêôãõç]+){1,4}", t) is not None
+    return padrao_autor.fullmatch(t) is not None
 
 def classificar_linhas(linhas):
     """
@@ -299,9 +415,20 @@ def classificar_linhas(linhas):
     }
 
     titulo_identificado = False
-    resto = linhas[:]
+    resto = [t for t in linhas if t.strip()]
+
+    # Cada teste depende só do texto da linha (o estado do título já entra
+    # nos argumentos), então o resultado de uma passada vale para as
+    # seguintes: cada teste roda no máximo uma vez por linha.
+    memo = {}
+
+    def testa(teste, s, *args):
+        chave = (teste, s) + args
+        if chave not in memo:
+            memo[chave] = teste(s, *args)
+        return memo[chave]
 
-    for _ in range(7):  # repete para refinar
+    for _ in range(7):  # repete para refinar (para quando nada muda)
         novos_resto = []
         for t in resto:
             s = t.strip()
@@ -309,23 +436,23 @@ def classificar_linhas(linhas):
                 continue
 
             # 1 — ANO
-            if identificados["ano"] is None and eh_ano(s):
+            if identificados["ano"] is None and testa(eh_ano, s):
                 identificados["ano"] = s
                 continue
 
             # 2 — INSTITUIÇÃO
-            if identificados["instituicao"] is None and eh_instituicao(s):
+            if identificados["instituicao"] is None and testa(eh_instituicao, s):
                 identificados["instituicao"] = s
                 continue
 
             # 3 — CURSO (antes do autor para evitar confusão)
-            if identificados["curso"] is None and eh_curso(s):
+            if identificados["curso"] is None and testa(eh_curso, s):
                 identificados["curso"] = s
                 continue
 
             # 4 — TÍTULO (usa estado)
             if identificados["titulo"] is None:
-                eh, novo_estado = eh_titulo(s, titulo_identificado)
+                eh, novo_estado = testa(eh_titulo, s, titulo_identificado)
                 if eh:
                     identificados["titulo"] = s
                     titulo_identificado = novo_estado
@@ -333,17 +460,17 @@ def classificar_linhas(linhas):
 
             # 5 — SUBTÍTULO (só após título)
             if identificados["titulo"] and identificados["subtitulo"] is None:
-                if eh_subtitulo(s, titulo_identificado):
+                if testa(eh_subtitulo, s, titulo_identificado):
                     identificados["subtitulo"] = s
                     continue
 
             # 6 — AUTOR
-            if identificados["autor"] is None and eh_autor(s):
+            if identificados["autor"] is None and testa(eh_autor, s):
                 identificados["autor"] = s
                 continue
 
             # 7 — CIDADE
-            if identificados["cidade"] is None and eh_cidade(s):
+            if identificados["cidade"] is None and testa(eh_cidade, s):
                 identificados["cidade"] = s
                 continue
 
@@ -355,78 +482,42 @@ def classificar_linhas(linhas):
 
     return identificados
 
-def normalizar(texto):
-    if not texto:
-        return ""
-    texto = texto.strip().lower()
-    texto = unicodedata.normalize('NFD', texto)
-    texto = "".join(c for c in texto if unicodedata.category(c) != "Mn")
-    texto = " ".join(texto.split())  # remove espaços duplicados
-    return texto
+def localizar_linhas_da_capa(doc, linhas, modo=None):
+    """
+    Índices das linhas da capa usados por formatar_capa, pelo detector
+    ``modo`` (padrão DETECTOR_CAPA): classificar_linhas sobre ``linhas`` ou
+    um dos detectores por linha de identificar_linhas_da_capa.
+    """
+    modo = modo or DETECTOR_CAPA
+    if modo != "classificar":
+        return identificar_linhas_da_capa(doc, modo)
+
+    identificados_indices = {}
+    classificados = classificar_linhas(linhas)
+    for chave, valor in classificados.items():
+        if valor:
+            try:
+                identificados_indices[chave] = linhas.index(valor)
+            except ValueError:
+                identificados_indices[chave] = None
+        else:
+            identificados_indices[chave] = None
+    return identificados_indices
 
 
 def formatar_capa(doc):
     """
-    Analisa os parágrafos após o resumo (sem formatar nada) e depois
-    reconstrói apenas a capa na ordem ABNT.
-
-    A análise verifica:
-    - Parágrafos devem ser JUSTIFICADOS
-    - Títulos de seções devem ser alinhados À ESQUERDA
+    Reconstrói apenas a capa na ordem ABNT.
     """
 
-    avisos = []  # lista que será retornada ao final
+    snap = obter_snapshot(doc)
+    limite = snap.secoes()["capa"][1]
 
     # ---------------------------------------------------------
-    # 1) ENCONTRAR O RESUMO
+    # 1) CAPTURA DA CAPA (PARTE EXISTENTE DO SEU CÓDIGO)
     # ---------------------------------------------------------
-    index_resumo = None
-    for idx, p in enumerate(doc.paragraphs):
-        if p.text and p.text.strip().lower().startswith("resumo"):
-            index_resumo = idx
-            break
-
-    limite = index_resumo if index_resumo is not None else len(doc.paragraphs)
-
-    # ---------------------------------------------------------
-    # 2) FAZER ANÁLISE ABNT *ANTES* DE FORMATAR A CAPA
-    # ---------------------------------------------------------
-    if index_resumo is not None:
-        for idx in range(index_resumo + 1, len(doc.paragraphs)):
-            p = doc.paragraphs[idx]
-            texto = p.text.strip()
-
-            if not texto:
-                continue
-
-            # Detecta SEÇÕES — ABNT exige alinhamento à esquerda
-            if texto.isupper() and len(texto.split()) <= 6:
-                if p.alignment != WD_ALIGN_PARAGRAPH.LEFT:
-                    avisos.append(f"A seção '{texto}' deve ser alinhada à esquerda.")
-                continue
-
-            # ANALISAR PARÁGRAFOS COMUNS (devem ser justificados)
-            if p.alignment != WD_ALIGN_PARAGRAPH.JUSTIFY:
-                avisos.append(f"O parágrafo '{texto[:40]}...' deve ser justificado.")
-
-    # ---------------------------------------------------------
-    # 3) CAPTURA DA CAPA (PARTE EXISTENTE DO SEU CÓDIGO)
-    # ---------------------------------------------------------
-    linhas = [p.text for p in doc.paragraphs[:limite]]
-
-    try:
-        identificados_indices = identificar_linhas_da_capa(doc)
-    except Exception:
-        identificados_indices = {}
-        classificados = classificar_linhas(linhas)
-        for chave, valor in classificados.items():
-            if valor:
-                try:
-                    identificados_indices[chave] = linhas.index(valor)
-                except ValueError:
-                    identificados_indices[chave] = None
-            else:
-                identificados_indices[chave] = None
+    linhas = snap.brutos[:limite]
+    identificados_indices = localizar_linhas_da_capa(doc, linhas)
 
     def txt(idx):
         return linhas[idx].strip() if (idx is not None and 0 <= idx < len(linhas) and linhas[idx].strip()) else None
@@ -495,13 +586,13 @@ def formatar_capa(doc):
     # ---------------------------------------------------------
     first_idx = 0
     for idx in range(limite):
-        if doc.paragraphs[idx].text.strip():
+        if snap.textos[idx]:
             first_idx = idx
             break
 
     for offset, (tipo, texto) in enumerate(capa_ordem):
         target_idx = first_idx + offset
-        p = doc.paragraphs[target_idx]
+        p = snap.paragrafos[target_idx]
         p.text = texto.strip()
         p.alignment = WD_ALIGN_PARAGRAPH.CENTER
         p.paragraph_format.right_indent = Pt(0)
@@ -517,26 +608,14 @@ def formatar_capa(doc):
             run = p.add_run(original.upper())
             run.font.size = Pt(14)
             run.bold = True
-            
+
+        snap.atualizar(target_idx)
 
     start_clean = first_idx + len(capa_ordem)
     for idx in range(start_clean, limite):
-        doc.paragraphs[idx].text = ""
-
-    # ---------------------------------------------------------
-    # 5) RETORNA OS AVISOS AO USUÁRIO
-    # ---------------------------------------------------------
-    return avisos
-
-
-# -----------------------------------------------------------
-# 🔹 Estado global para garantir que o título só apareça 1x
-# -----------------------------------------------------------
+        snap.definir_texto(idx, "")
 
 
-
-from docx import Document
-
 def eh_titulo(texto, titulo_identificado):
     """
     Detecta se o texto é o título principal da capa.
@@ -580,7 +659,7 @@ def eh_subtitulo(texto, titulo_identificado):
         return False
 
     # Não pode ser nome de autor
-    if re.match(r'^[A-ZÁÉÍÓÚÂÊÔÃÕ][a-záéíóúâêôãõç]+(\s+[A-ZÁÉÍÓÚÂÊÔÃÕ][a-záéíóúâêôãõç]+)+$', texto_limpo):
+    if padrao_nome_proprio.match(texto_limpo):
         return False
 
     # Não pode ser cidade simples (ex: "Feira de Santana")
@@ -588,7 +667,7 @@ def eh_subtitulo(texto, titulo_identificado):
         return False
 
     # Não pode ser ano
-    if re.fullmatch(r'\d{4}', texto_limpo):
+    if padrao_quatro_digitos.fullmatch(texto_limpo):
         return False
 
     return True
@@ -599,116 +678,121 @@ def eh_subtitulo(texto, titulo_identificado):
 def identificar_titulos(doc):
     titulo_identificado = False
 
-    for p in doc.paragraphs:
-        texto = p.text.strip()
+    for texto in obter_snapshot(doc).textos:
         if not texto:
             continue
 
         eh_tit, titulo_identificado = eh_titulo(texto, titulo_identificado)
         if eh_tit:
-            print("Título principal encontrado:", texto)
+            log.debug("Título principal encontrado: %s", texto)
             continue
 
         if eh_subtitulo(texto, titulo_identificado):
-            print("Subtítulo encontrado:", texto)
+            log.debug("Subtítulo encontrado: %s", texto)
 
 
 
 # -------- CLASSIFICAR PARÁGRAFOS --------
+class ContextoCapa:
+    """
+    Estado da classificação da capa de UM documento: se o título já foi
+    visto e quais tipos já foram formatados. Cada aplicar_formatacao cria
+    o seu; classificar_texto não guarda nada entre chamadas, então
+    documentos em threads diferentes não dividem estado.
+    """
+
+    TIPOS = ("instituicao", "autor", "orientador", "curso", "titulo_capa", "subtitulo", "cidade", "ano")
+
+    def __init__(self):
+        self.titulo_identificado = False
+        self.encontrado = dict.fromkeys(self.TIPOS, False)
+
+    def classificar(self, texto):
+        tipo, self.titulo_identificado = classificar_texto(texto, self.titulo_identificado)
+        return tipo
+
+    def primeiro(self, tipo):
+        """True só na primeira vez que um dos TIPOS aparece."""
+        if self.encontrado.get(tipo, True):
+            return False
+        self.encontrado[tipo] = True
+        return True
+
+
 def classificar_texto(texto, titulo_identificado):
-    global ja_tem_autor, ja_tem_cidade, ja_tem_instituicao
-    global ja_tem_titulo_capa, ja_tem_curso, ja_tem_ano
-
-    ja_tem_autor = False
-    ja_tem_cidade = False
-    ja_tem_instituicao = False
-    ja_tem_titulo_capa = False
-    ja_tem_curso = False
-    ja_tem_ano = False
+    """
+    (tipo, titulo_identificado) da linha. Só depende dos argumentos: o
+    "primeiro de cada tipo" do documento fica no ContextoCapa.
+    """
     texto = texto.strip()
     if not texto:
         return "vazio", titulo_identificado
 
     texto_lower = texto.lower()
-    texto_norm = remover_acentos(texto_lower)
+    texto_norm = dobrado(texto)
 
     # ============================================================
     # 1 — ANO  (vem antes de tudo)
     # ============================================================
-    if not ja_tem_ano and eh_ano(texto):
-        ja_tem_ano = True
+    if eh_ano(texto):
         return "ano", titulo_identificado
 
     # ============================================================
     # 2 — CIDADE  (prioridade máxima)
     # ============================================================
-    if not ja_tem_cidade and eh_cidade(texto):
+    if eh_cidade(texto):
         linha_curta = len(texto) <= 40
         termina_com_uf = texto_norm.endswith(" ba") or texto_norm.endswith(" bahia")
-        somente_cidade = any(remover_acentos(c.lower()) == texto_norm for c in cidades_bahia)
+        somente_cidade = texto_norm in cidades_norm
 
         if linha_curta or termina_com_uf or somente_cidade:
-            ja_tem_cidade = True
             return "cidade", titulo_identificado
 
     # ============================================================
     # 3 — AUTOR
     # ============================================================
-    if not ja_tem_autor and eh_autor(texto):
-        ja_tem_autor = True
+    if eh_autor(texto):
         return "autor", titulo_identificado
 
     # ============================================================
     # 4 — ORIENTADOR
     # ============================================================
-    if any(p in texto_lower for p in palavras_orientador):
+    if re_orientador.search(texto_lower):
         return "orientador", titulo_identificado
 
     # ============================================================
     # 5 — INSTITUIÇÃO
     # ============================================================
-    if not ja_tem_instituicao and eh_instituicao(texto):
-        ja_tem_instituicao = True
+    if eh_instituicao(texto):
         return "instituicao", titulo_identificado
 
     # ============================================================
     # 6 — CURSO
     # ============================================================
-    if not ja_tem_curso and eh_curso(texto):
-        ja_tem_curso = True
+    if eh_curso(texto):
         return "curso", titulo_identificado
 
     # ============================================================
     # 7 — TÍTULO DA CAPA
     # ============================================================
     eh_tit, novo_estado = eh_titulo(texto, titulo_identificado)
-    if not ja_tem_titulo_capa and eh_tit:
-        ja_tem_titulo_capa = True
+    if eh_tit:
         return "titulo_capa", novo_estado
 
-    # 8 — SUBTÍTULO DA CAPA (linha logo após o título da capa)
-    texto_sem_acentos = remover_acentos(texto)
-
-    if ja_tem_titulo_capa and not ja_tem_autor:
-    # Aceita frase maiúscula SEM acentos
-        if texto_sem_acentos.isupper() and len(texto.split()) > 1:
-          return "subtitulo_capa", titulo_identificado
-
-
     # ============================================================
-    # 9 — TÍTULOS DO CORPO
+    # 8 — TÍTULOS DO CORPO
     # ============================================================
-    if re.match(r"^\d+\s+[A-ZÁÉÍÓÚÂÊÔÃÕ]", texto):
-        return "titulo_principal", titulo_identificado
-
-    if re.match(r"^\d+\.\d+(\.\d+)*\s+[A-ZÁÉÍÓÚÂÊÔÃÕ]", texto):
+    secao = padrao_numero_secao.match(texto)
+    if secao:
+        if secao.group("principal") is not None:
+            return "titulo_principal", titulo_identificado
         return "subtitulo", titulo_identificado
 
     if eh_subtitulo(texto, titulo_identificado):
         return "subtitulo", titulo_identificado
 
     # ============================================================
-    # 10 — PARÁGRAFO NORMAL
+    # 9 — PARÁGRAFO NORMAL
     # ============================================================
     return "paragrafo", titulo_identificado
 
@@ -721,167 +805,127 @@ def formatar_resumo(doc):
     """
 
     mensagens = []
+    snap = obter_snapshot(doc)
+
+    # Detecta o parágrafo com "RESUMO"
+    i = snap.ancora("resumo")
+    if i is not None:
+        p = snap.paragrafos[i]
+        original = snap.textos[i]
+
+        # Conteúdo na mesma linha
+        conteudo_mesma_linha = ""
+        if ":" in original:
+            partes = original.split(":", 1)
+            conteudo_mesma_linha = partes[1].strip()
+
+        # --- FORMATAÇÃO DO TÍTULO ---
+        p.text = ""
+        run = p.add_run("RESUMO")
+        run.bold = True
+        run.font.size = Pt(12)
+        p.alignment = WD_ALIGN_PARAGRAPH.CENTER
+        p.paragraph_format.right_indent = Pt(0)
+        p.paragraph_format.left_indent = Pt(0)
+        snap.atualizar(i)
 
-    for i, p in enumerate(doc.paragraphs):
-        original = (p.text or "").strip()
-        if not original:
-            continue
-
-        # Detecta o parágrafo com "RESUMO"
-        if original.lower().startswith("resumo"):
-
-            # Conteúdo na mesma linha
-            conteudo_mesma_linha = ""
-            if ":" in original:
-                partes = original.split(":", 1)
-                conteudo_mesma_linha = partes[1].strip()
 
-            # --- FORMATAÇÃO DO TÍTULO ---
-            p.text = ""
-            run = p.add_run("RESUMO")
-            run.bold = True
-            run.font.size = Pt(12)
-            p.alignment = WD_ALIGN_PARAGRAPH.CENTER
-            p.paragraph_format.right_indent = Pt(0)
-            p.paragraph_format.left_indent = Pt(0)
-
-
-            # ===========================
-            # 1) Se havia texto após "RESUMO:"
-            # ===========================
-            if conteudo_mesma_linha:
-                if i + 1 < len(doc.paragraphs):
-                    novo_para = doc.paragraphs[i + 1].insert_paragraph_before(conteudo_mesma_linha)
-                else:
-                    novo_para = doc.add_paragraph(conteudo_mesma_linha)
-
-                novo_para.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
-                novo_para.paragraph_format.first_line_indent = None
-                novo_para.paragraph_format.left_indent = Pt(0)
-                novo_para.paragraph_format.right_indent = Pt(0)
-                novo_para.paragraph_format.line_spacing = 1.5
-
-                for r in novo_para.runs:
-                    r.font.size = Pt(12)
-
-                mensagens.append("✅ Resumo formatado corretamente (conteúdo na mesma linha).")
-                return mensagens
-
-            # ===========================
-            # 2) Resumo na linha seguinte
-            # ===========================
-            if i + 1 < len(doc.paragraphs) and doc.paragraphs[i+1].text.strip():
-                texto_para = doc.paragraphs[i+1]
-
-                texto_para.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
-                texto_para.paragraph_format.first_line_indent = None
-                texto_para.paragraph_format.left_indent = None
-                texto_para.paragraph_format.right_indent = Pt(0)
-                texto_para.paragraph_format.line_spacing = 1.5
-
-                for r in texto_para.runs:
-                    r.font.size = Pt(12)
-
-                mensagens.append("✅ Resumo formatado corretamente (linha seguinte).")
-                return mensagens
-
-            # ===========================
-            # 3) Caso não haja conteúdo
-            # ===========================
-            if i + 1 < len(doc.paragraphs):
-                if not doc.paragraphs[i + 1].text.strip():
-                    novo_para = doc.paragraphs[i + 1]
-                else:
-                    novo_para = doc.paragraphs[i + 1].insert_paragraph_before("")
+        # ===========================
+        # 1) Se havia texto após "RESUMO:"
+        # ===========================
+        if conteudo_mesma_linha:
+            if i + 1 < len(snap):
+                novo_para = snap.inserir_antes(i + 1, conteudo_mesma_linha)
             else:
-                novo_para = doc.add_paragraph("")
+                novo_para = snap.adicionar(conteudo_mesma_linha)
 
             novo_para.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
             novo_para.paragraph_format.first_line_indent = None
-            novo_para.paragraph_format.left_indent = None
+            novo_para.paragraph_format.left_indent = Pt(0)
             novo_para.paragraph_format.right_indent = Pt(0)
             novo_para.paragraph_format.line_spacing = 1.5
 
-            mensagens.append("⚠️ Título RESUMO encontrado, mas o texto estava vazio — criado parágrafo para preenchimento.")
+            for r in novo_para.runs:
+                r.font.size = Pt(12)
+
+            mensagens.append("✅ Resumo formatado corretamente (conteúdo na mesma linha).")
             return mensagens
 
+        # ===========================
+        # 2) Resumo na linha seguinte
+        # ===========================
+        if i + 1 < len(snap) and snap.textos[i + 1]:
+            texto_para = snap.paragrafos[i + 1]
+
+            texto_para.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
+            texto_para.paragraph_format.first_line_indent = None
+            texto_para.paragraph_format.left_indent = None
+            texto_para.paragraph_format.right_indent = Pt(0)
+            texto_para.paragraph_format.line_spacing = 1.5
+
+            for r in texto_para.runs:
+                r.font.size = Pt(12)
+
+            mensagens.append("✅ Resumo formatado corretamente (linha seguinte).")
+            return mensagens
+
+        # ===========================
+        # 3) Caso não haja conteúdo
+        # ===========================
+        if i + 1 < len(snap):
+            if not snap.textos[i + 1]:
+                novo_para = snap.paragrafos[i + 1]
+            else:
+                novo_para = snap.inserir_antes(i + 1, "")
+        else:
+            novo_para = snap.adicionar("")
+
+        novo_para.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
+        novo_para.paragraph_format.first_line_indent = None
+        novo_para.paragraph_format.left_indent = None
+        novo_para.paragraph_format.right_indent = Pt(0)
+        novo_para.paragraph_format.line_spacing = 1.5
+
+        mensagens.append("⚠️ Título RESUMO encontrado, mas o texto estava vazio — criado parágrafo para preenchimento.")
+        return mensagens
+
     mensagens.append("⚠️ Nenhum bloco de RESUMO encontrado.")
     return mensagens
 
 def formatar_abstract(doc):
+    snap = obter_snapshot(doc)
 
-    for i, p in enumerate(doc.paragraphs):
-        original = (p.text or "").strip()
-        if not original:
-            continue
-
-        # Detecta ABSTRACT
-        if original.lower().startswith("abstract"):
+    # Detecta ABSTRACT
+    i = snap.ancora("abstract")
+    if i is not None:
+        p = snap.paragrafos[i]
+        original = snap.textos[i]
 
-            conteudo_mesma_linha = ""
-            if ":" in original:
-                partes = original.split(":", 1)
-                conteudo_mesma_linha = partes[1].strip()
+        conteudo_mesma_linha = ""
+        if ":" in original:
+            partes = original.split(":", 1)
+            conteudo_mesma_linha = partes[1].strip()
 
-            # --- TÍTULO "ABSTRACT" ---
-            p.text = ""
-            run = p.add_run("ABSTRACT")
-            run.bold = True
-            run.font.size = Pt(12)
+        # --- TÍTULO "ABSTRACT" ---
+        p.text = ""
+        run = p.add_run("ABSTRACT")
+        run.bold = True
+        run.font.size = Pt(12)
 
-            p.alignment = WD_ALIGN_PARAGRAPH.CENTER
-            p.paragraph_format.left_indent = Cm(0)
-            p.paragraph_format.first_line_indent = Cm(0)
-            p.paragraph_format.right_indent = Pt(0)
-
-            # ============================
-            # 1) Texto na mesma linha
-            # ============================
-            if conteudo_mesma_linha:
-                if i + 1 < len(doc.paragraphs):
-                    doc.paragraphs[i + 1].insert_paragraph_before(conteudo_mesma_linha)
-                    texto_para = doc.paragraphs[i + 1]
-                else:
-                    texto_para = doc.add_paragraph(conteudo_mesma_linha)
-
-                texto_para.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
-                texto_para.paragraph_format.left_indent = None
-                texto_para.paragraph_format.first_line_indent = None
-                texto_para.paragraph_format.right_indent = Pt(0)
-                texto_para.paragraph_format.line_spacing = 1.5
-
-                for r in texto_para.runs:
-                    r.font.size = Pt(12)
-
-                return
-
-            # ============================
-            # 2) Conteúdo na linha seguinte
-            # ============================
-            if i + 1 < len(doc.paragraphs) and doc.paragraphs[i + 1].text.strip():
-                texto_para = doc.paragraphs[i + 1]
-
-                texto_para.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
-                texto_para.paragraph_format.left_indent = None
-                texto_para.paragraph_format.first_line_indent = None
-                texto_para.paragraph_format.right_indent = Pt(0)
-                texto_para.paragraph_format.line_spacing = 1.5
-
-                for r in texto_para.runs:
-                    r.font.size = Pt(12)
-
-                return
-
-            # ============================
-            # 3) Sem conteúdo → cria vazio
-            # ============================
-            if i + 1 < len(doc.paragraphs):
-                if not doc.paragraphs[i + 1].text.strip():
-                    texto_para = doc.paragraphs[i + 1]
-                else:
-                    texto_para = doc.paragraphs[i + 1].insert_paragraph_before("")
+        p.alignment = WD_ALIGN_PARAGRAPH.CENTER
+        p.paragraph_format.left_indent = Cm(0)
+        p.paragraph_format.first_line_indent = Cm(0)
+        p.paragraph_format.right_indent = Pt(0)
+        snap.atualizar(i)
+
+        # ============================
+        # 1) Texto na mesma linha
+        # ============================
+        if conteudo_mesma_linha:
+            if i + 1 < len(snap):
+                texto_para = snap.inserir_antes(i + 1, conteudo_mesma_linha)
             else:
-                texto_para = doc.add_paragraph("")
+                texto_para = snap.adicionar(conteudo_mesma_linha)
 
             texto_para.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
             texto_para.paragraph_format.left_indent = None
@@ -889,130 +933,150 @@ def formatar_abstract(doc):
             texto_para.paragraph_format.right_indent = Pt(0)
             texto_para.paragraph_format.line_spacing = 1.5
 
+            for r in texto_para.runs:
+                r.font.size = Pt(12)
+
             return
 
-def formatar_palavras_chave(doc):
-    padrao = re.compile(
-        r"^(palavras[\s\-]*chaves?|palavraschave)(:)?\s*(.*)$",
-        re.IGNORECASE
-    )
+        # ============================
+        # 2) Conteúdo na linha seguinte
+        # ============================
+        if i + 1 < len(snap) and snap.textos[i + 1]:
+            texto_para = snap.paragrafos[i + 1]
 
-    for i, p in enumerate(doc.paragraphs):
-        texto = p.text.strip()
-        if not texto:
-            continue
+            texto_para.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
+            texto_para.paragraph_format.left_indent = None
+            texto_para.paragraph_format.first_line_indent = None
+            texto_para.paragraph_format.right_indent = Pt(0)
+            texto_para.paragraph_format.line_spacing = 1.5
 
-        m = padrao.match(texto)
-        if m:
-            titulo = "Palavras-chave:"
-            conteudo = m.group(3).strip()
+            for r in texto_para.runs:
+                r.font.size = Pt(12)
 
-            # Remove qualquer recuo
-            p.paragraph_format.left_indent = None
-            p.paragraph_format.first_line_indent = None
-            p.paragraph_format.right_indent = Pt(0)
+            return
 
+        # ============================
+        # 3) Sem conteúdo → cria vazio
+        # ============================
+        if i + 1 < len(snap):
+            if not snap.textos[i + 1]:
+                texto_para = snap.paragrafos[i + 1]
+            else:
+                texto_para = snap.inserir_antes(i + 1, "")
+        else:
+            texto_para = snap.adicionar("")
 
-            if conteudo:
-                palavras = re.split(r"[;,.\n]\s*", conteudo)
-                palavras = [w.strip() for w in palavras if w.strip()]
-                conteudo_formatado = "; ".join(palavras) + "."
+        texto_para.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
+        texto_para.paragraph_format.left_indent = None
+        texto_para.paragraph_format.first_line_indent = None
+        texto_para.paragraph_format.right_indent = Pt(0)
+        texto_para.paragraph_format.line_spacing = 1.5
 
-                p.text = ""
-                run_titulo = p.add_run(titulo)
-                run_titulo.bold = True
-                p.add_run(" ")
-                p.add_run(conteudo_formatado)
+        return
 
-                p.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
-            else:
-                p.text = ""
-                run_titulo = p.add_run(titulo)
-                run_titulo.bold = True
-                p.alignment = WD_ALIGN_PARAGRAPH.LEFT
+def formatar_palavras_chave(doc):
+    snap = obter_snapshot(doc)
+
+    i = snap.ancora("palavras_chave")
+    if i is not None:
+        p = snap.paragrafos[i]
+        m = padrao_palavras_chave.match(snap.textos[i])
+        titulo = "Palavras-chave:"
+        conteudo = m.group(3).strip()
+
+        # Remove qualquer recuo
+        p.paragraph_format.left_indent = None
+        p.paragraph_format.first_line_indent = None
+        p.paragraph_format.right_indent = Pt(0)
 
-                if i + 1 < len(doc.paragraphs):
-                    proximo = doc.paragraphs[i + 1]
 
-                    # Remove recuo do próximo parágrafo também
-                    proximo.paragraph_format.left_indent = None
-                    proximo.paragraph_format.first_line_indent = None
+        if conteudo:
+            palavras = padrao_separador_termos.split(conteudo)
+            palavras = [w.strip() for w in palavras if w.strip()]
+            conteudo_formatado = "; ".join(palavras) + "."
 
-                    palavras = re.split(r"[;,.\n]\s*", proximo.text.strip())
-                    palavras = [w.strip() for w in palavras if w.strip()]
-                    proximo.text = "; ".join(palavras) + "."
-                    proximo.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
+            p.text = ""
+            run_titulo = p.add_run(titulo)
+            run_titulo.bold = True
+            p.add_run(" ")
+            p.add_run(conteudo_formatado)
 
-            # ➜ espaço 1,5 linha antes do ABSTRACT
-            p.paragraph_format.space_after = Pt(18)  # ~1,5 linha
+            p.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
+        else:
+            p.text = ""
+            run_titulo = p.add_run(titulo)
+            run_titulo.bold = True
+            p.alignment = WD_ALIGN_PARAGRAPH.LEFT
 
-            return
+            if i + 1 < len(snap):
+                proximo = snap.paragrafos[i + 1]
 
-def formatar_keywords(doc):
-    padrao = re.compile(
-        r"^(keywords?)(:)?\s*(.*)$",
-        re.IGNORECASE
-    )
+                # Remove recuo do próximo parágrafo também
+                proximo.paragraph_format.left_indent = None
+                proximo.paragraph_format.first_line_indent = None
 
-    for i, p in enumerate(doc.paragraphs):
-        texto = p.text.strip()
-        if not texto:
-            continue
+                palavras = padrao_separador_termos.split(snap.textos[i + 1])
+                palavras = [w.strip() for w in palavras if w.strip()]
+                snap.definir_texto(i + 1, "; ".join(palavras) + ".")
+                proximo.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
 
-        m = padrao.match(texto)
-        if m:
-            titulo = "Keywords:"
-            conteudo = m.group(3).strip()
+        snap.atualizar(i)
 
-            # Remove qualquer recuo
-            p.paragraph_format.left_indent = None
-            p.paragraph_format.first_line_indent = None
-            p.paragraph_format.right_indent = Pt(0)
+        # ➜ espaço 1,5 linha antes do ABSTRACT
+        p.paragraph_format.space_after = Pt(18)  # ~1,5 linha
 
+        return
 
-            if conteudo:
-                palavras = re.split(r"[;,.\n]\s*", conteudo)
-                palavras = [w.strip() for w in palavras if w.strip()]
-                conteudo_formatado = "; ".join(palavras) + "."
+def formatar_keywords(doc):
+    snap = obter_snapshot(doc)
+
+    i = snap.ancora("keywords")
+    if i is not None:
+        p = snap.paragrafos[i]
+        m = padrao_keywords.match(snap.textos[i])
+        titulo = "Keywords:"
+        conteudo = m.group(3).strip()
+
+        # Remove qualquer recuo
+        p.paragraph_format.left_indent = None
+        p.paragraph_format.first_line_indent = None
+        p.paragraph_format.right_indent = Pt(0)
 
-                p.text = ""
-                p.add_run(titulo).bold = True
-                p.add_run(" ")
-                p.add_run(conteudo_formatado)
-                p.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
-            else:
-                p.text = ""
-                p.add_run(titulo).bold = True
-                p.alignment = WD_ALIGN_PARAGRAPH.LEFT
 
-                if i + 1 < len(doc.paragraphs):
-                    proximo = doc.paragraphs[i + 1]
+        if conteudo:
+            palavras = padrao_separador_termos.split(conteudo)
+            palavras = [w.strip() for w in palavras if w.strip()]
+            conteudo_formatado = "; ".join(palavras) + "."
 
-                    # Remove recuo do próximo parágrafo também
-                    proximo.paragraph_format.left_indent = None
-                    proximo.paragraph_format.first_line_indent = None
+            p.text = ""
+            p.add_run(titulo).bold = True
+            p.add_run(" ")
+            p.add_run(conteudo_formatado)
+            p.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
+        else:
+            p.text = ""
+            p.add_run(titulo).bold = True
+            p.alignment = WD_ALIGN_PARAGRAPH.LEFT
 
-                    palavras = re.split(r"[;,.\n]\s*", proximo.text.strip())
-                    palavras = [w.strip() for w in palavras if w.strip()]
-                    proximo.text = "; ".join(palavras) + "."
-                    proximo.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
+            if i + 1 < len(snap):
+                proximo = snap.paragrafos[i + 1]
 
-            # ➜ espaço 1,5 linha
-            p.paragraph_format.space_after = Pt(18)
-            return
+                # Remove recuo do próximo parágrafo também
+                proximo.paragraph_format.left_indent = None
+                proximo.paragraph_format.first_line_indent = None
 
-def formatar_titulos_numerados(doc):
-    import re
-    from docx.shared import Pt
-    from docx.enum.text import WD_ALIGN_PARAGRAPH
-
-    padrao_numerado = r"""
-        ^\s*
-        (\d+(\.\d+)*)   
-        \s*\.?\s*
-        [A-Za-zÀ-ÿ]
-    """
+                palavras = padrao_separador_termos.split(snap.textos[i + 1])
+                palavras = [w.strip() for w in palavras if w.strip()]
+                snap.definir_texto(i + 1, "; ".join(palavras) + ".")
+                proximo.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
 
+        snap.atualizar(i)
+
+        # ➜ espaço 1,5 linha
+        p.paragraph_format.space_after = Pt(18)
+        return
+
+def formatar_titulos_numerados(doc):
     titulos_populares = {
         "introducao", "introdução",
         "metodologia",
@@ -1024,33 +1088,31 @@ def formatar_titulos_numerados(doc):
         "consideracoes finais", "considerações finais",
     }
 
-    def eh_titulo_numerado(t):
-        return re.match(padrao_numerado, t.strip(), re.VERBOSE) is not None
-
     def normalizar(t):
-        return re.sub(r"\s+", " ", t.lower().strip())
-
-    depois_do_resumo = False
+        return padrao_espacos.sub(" ", t.lower().strip())
 
-    for p in doc.paragraphs:
-        texto_original = p.text.strip()
+    snap = obter_snapshot(doc)
+    inicio_corpo = snap.secoes()["corpo"][0]
 
-        if not texto_original:
-            continue
+    # Só podem ser título as linhas numeradas e as de até 3 palavras (o
+    # tamanho do maior título popular); o RESUMO fica de fora
+    matriz = snap.caracteristicas()
+    numerados = matriz.mascara("numerado")
+    candidatos = e(ou(numerados, matriz.faixa("palavras", maximo=3)), nao(matriz.mascara("resumo")))
 
-        if re.match(r"^\s*resumo\b", texto_original, re.IGNORECASE):
-            depois_do_resumo = True
-            continue
+    for i in indices(candidatos, inicio_corpo):
+        p = snap.paragrafos[i]
+        texto_original = snap.textos[i]
 
-        if not depois_do_resumo:
+        if not texto_original:
             continue
 
         eh_titulo = False  # ✅ flag correta
 
         # 1️⃣ TÍTULO NUMERADO
-        if eh_titulo_numerado(texto_original):
+        if numerados[i]:
 
-            match = re.match(r"^(\d+(?:\.\d+)*)(?:\.)?\s*(.*)$", texto_original)
+            match = padrao_numeracao_e_titulo.match(texto_original)
             if not match:
                 continue
 
@@ -1066,13 +1128,13 @@ def formatar_titulos_numerados(doc):
                     if titulo_texto else titulo_texto
                 )
 
-            p.text = f"{numeracao} {titulo_formatado}"
+            snap.definir_texto(i, f"{numeracao} {titulo_formatado}")
             eh_titulo = True
 
         # 2️⃣ TÍTULO POPULAR SEM NÚMERO
         else:
             if normalizar(texto_original) in titulos_populares:
-                p.text = texto_original.upper()
+                snap.definir_texto(i, texto_original.upper())
                 eh_titulo = True
 
         # ✅ FORMATAÇÃO SOMENTE SE FOR TÍTULO
@@ -1083,227 +1145,106 @@ def formatar_titulos_numerados(doc):
                 run.font.size = Pt(12)
 
 def formatar_paragrafos_abnt(doc):
-
-    mensagens = []
-    depois_do_resumo = False
-
-    padrao_titulo = r"^\s*\d+(\.\d+)*\s*[\).]?\s*[A-Za-zÀ-ÿ]"
-
-    def eh_titulo(t):
-        return re.match(padrao_titulo, t.strip()) is not None
-
-    for p in doc.paragraphs:
-        texto = p.text.strip()
-        if not texto:
-            continue
-
-        if re.match(r"^\s*resumo\b", texto, re.IGNORECASE):
-            depois_do_resumo = True
+    """Formata os parágrafos do corpo."""
+    snap = obter_snapshot(doc)
+    memoria = memoria_do(doc)
+    inicio_corpo = snap.secoes()["corpo"][0]
+
+    # RESUMO ou título: ficam como estão
+    pular = snap.caracteristicas().mascara("resumo_ou_titulo")
+
+    for i in range(inicio_corpo, len(snap)):
+        p = snap.paragrafos[i]
+        texto = snap.textos[i]
+        if not texto or pular[i]:
             continue
 
-        if not depois_do_resumo:
-            continue
-
-        if eh_titulo(texto):
-            continue
+        memoria.aplicar("paragrafos_abnt", p._p, formatar_paragrafo_abnt, p)
 
-        p.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
-        p.paragraph_format.first_line_indent = Cm(1.25)
-        p.paragraph_format.space_after = Pt(6)
-        p.paragraph_format.line_spacing = 1.5
-        p.paragraph_format.right_indent = Pt(0)
 
+def formatar_paragrafo_abnt(p):
+    p.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
+    p.paragraph_format.first_line_indent = Cm(1.25)
+    p.paragraph_format.space_after = Pt(6)
+    p.paragraph_format.line_spacing = 1.5
+    p.paragraph_format.right_indent = Pt(0)
 
-        for run in p.runs:
-            run.font.size = Pt(12)
-            run.font.bold = False
-            # cor removida
+    definir_tamanho(p, 12, negrito=False)
 
-        erros = []
-
-        if p.alignment != WD_ALIGN_PARAGRAPH.JUSTIFY:
-            erros.append("alinhamento incorreto (esperado: justificado)")
-
-        recuo = p.paragraph_format.first_line_indent
-        if not recuo or abs(recuo.cm - 1.25) > 0.05:
-            erros.append("recuo incorreto (esperado: 1,25 cm)")
-
-        if p.paragraph_format.space_after != Pt(6):
-            erros.append("espaçamento depois incorreto (esperado: 6pt)")
-
-        if p.paragraph_format.line_spacing != 1.5:
-            erros.append("espaçamento de linha incorreto (esperado: 1,5)")
-
-        for run in p.runs:
-            if run.font.size and run.font.size.pt != 12:
-                erros.append("tamanho da fonte errado (esperado: 12)")
-                break
-
-        if erros:
-            mensagens.append(f"❌ Parágrafo incorreto: \"{texto[:50]}...\" → " + " | ".join(erros))
-        else:
-            mensagens.append(f"✅ Parágrafo OK: \"{texto[:50]}...\"")
-
-    return mensagens
 
 def formatar_referencias(doc):
-    import re
-    from docx.shared import Pt
-    from docx.enum.text import WD_ALIGN_PARAGRAPH
-    import unicodedata
+    snap = obter_snapshot(doc)
+    memoria = memoria_do(doc)
 
-    try:
-        normalizar = lambda s: remover_acentos(s or "").strip().lower()
-    except NameError:
-        def normalizar(s):
-            if not s:
-                return ""
-            s = ''.join(c for c in unicodedata.normalize('NFD', s)
-                        if unicodedata.category(c) != 'Mn')
-            s = s.lower().strip()
-            s = re.sub(r'\s+', ' ', s)
-            return s
-
-    padrao_titulo = re.compile(r"^\s*\d*\.?\s*REFERÊNCIAS\s*$", re.IGNORECASE)
-
-    inicio_idx = None
-    for i, p in enumerate(doc.paragraphs):
-        texto_norm = " ".join(p.text.upper().split())
-        if padrao_titulo.match(texto_norm):
-            inicio_idx = i + 1
-            break
-
-    if inicio_idx is None:
+    if snap.ancora("referencias") is None:
         return
 
-    def eh_titulo_numerado(texto):
-        return bool(re.match(r"^\s*\d+(\.\d+)*\s+[A-Za-zÀ-ÿ]", texto))
-
-    ano_re = re.compile(r"\b(19|20)\d{2}\b")
-
-    def eh_referencia(t):
-        if not t or len(t) < 8:
-            return False
-
-        tn = normalizar(t)
-        pontos = 0
+    inicio_idx, fim_idx = snap.secoes()["referencias"]
+    secao = snap.textos[inicio_idx:fim_idx]
 
-        if "http" in tn or "doi" in tn:
-            pontos += 2
+    # A lista termina no primeiro título numerado depois de REFERÊNCIAS:
+    # só as linhas antes dele são pontuadas
+    fim = next((i for i, texto in enumerate(secao) if padrao_titulo_apos_referencias.match(texto)), len(secao))
 
-        if ano_re.search(t):
-            pontos += 1
+    for i in entradas_referencias(secao[:fim]):
+        p = snap.paragrafos[inicio_idx + i]
+        memoria.aplicar("referencias", p._p, formatar_referencia, p)
 
-        palavras_comuns = [
-            "disponivel em", "acesso em", "editora", "vol", "v.", "n.",
-            "nbr", "issn", "isbn", "revista", "congresso", "artigo",
-            "tecnologia da informação", "internet", "pesquisa", "relatório"
-        ]
-        if any(k in tn for k in palavras_comuns):
-            pontos += 1
 
-        if re.search(r"[A-Za-zÀ-ÿ ]+:\s*[A-Za-zÀ-ÿ ]+", t):
-            pontos += 1
+def formatar_referencia(p):
+    p.alignment = WD_ALIGN_PARAGRAPH.LEFT
+    p.paragraph_format.line_spacing = 1.0
+    p.paragraph_format.space_after = Pt(6)
+    p.paragraph_format.right_indent = Pt(0)
+    p.paragraph_format.first_line_indent = Pt(0)
+    p.paragraph_format.left_indent = Pt(1.25 * 28.35)
 
-        if re.match(r"^[A-Z]{2,}\b", t):
-            pontos += 1
-
-        if re.match(r"^[A-ZÀ-Ý]{2,}\s*,", t):
-            pontos += 1
-
-        return pontos >= 1.5
-
-    for p in doc.paragraphs[inicio_idx:]:
-
-        texto = p.text.strip()
-        if not texto:
-            continue
-
-        if eh_titulo_numerado(texto):
-            break
-
-        if eh_referencia(texto):
-
-            p.alignment = WD_ALIGN_PARAGRAPH.LEFT
-            p.paragraph_format.line_spacing = 1.0
-            p.paragraph_format.space_after = Pt(6)
-            p.paragraph_format.right_indent = Pt(0)
-            p.paragraph_format.first_line_indent = Pt(0)
-            p.paragraph_format.left_indent = Pt(1.25 * 28.35)
-
-            for run in p.runs:
-                run.font.size = Pt(12)
-                run.font.bold = False
-                # cor removida
+    definir_tamanho(p, 12, negrito=False)
 
 
 # -------- APLICAR FORMATAÇÃO --------
-from docx.shared import Pt, Cm
-from docx.enum.text import WD_ALIGN_PARAGRAPH
-from docx.oxml.ns import qn
-import re
+def aplicar_formatacao(doc, fonte_principal, aplicar_fonte=True):
+    """
+    ``aplicar_fonte=False`` quando a fonte já foi aplicada pela
+    normalizar_trechos (como no formatar_documento).
+    """
 
-def aplicar_formatacao(doc, fonte_principal):
-   
+    snap = obter_snapshot(doc)
 
     # ==============================================
     # 1) Garantir fonte padrão
     # ==============================================
-    for p in doc.paragraphs:
-        for run in p.runs:
-            run.font.name = fonte_principal
-            try:
-                rFonts = run._element.rPr.rFonts
-                rFonts.set(qn("w:ascii"), fonte_principal)
-                rFonts.set(qn("w:hAnsi"), fonte_principal)
-            except:
-                pass
-
-    antes_do_resumo = True
-    titulo_identificado = False
+    if aplicar_fonte:
+        for _, p in iterar_blocos(doc):
+            for r in p.iterchildren(W_R):
+                definir_fonte(r, fonte_principal)
 
     # ==============================================
-    # 2) Flags para cada item da capa
+    # 2) Estado da capa deste documento
     # ==============================================
-    encontrado = {k: False for k in [
-        "instituicao", "autor", "orientador", "curso",
-        "titulo_capa", "subtitulo", "cidade", "ano"
-    ]}
-
-    # Paleta para depuração
+    contexto = ContextoCapa()
 
     # ==============================================
     # 3) Percorre documento até o resumo
     # ==============================================
-    for p in doc.paragraphs:
+    # Para ao encontrar o resumo
+    index_resumo = snap.ancora("resumo_secao")
+    fim_capa = index_resumo if index_resumo is not None else len(snap)
 
-        texto = p.text.strip()
+    for i in range(fim_capa):
+        p = snap.paragrafos[i]
+        texto = snap.textos[i]
         if not texto:
             continue
 
-        # Parou ao encontrar o resumo
-        if re.match(r"^\s*resumo\b", texto, re.IGNORECASE):
-            antes_do_resumo = False
-            continue
-
-        if not antes_do_resumo:
-            continue
-
         # Classificação
-        tipo, titulo_identificado = classificar_texto(texto, titulo_identificado)
-        print(f"[DEBUG] Linha: '{texto}'")
-        print(f"[DEBUG] Tipo detectado: {tipo}")
-
-        # Se for algo não reconhecido, ignora
-        if tipo not in encontrado:
-            continue
+        tipo = contexto.classificar(texto)
 
-        # Garante que apenas o primeiro de cada tipo será formatado
-        if encontrado[tipo]:
+        # Ignora o que não é da capa e garante que apenas o primeiro de
+        # cada tipo será formatado
+        if not contexto.primeiro(tipo):
             continue
 
-        encontrado[tipo] = True
-
         # ==========================================
         # 4) Aplicação da cor e estilo
         # ==========================================
@@ -1312,7 +1253,7 @@ def aplicar_formatacao(doc, fonte_principal):
 
         # Ajustes especiais
         if tipo == "titulo_capa":
-            p.text = texto.upper()
+            snap.definir_texto(i, texto.upper())
             for run in p.runs:
                 run.font.size = Pt(14)
                 run.bold = True
@@ -1320,12 +1261,12 @@ def aplicar_formatacao(doc, fonte_principal):
         elif tipo == "cidade":
             for run in p.runs:
                 run.text = " ".join(w.capitalize() for w in run.text.lower().split())
+            snap.atualizar(i)
 
         elif tipo == "orientador":
             for run in p.runs:
                 run.text = run.text.replace(":", "").strip().capitalize()
-
-        print(f"[DEBUG] Formatação aplicada para: {tipo}")
+            snap.atualizar(i)
 
     # Fim da função
 
@@ -1338,14 +1279,19 @@ def aplicar_margens_abnt(doc):
 
   
 # -------- VERIFICAR FORMATAÇÃO --------
-def verificar_formatacao(document):
-    erros = set()
+def verificar_formatacao(document, achados=None):
+    """Mensagens do relatório; as regras violadas também vão para ``achados``."""
+    achados = achados if achados is not None else Achados()
+    indices = {}
 
-    for p in document.paragraphs:
-        texto = p.text.strip()
+    # Corpo, tabelas, cabeçalhos, rodapés e notas
+    for conteiner, elemento in iterar_blocos(document):
+        p = Paragraph(elemento, None)
+        indice = indices.get(conteiner, 0)
+        indices[conteiner] = indice + 1
 
         # Ignora parágrafos vazios
-        if not texto:
+        if not p.text.strip():
             continue
 
         fmt = p.paragraph_format
@@ -1353,69 +1299,41 @@ def verificar_formatacao(document):
         # --------------------------------------------
         # DETECTA SE É PARÁGRAFO DE CORPO (ABNT)
         # --------------------------------------------
-        eh_corpo = (
-            fmt.first_line_indent is not None and
-            round(fmt.first_line_indent.pt) >= 35 and   # ~1,25 cm
-            fmt.line_spacing is not None and
-            round(fmt.line_spacing, 1) >= 1.5
-        )
-
         # Se NÃO for corpo de texto, ignora
-        if not eh_corpo:
+        if not eh_corpo(fmt.first_line_indent, fmt.line_spacing):
             continue
 
         # --------------------------------------------
         # TAMANHO DA FONTE (12)
         # --------------------------------------------
-        tamanhos = {
-            run.font.size.pt
-            for run in p.runs
-            if run.font.size is not None
-        }
-
-        if tamanhos and any(t != 12 for t in tamanhos):
-            erros.add("❌ Um ou mais parágrafos do corpo estão com fonte diferente de 12.")
+        verificar_tamanhos(tamanhos(p), achados, conteiner, indice)
 
         # --------------------------------------------
         # ALINHAMENTO JUSTIFICADO
         # --------------------------------------------
-        if p.alignment is not None and p.alignment != WD_ALIGN_PARAGRAPH.JUSTIFY:
-            erros.add("⚠️ Um ou mais parágrafos do corpo não estão justificados.")
+        verificar_alinhamento(p.alignment, achados, conteiner, indice)
 
-    if not erros:
-        return ["✅ Formatação dos parágrafos do corpo está correta conforme ABNT."]
-
-    return sorted(erros)
+    return mensagens_formatacao(achados.regras)
 
 def fonte_preta(doc):
-    preto = RGBColor(0, 0, 0)
-
-    # Texto fora de tabelas
-    for paragraph in doc.paragraphs:
-        for run in paragraph.runs:
-            if run.text and run.text.strip():
-                run.font.color.rgb = preto
-
-    # Texto dentro de tabelas
-    for table in doc.tables:
-        for row in table.rows:
-            for cell in row.cells:
-                for paragraph in cell.paragraphs:
-                    for run in paragraph.runs:
-                        if run.text and run.text.strip():
-                            run.font.color.rgb = preto
-
-def verificar_margens(doc):
-    erros = []
-
-    # Padrão ABNT (cm): superior, inferior, esquerda, direita
-    padrao = {
-        "superior": 3,
-        "inferior": 2,
-        "esquerda": 3,
-        "direita": 2
-    }
+    # Corpo, tabelas, cabeçalhos, rodapés e notas
+    for _, p in iterar_blocos(doc):
+        for r in p.iterchildren(W_R):
+            if texto(r).strip():
+                pintar_de_preto(r)
+
 
+def aplicar_fonte_e_cor(doc, fonte_principal):
+    """
+    fonte_preta + a fonte principal do aplicar_formatacao numa única
+    passada pelos runs (as duas etapas vinham em seguida no pipeline).
+    """
+    memoria = memoria_do(doc)
+    etapa = "fonte_e_cor:" + fonte_principal
+    for _, p in iterar_blocos(doc):
+        memoria.aplicar(etapa, p, normalizar_trechos, (p,), fonte_principal)
+
+def verificar_margens(doc, achados=None):
     s = doc.sections[0]
 
     margens = {
@@ -1425,75 +1343,643 @@ def verificar_margens(doc):
         "direita": round(s.right_margin.cm)
     }
 
-    for lado, valor in margens.items():
-        esperado = padrao[lado]
-        if valor != esperado:
-            erros.append(
-                f"❌ Margem {lado} incorreta: {valor} cm (deveria ser {esperado} cm)."
-            )
+    if achados is not None:
+        registrar_margens(margens, achados)
+    return mensagens_margens(margens)
+
+
+
+def abrir_documento(arquivo):
+    """Lê o .docx direto do stream do upload, sem gravar cópia em disco."""
+    arquivo.stream.seek(0)
+    return Document(arquivo.stream)
+
+
+def salvar_documento(doc, original):
+    """
+    Serializa o documento num buffer que só vai para o disco se passar de
+    LIMITE_MEMORIA_ARQUIVO. O buffer é fechado (e apagado) pelo send_file
+    ao fim da resposta. As partes que não mudaram (imagens, tema, fontes...)
+    são copiadas de ``original`` sem recompressão.
+    """
+    saida = tempfile.SpooledTemporaryFile(max_size=LIMITE_MEMORIA_ARQUIVO)
+    salvar_pacote(doc, original, saida)
+    saida.seek(0)
+    return saida
+
+
+def documento_em_bytes(doc, original):
+    """Como ``salvar_documento``, mas devolve os bytes do .docx."""
+    saida = io.BytesIO()
+    salvar_pacote(doc, original, saida)
+    return saida.getvalue()
+
+
+def resumo_upload(arquivo):
+    """SHA-256 do upload, ou None se o cache estiver desligado."""
+    if cache_resultados is None:
+        return None
+    return sha256_stream(arquivo.stream)
+
+
+def buscar_no_cache(tipo, sha):
+    if sha is None:
+        return None
+    return cache_resultados.obter(cache_resultados.chave(tipo, sha))
+
+
+def guardar_no_cache(tipo, sha, dados):
+    if sha is not None:
+        cache_resultados.guardar(cache_resultados.chave(tipo, sha), dados)
+
+
+def guardar_saida_no_cache(sha, saida):
+    """Guarda o .docx gerado (se couber na memória) e devolve o buffer ao início."""
+    if sha is None:
+        return
+    tamanho = saida.seek(0, io.SEEK_END)
+    saida.seek(0)
+    if tamanho <= LIMITE_MEMORIA_ARQUIVO:
+        guardar_no_cache("formatado", sha, saida.read())
+        saida.seek(0)
+
+
+def carregar_memoria(doc):
+    """
+    Memória dos parágrafos do último envio deste trabalho (vazia no
+    primeiro), ou None com o cache ou a reformatação incremental desligados.
+    """
+    if cache_resultados is None or not FORMATACAO_INCREMENTAL:
+        return None
+    chave = identidade(doc)
+    if chave is None:
+        return None
+    dados = buscar_no_cache("paragrafos", chave)
+    if dados is None:
+        return MemoriaParagrafos(identidade=chave)
+    return MemoriaParagrafos.de_bytes(dados, chave)
+
+
+def guardar_memoria(memoria):
+    if memoria is not None:
+        guardar_no_cache("paragrafos", memoria.identidade, memoria.em_bytes())
+
+
+# Etapas do formatar_documento, na ordem em que rodam. O nome aparece no
+# Server-Timing, no /metrics e no manifest do /lote.
+ETAPAS_FORMATACAO = [
+    ("capa", formatar_capa),
+    ("paragrafos_abnt", formatar_paragrafos_abnt),
+    ("resumo", formatar_resumo),
+    ("palavras_chave", formatar_palavras_chave),
+    ("abstract", formatar_abstract),
+    ("keywords", formatar_keywords),
+    ("titulos_numerados", formatar_titulos_numerados),
+    ("referencias", formatar_referencias),
+]
+
+
+def formatar_documento(doc, medicao=None, memoria=None):
+    """
+    Executa todas as etapas de formatação ABNT sobre o documento (in-place).
+    Se ``medicao`` (MedicaoPipeline) vier, cada etapa é cronometrada nela.
+    Com ``memoria`` (incremental.MemoriaParagrafos), os parágrafos que
+    chegam às etapas por parágrafo iguais ao envio anterior recebem o
+    resultado guardado.
+    """
+    medicao = medicao or MedicaoPipeline()
+    if memoria is not None:
+        doc._memoria_abnt = memoria
+    contar = lambda: len(obter_snapshot(doc).paragrafos)
+
+    with medicao.etapa("fonte_principal", contar):
+        fonte = detectar_fonte_principal(doc)
+
+        # -------- AJUSTA ESTILO NORMAL --------
+        try:
+            estilo_normal = doc.styles["Normal"].font
+            estilo_normal.name = fonte
+            for r in doc.styles["Normal"].element.xpath(".//w:rFonts"):
+                r.set(qn("w:ascii"), fonte)
+                r.set(qn("w:hAnsi"), fonte)
+        except:
+            pass
+
+    for nome, etapa in ETAPAS_FORMATACAO:
+        with medicao.etapa(nome, contar):
+            etapa(doc)
+
+    # cor preta + fonte principal numa única passada pelos runs
+    with medicao.etapa("fonte_e_cor", contar):
+        aplicar_fonte_e_cor(doc, fonte)
+
+    with medicao.etapa("margens", contar):
+        aplicar_margens_abnt(doc)
+
+    with medicao.etapa("aplicar_formatacao", contar):
+        aplicar_formatacao(doc, fonte, aplicar_fonte=False)
+
+
+def verificar_documento(doc, medicao=None, achados=None):
+    """
+    Relatório de verificação (margens e formatação do corpo). Com
+    ``achados``, as regras violadas ficam registradas nele (as margens por
+    último, como no verificar_stream).
+    """
+    medicao = medicao or MedicaoPipeline()
+
+    with medicao.etapa("verificar_formatacao"):
+        formatacao = verificar_formatacao(doc, achados)
+    with medicao.etapa("verificar_margens"):
+        margens = verificar_margens(doc, achados)
+
+    return {
+        "margens": margens,
+        "formatacao": formatacao
+    }
+
 
-    if not erros:
-        return ["✅ Margens estão corretas conforme ABNT."]
+def medicao_requisicao():
+    """Medição da requisição atual; vai para o Server-Timing e o /metrics."""
+    if "medicao" not in g:
+        g.medicao = MedicaoPipeline()
+    return g.medicao
 
-    return erros
 
+@rotas.before_app_request
+def iniciar_medicao():
+    g.inicio_requisicao = time.perf_counter()
 
+    if PERFIL_HABILITADO and request.args.get("perfil"):
+        g.perfil = novo_perfil()
 
-@app.route("/formatar", methods=["POST"])
+
+@rotas.after_app_request
+def registrar_medicao(response):
+    if "perfil" in g:
+        g.perfil.disable()
+
+    if "medicao" in g:
+        response.headers["Server-Timing"] = g.medicao.server_timing()
+        response.headers["Timing-Allow-Origin"] = "*"  # front-end roda em outra origem
+        metricas.registrar_medicao(g.medicao)
+
+    rota = request.url_rule.rule if request.url_rule else "desconhecida"
+    metricas.registrar_requisicao(rota, response.status_code, time.perf_counter() - g.inicio_requisicao)
+
+    if "perfil" in g:
+        formato = request.args.get("perfil")
+        if formato == "prof":
+            return Response(relatorio_perfil(g.perfil, "prof"), mimetype="application/octet-stream",
+                            headers={"Content-Disposition": 'attachment; filename="requisicao.prof"'})
+        return Response(relatorio_perfil(g.perfil), mimetype="text/plain; charset=utf-8")
+
+    return response
+
+
+def processar_bytes(dados):
+    """
+    Verifica e formata um .docx recebido como bytes. Roda nos processos do
+    pool de tarefas; devolve (relatório, bytes do .docx formatado).
+    """
+    doc = Document(io.BytesIO(dados))
+
+    relatorio = verificar_documento(doc)
+    formatar_documento(doc)
+
+    return relatorio, documento_em_bytes(doc, io.BytesIO(dados))
+
+
+def formatar_item_lote(dados):
+    """
+    Verifica e formata um documento do lote (roda no pool). Um documento
+    com problema vira um item com status "erro" no manifest, sem derrubar
+    o lote inteiro. Devolve (item do manifest, bytes formatados ou None).
+    """
+    inicio = time.perf_counter()
+    medicao = MedicaoPipeline()
+    try:
+        doc = Document(io.BytesIO(dados))
+        relatorio = verificar_documento(doc)
+        verificado = time.perf_counter()
+
+        formatar_documento(doc, medicao)
+        with medicao.etapa("salvar"):
+            formatado = documento_em_bytes(doc, io.BytesIO(dados))
+    except Exception as erro:
+        return {
+            "status": "erro",
+            "erro": str(erro) or type(erro).__name__,
+            "tempos": {"total": round(time.perf_counter() - inicio, 4)},
+        }, None
+
+    fim = time.perf_counter()
+    avisos = [
+        mensagem for mensagem in relatorio["margens"] + relatorio["formatacao"]
+        if not mensagem.startswith("✅")
+    ]
+    return {
+        "status": "ok",
+        "avisos": avisos,
+        "tempos": {
+            "verificacao": round(verificado - inicio, 4),
+            "formatacao": round(fim - verificado, 4),
+            "total": round(fim - inicio, 4),
+            "etapas": medicao.resumo(),
+        },
+    }, formatado
+
+
+def guardar_tarefa_no_cache(sha, resultado):
+    relatorio, formatado = resultado
+    guardar_no_cache("relatorio", sha, json.dumps(relatorio, ensure_ascii=False).encode("utf-8"))
+    guardar_no_cache("formatado", sha, formatado)
+
+
+# Pool de processos para a API assíncrona (/tarefas). Configurável por
+# ABNT_TAREFAS_WORKERS (processos deste worker) e ABNT_TAREFAS_FILA (tarefas
+# à espera além das que estão rodando; passando disso a API responde 429).
+# Com ABNT_ESTADO=disco o estado das tarefas fica em ABNT_CACHE_DIR/tarefas,
+# visível para todos os workers do gunicorn (ver gunicorn.conf.py).
+tarefas_formatacao = GerenciadorTarefas(
+    processar_bytes,
+    max_workers=int(os.environ.get("ABNT_TAREFAS_WORKERS", "0")) or None,
+    max_fila=int(os.environ.get("ABNT_TAREFAS_FILA", "16")),
+    ao_concluir=guardar_tarefa_no_cache,
+    registro=(
+        RegistroTarefas(os.path.join(diretorio_cache(), "tarefas")) if ESTADO_COMPARTILHADO else None
+    ),
+)
+
+
+@rotas.route("/formatar", methods=["POST"])
 def formatar():
     if "arquivo" not in request.files:
         return {"erro": "Envie um arquivo .docx"}, 400
 
     arquivo = request.files["arquivo"]
-    caminho = tempfile.NamedTemporaryFile(delete=False, suffix=".docx").name
-    arquivo.save(caminho)
+    conferir_docx(arquivo.stream)
+    sha = resumo_upload(arquivo)
+
+    # Mesmo arquivo já formatado antes: responde sem abrir o documento
+    dados = buscar_no_cache("formatado", sha)
+    if dados is not None:
+        return send_file(io.BytesIO(dados), as_attachment=True, download_name="arquivo_formatado_ABNT.docx")
+
+    doc = abrir_documento(arquivo)
+    memoria = carregar_memoria(doc)
+    formatar_documento(doc, medicao_requisicao(), memoria)
+
+    with medicao_requisicao().etapa("salvar"):
+        saida = salvar_documento(doc, arquivo.stream)
+    guardar_saida_no_cache(sha, saida)
+    guardar_memoria(memoria)
+    return send_file(saida, as_attachment=True, download_name="arquivo_formatado_ABNT.docx")
+
+
+@rotas.route("/verificar", methods=["POST"])
+def verificar():
+    if "arquivo" not in request.files:
+        return {"erro": "Envie um arquivo .docx"}, 400
+
+    arquivo = request.files["arquivo"]
+    conferir_docx(arquivo.stream)
+    sha = resumo_upload(arquivo)
 
-    doc = Document(caminho)
-    fonte = detectar_fonte_principal(doc)
+    modo = request.args.get("modo", "mensagens")
+    if modo not in MODOS_VERIFICACAO:
+        return {"erro": f"modo deve ser um de: {', '.join(MODOS_VERIFICACAO)}"}, 400
+    if modo != "mensagens":
+        return verificar_com_achados(arquivo, sha, modo)
 
-    # -------- AJUSTA ESTILO NORMAL --------
+    dados = buscar_no_cache("relatorio", sha)
+    if dados is not None:
+        return json.loads(dados)
+
+    # Lê só o document.xml, em streaming; arquivos fora do comum vão
+    # pelo python-docx
     try:
-        estilo_normal = doc.styles["Normal"].font
-        estilo_normal.name = fonte
-        for r in doc.styles["Normal"].element.xpath(".//w:rFonts"):
-            r.set(qn("w:ascii"), fonte)
-            r.set(qn("w:hAnsi"), fonte)
-    except:
-        pass
-
-    formatar_capa(doc)
-    formatar_paragrafos_abnt(doc)
-    formatar_resumo(doc)
-    formatar_palavras_chave(doc)
-    formatar_abstract(doc) 
-    formatar_keywords(doc) 
-    formatar_titulos_numerados(doc) 
-    formatar_referencias(doc)
-    fonte_preta(doc)
-    aplicar_margens_abnt(doc)
-    aplicar_formatacao(doc, fonte)
-
-
-    saida = tempfile.NamedTemporaryFile(delete=False, suffix=".docx").name
-    doc.save(saida)
-    return send_file(saida, as_attachment=True, download_name="arquivo_formatado_ABNT.docx")
+        with medicao_requisicao().etapa("verificar_stream"):
+            relatorio = verificar_stream(arquivo.stream)
+    except VerificacaoIndisponivel:
+        relatorio = verificar_documento(abrir_documento(arquivo), medicao_requisicao())
+    guardar_no_cache("relatorio", sha, json.dumps(relatorio, ensure_ascii=False).encode("utf-8"))
+    return relatorio
 
 
-@app.route("/verificar", methods=["POST"])
-def verificar():
+def verificar_com_achados(arquivo, sha, modo):
+    """/verificar?modo=resumo|detalhado: lê o documento inteiro e guarda cada achado."""
+    try:
+        pagina = int(request.args.get("pagina", 1))
+        por_pagina = min(int(request.args.get("por_pagina", POR_PAGINA)), MAX_POR_PAGINA)
+    except ValueError:
+        return {"erro": "pagina e por_pagina devem ser números inteiros"}, 400
+    if pagina < 1 or por_pagina < 1:
+        return {"erro": "pagina e por_pagina devem ser maiores que zero"}, 400
+
+    dados = buscar_no_cache("achados", sha)
+    if dados is not None:
+        relatorio = json.loads(dados)
+    else:
+        relatorio = relatorio_com_achados(arquivo)
+        guardar_no_cache("achados", sha, json.dumps(
+            relatorio, ensure_ascii=False, separators=(",", ":"),
+        ).encode("utf-8"))
+
+    lista = relatorio.pop("achados")
+    relatorio["total"] = len(lista)
+    if modo == "detalhado":
+        inicio = (pagina - 1) * por_pagina
+        relatorio["pagina"] = pagina
+        relatorio["por_pagina"] = por_pagina
+        relatorio["achados"] = lista[inicio:inicio + por_pagina]
+    return relatorio
+
+
+def relatorio_com_achados(arquivo):
+    """Relatório do /verificar + ``resumo`` (ocorrências por regra) + ``achados``."""
+    achados = Achados(detalhar=True)
+    try:
+        with medicao_requisicao().etapa("verificar_stream"):
+            relatorio = verificar_stream(arquivo.stream, achados)
+    except VerificacaoIndisponivel:
+        achados = Achados(detalhar=True)  # descarta o que o streaming chegou a ler
+        relatorio = verificar_documento(abrir_documento(arquivo), medicao_requisicao(), achados)
+
+    relatorio["resumo"] = achados.resumo()
+    relatorio["achados"] = achados.como_lista()
+    return relatorio
+
+
+@rotas.route("/processar", methods=["POST"])
+def processar():
+    """
+    Verifica e formata o documento com um único envio e uma única leitura:
+    devolve o relatório do /verificar e o endereço para baixar o .docx
+    formatado (válido por alguns minutos).
+    """
     if "arquivo" not in request.files:
         return {"erro": "Envie um arquivo .docx"}, 400
 
     arquivo = request.files["arquivo"]
-    caminho = tempfile.NamedTemporaryFile(delete=False, suffix=".docx").name
-    arquivo.save(caminho)
-    doc = Document(caminho)
+    conferir_docx(arquivo.stream)
+    sha = resumo_upload(arquivo)
+
+    relatorio_cache = buscar_no_cache("relatorio", sha)
+    formatado = buscar_no_cache("formatado", sha) if relatorio_cache is not None else None
+
+    if formatado is not None:
+        relatorio = json.loads(relatorio_cache)
+    else:
+        doc = abrir_documento(arquivo)
+
+        # A verificação vem antes: ela avalia o documento como foi enviado
+        relatorio = verificar_documento(doc, medicao_requisicao())
+        memoria = carregar_memoria(doc)
+        formatar_documento(doc, medicao_requisicao(), memoria)
+
+        with medicao_requisicao().etapa("salvar"):
+            formatado = documento_em_bytes(doc, arquivo.stream)
+
+        guardar_no_cache("relatorio", sha, json.dumps(relatorio, ensure_ascii=False).encode("utf-8"))
+        guardar_no_cache("formatado", sha, formatado)
+        guardar_memoria(memoria)
+
+    identificador = resultados_formatados.guardar(formatado)
+
+    relatorio["download"] = url_for(".baixar", identificador=identificador)
+    return relatorio
+
+
+@rotas.route("/tarefas", methods=["POST"])
+def criar_tarefa():
+    """
+    Recebe o documento e devolve na hora (202) o identificador da tarefa;
+    o cliente acompanha o andamento em /tarefas/<id>.
+    """
+    if "arquivo" not in request.files:
+        return {"erro": "Envie um arquivo .docx"}, 400
 
+    arquivo = request.files["arquivo"]
+    conferir_docx(arquivo.stream)
+    sha = resumo_upload(arquivo)
+
+    relatorio = buscar_no_cache("relatorio", sha)
+    formatado = buscar_no_cache("formatado", sha) if relatorio is not None else None
+
+    if formatado is not None:
+        identificador = tarefas_formatacao.registrar_concluida((json.loads(relatorio), formatado))
+    else:
+        try:
+            identificador = tarefas_formatacao.submeter(arquivo.stream.read(), contexto=sha)
+        except FilaCheia:
+            return {"erro": "Servidor ocupado. Tente novamente em alguns segundos."}, 429, {"Retry-After": "5"}
+
+    return {
+        "id": identificador,
+        "status": url_for(".consultar_tarefa", identificador=identificador),
+    }, 202
+
+
+@rotas.route("/tarefas/<identificador>", methods=["GET"])
+def consultar_tarefa(identificador):
+    estado = tarefas_formatacao.consultar(identificador)
+    if estado is None:
+        return {"erro": "Tarefa não encontrada ou expirada."}, 404
+
+    if estado == "erro":
+        return {"estado": estado, "erro": tarefas_formatacao.erro(identificador)}
+
+    if estado != "concluida":
+        return {"estado": estado}
+
+    relatorio, _ = tarefas_formatacao.resultado(identificador)
     return {
-        "margens": verificar_margens(doc),
-        "formatacao": verificar_formatacao(doc)
+        "estado": estado,
+        **relatorio,
+        "download": url_for(".resultado_tarefa", identificador=identificador),
     }
 
 
+@rotas.route("/tarefas/<identificador>/resultado", methods=["GET"])
+def resultado_tarefa(identificador):
+    if tarefas_formatacao.consultar(identificador) != "concluida":
+        return {"erro": "Resultado indisponível."}, 404
+
+    _, formatado = tarefas_formatacao.resultado(identificador)
+    return send_file(io.BytesIO(formatado), as_attachment=True, download_name="arquivo_formatado_ABNT.docx")
+
+
+@rotas.route("/lote", methods=["POST"])
+def formatar_lote():
+    """
+    Formata vários documentos de uma vez: um .zip no campo "arquivo" ou
+    vários .docx no campo "arquivos". Os documentos rodam em paralelo no
+    pool de tarefas e a resposta é um .zip, enviado conforme cada um fica
+    pronto, com os formatados e um manifest.json (avisos e tempos de cada
+    arquivo).
+    """
+    request.max_content_length = MAX_LOTE
+    request.conferir_assinatura = False
+
+    if "arquivo" in request.files:
+        arquivo = request.files["arquivo"]
+        if not zipfile.is_zipfile(arquivo.stream):
+            return {"erro": "Envie um arquivo .zip com os documentos .docx"}, 400
+        streams = [assumir_stream(arquivo)]
+        entradas = entradas_do_zip(streams[0], MAX_ENVIO)
+    elif "arquivos" in request.files:
+        arquivos = request.files.getlist("arquivos")
+        streams = [assumir_stream(arquivo) for arquivo in arquivos]
+        entradas = entradas_dos_arquivos(zip((arquivo.filename for arquivo in arquivos), streams))
+    else:
+        return {"erro": "Envie um .zip (campo arquivo) ou vários .docx (campo arquivos)"}, 400
+
+    nomes = []
+    manifesto = []
+
+    def argumentos():
+        for nome, dados, motivo in entradas:
+            if dados is None:
+                manifesto.append({"arquivo": nome, "status": "ignorado", "erro": motivo})
+                continue
+            nomes.append(nome)
+            yield (dados,)
+
+    try:
+        resultados = tarefas_formatacao.executar_lote(formatar_item_lote, argumentos())
+    except FilaCheia:
+        for stream in streams:
+            stream.close()
+        return {"erro": "Servidor ocupado. Tente novamente em alguns segundos."}, 429, {"Retry-After": "5"}
+
+    def gerar():
+        inicio = time.perf_counter()
+        saida = ZipStream()
+        nomes_saida = NomesUnicos()
+
+        try:
+            for indice, future in resultados:
+                try:
+                    item, formatado = future.result()
+                except Exception as erro:
+                    # o processo do pool morreu com este documento
+                    item, formatado = {"status": "erro", "erro": str(erro) or type(erro).__name__}, None
+
+                item = {"arquivo": nomes[indice], **item}
+                if formatado is not None:
+                    item["saida"] = nomes_saida(nomes[indice])
+                    yield saida.adicionar(item["saida"], formatado)
+                manifesto.append(item)
+        finally:
+            # também quando o cliente desiste no meio do download
+            resultados.close()
+            for stream in streams:
+                stream.close()
+
+        manifesto.sort(key=lambda item: item["arquivo"])
+        yield saida.adicionar_json("manifest.json", {
+            "total": len(manifesto),
+            "formatados": sum(item["status"] == "ok" for item in manifesto),
+            "erros": sum(item["status"] == "erro" for item in manifesto),
+            "ignorados": sum(item["status"] == "ignorado" for item in manifesto),
+            "tempo_total": round(time.perf_counter() - inicio, 4),
+            "arquivos": manifesto,
+        })
+        yield saida.fechar()
+
+    return Response(
+        stream_with_context(gerar()),
+        mimetype="application/zip",
+        headers={"Content-Disposition": 'attachment; filename="lote_formatado_ABNT.zip"'},
+    )
+
+
+@rotas.app_errorhandler(EnvioRecusado)
+def envio_recusado(erro):
+    return {"erro": erro.mensagem}, erro.status
+
+
+@rotas.app_errorhandler(413)
+def envio_grande_demais(erro):
+    limite = request.max_content_length
+    if limite is None:
+        return {"erro": "Arquivo grande demais"}, 413
+    return {"erro": f"Arquivo maior que o limite de {limite // (1024 * 1024)} MB"}, 413
+
+
+@rotas.route("/metrics", methods=["GET"])
+def exportar_metricas():
+    """Métricas do processo no formato texto do Prometheus."""
+    return Response(metricas.exportar(), mimetype="text/plain; version=0.0.4; charset=utf-8")
+
+
+@rotas.route("/cache/estatisticas", methods=["GET"])
+def estatisticas_cache():
+    if cache_resultados is None:
+        return {"backend": None}
+    return cache_resultados.estatisticas()
+
+
+@rotas.route("/baixar/<identificador>", methods=["GET"])
+def baixar(identificador):
+    dados = resultados_formatados.obter(identificador)
+    if dados is None:
+        return {"erro": "Arquivo não encontrado ou expirado. Envie o documento novamente."}, 404
+
+    return send_file(io.BytesIO(dados), as_attachment=True, download_name="arquivo_formatado_ABNT.docx")
+
+
+# -----------------------------------------------------------
+# APLICAÇÃO
+# -----------------------------------------------------------
+def criar_app(config=None):
+    """
+    Monta a aplicação Flask (servidor de desenvolvimento, wsgi.py e testes).
+    ``config`` sobrescreve as chaves de ``app.config``.
+    """
+    app = Flask(__name__)
+    app.request_class = RequisicaoABNT
+    app.config["MAX_CONTENT_LENGTH"] = MAX_ENVIO
+    if config:
+        app.config.update(config)
+
+    app.json.ensure_ascii = False  # mensagens com acentos e emoji sem escapes \uXXXX
+    CORS(app)
+    app.register_blueprint(rotas)
+    return app
+
+
+# Importados só quando usados (ver tarefas.py); precarregar() os traz
+# para o processo mestre antes do fork
+MODULOS_SOB_DEMANDA = ("concurrent.futures.process",)
+
+
+def precarregar():
+    """
+    Aquece o processo antes do fork dos workers (gunicorn --preload):
+    formata e verifica um documento mínimo para que o python-docx, o lxml e
+    os caches de expressões regulares fiquem prontos e sejam compartilhados
+    (copy-on-write) por todos os workers, em vez de montados em cada um.
+    Os módulos que o app só importa no primeiro uso também são carregados.
+    """
+    for modulo in MODULOS_SOB_DEMANDA:
+        importlib.import_module(modulo)
+
+    doc = Document()
+    for linha in ("UNIVERSIDADE FEDERAL DA BAHIA", "Autor", "Salvador", "2024", "RESUMO",
+                  "Texto do resumo.", "Palavras-chave: teste.", "1 INTRODUÇÃO",
+                  "Texto do corpo.", "REFERÊNCIAS", "AUTOR. Título. Salvador: Editora, 2024."):
+        doc.add_paragraph(linha)
+    original = io.BytesIO()
+    doc.save(original)
+
+    doc = Document(original)
+    verificar_documento(doc)
+    formatar_documento(doc)
+    documento_em_bytes(doc, original)
+    verificar_stream(original)
+
+
 if __name__ == "__main__":
-    app.run(debug=True)
+    criar_app().run(debug=True)
@@ -0,0 +1,7 @@
+"""
+Benchmarks do formatador.
+
+Cada módulo pode ser executado direto da raiz do projeto, por exemplo:
+
+    python -m benchmarks.escala_paragrafos
+"""
@@ -0,0 +1,80 @@
+"""
+Classificação por máscaras (``caracteristicas.MatrizParagrafos``) contra os
+classificadores chamados linha a linha, num documento de ~10.000 parágrafos.
+
+Para cada decisão (linha que o corpo pula, candidata a título numerado)
+mede o laço com um teste por linha — o que as etapas faziam — e a
+máscara montada a partir das colunas, sempre sobre uma matriz nova (sem
+colunas prontas). As duas formas têm que marcar as mesmas linhas; o
+script termina com código 1 se alguma divergir.
+
+    python -m benchmarks.caracteristicas
+    python -m benchmarks.caracteristicas --paginas 500 --repeticoes 10
+"""
+import argparse
+import io
+import sys
+import time
+
+from docx import Document
+
+from benchmarks.gerador import gerar_documento
+
+from caracteristicas import MatrizParagrafos, e, nao, ou
+from padroes import padrao_numerado, padrao_resumo_ou_titulo, padrao_resumo_secao
+
+REPETICOES = 5
+
+
+def eh_titulo_candidato(texto):
+    return bool((padrao_numerado.match(texto) or len(texto.split()) <= 3) and not padrao_resumo_secao.match(texto))
+
+
+def titulos_candidatos(matriz):
+    return e(ou(matriz.mascara("numerado"), matriz.faixa("palavras", maximo=3)), nao(matriz.mascara("resumo")))
+
+
+DECISOES = (
+    ("corpo pula", lambda t: padrao_resumo_ou_titulo.match(t) is not None,
+     lambda matriz: matriz.mascara("resumo_ou_titulo")),
+    ("título num.", eh_titulo_candidato, titulos_candidatos),
+)
+
+
+def melhor(funcao, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos), resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--paginas", type=int, default=2000)
+    parser.add_argument("--repeticoes", type=int, default=REPETICOES)
+    args = parser.parse_args()
+
+    doc = Document(io.BytesIO(gerar_documento(args.paginas)))
+    textos = [p.text.strip() for p in doc.paragraphs]
+
+    divergentes = []
+    print(f"{len(textos)} parágrafos ({args.paginas} páginas)")
+    print(f"     {'decisão':<14}{'por linha':>12}{'máscara':>12}{'linhas':>9}")
+    for nome, por_linha, mascara in DECISOES:
+        tempo_linha, esperado = melhor(lambda: [por_linha(t) for t in textos], args.repeticoes)
+        tempo_mascara, obtido = melhor(lambda: mascara(MatrizParagrafos(textos)), args.repeticoes)
+        if list(map(bool, obtido)) != esperado:
+            divergentes.append(nome)
+        print(f"     {nome:<14}{tempo_linha * 1000:>10.1f}ms{tempo_mascara * 1000:>10.1f}ms{sum(esperado):>9}")
+
+    if divergentes:
+        print("  ❌ máscaras diferentes dos classificadores: " + ", ".join(divergentes))
+        return 1
+    print("  ✅ máscaras iguais aos classificadores linha a linha")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
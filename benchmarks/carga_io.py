@@ -0,0 +1,101 @@
+"""
+Teste de carga do caminho de E/S das requisições.
+
+Dispara milhares de requisições (/formatar, /verificar e /processar, em
+rodízio) pelo cliente de testes do Flask e acompanha, a cada bloco, os
+descritores de arquivo abertos pelo processo e o número/tamanho dos arquivos
+no diretório temporário. Nenhum dos dois deve crescer.
+
+Com ``--limite-memoria`` baixo (ex.: 1024) os uploads e as saídas passam do
+limite e vão para o disco, exercitando também a limpeza dos temporários.
+
+    python -m benchmarks.carga_io --requisicoes 10000
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+
+from docx import Document
+
+import app
+
+ROTAS = ("/formatar", "/verificar", "/processar")
+
+
+def documento_exemplo():
+    doc = Document()
+    for linha in ("UNIVERSIDADE ESTADUAL DE FEIRA DE SANTANA", "Maria Clara Souza",
+                  "UM ESTUDO SOBRE A FORMATAÇÃO AUTOMÁTICA DE TRABALHOS ACADÊMICOS",
+                  "Feira de Santana", "2025", "RESUMO: Texto do resumo.", "1 INTRODUÇÃO"):
+        doc.add_paragraph(linha)
+    for _ in range(30):
+        doc.add_paragraph("Parágrafo do corpo do trabalho com algumas palavras.")
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def descritores_abertos():
+    return len(os.listdir("/proc/self/fd")) if os.path.isdir("/proc/self/fd") else -1
+
+
+def uso_temporario():
+    pasta = tempfile.gettempdir()
+    arquivos, total = 0, 0
+    for nome in os.listdir(pasta):
+        caminho = os.path.join(pasta, nome)
+        if os.path.isfile(caminho):
+            arquivos += 1
+            total += os.path.getsize(caminho)
+    return arquivos, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requisicoes", type=int, default=10000)
+    parser.add_argument("--bloco", type=int, default=1000)
+    parser.add_argument("--limite-memoria", type=int, default=None,
+                        help="sobrescreve app.LIMITE_MEMORIA_ARQUIVO (bytes)")
+    args = parser.parse_args()
+
+    if args.limite_memoria is not None:
+        app.LIMITE_MEMORIA_ARQUIVO = args.limite_memoria
+
+    dados = documento_exemplo()
+    cliente = app.criar_app().test_client()
+
+    fds_inicio = descritores_abertos()
+    tmp_inicio = uso_temporario()
+    print(f"início: {fds_inicio} descritores, {tmp_inicio[0]} arquivos ({tmp_inicio[1]} bytes) em {tempfile.gettempdir()}")
+
+    inicio = time.perf_counter()
+    for i in range(1, args.requisicoes + 1):
+        rota = ROTAS[i % len(ROTAS)]
+        resposta = cliente.post(rota, data={"arquivo": (io.BytesIO(dados), "trabalho.docx")})
+        resposta.get_data()
+        resposta.close()
+        if resposta.status_code != 200:
+            raise SystemExit(f"{rota} respondeu {resposta.status_code}")
+
+        if i % args.bloco == 0:
+            fds, tmp = descritores_abertos(), uso_temporario()
+            print(f"{i:>7} requisições: {fds} descritores, {tmp[0]} arquivos ({tmp[1]} bytes) temporários",
+                  file=sys.stderr)
+
+    decorrido = time.perf_counter() - inicio
+    fds_fim, tmp_fim = descritores_abertos(), uso_temporario()
+    print(f"fim:    {fds_fim} descritores, {tmp_fim[0]} arquivos ({tmp_fim[1]} bytes) — {decorrido:.1f}s")
+
+    if fds_fim > fds_inicio or tmp_fim[0] > tmp_inicio[0] or tmp_fim[1] > tmp_inicio[1]:
+        print("❌ Houve crescimento de descritores ou de arquivos temporários.")
+        return 1
+
+    print("✅ Sem crescimento de descritores nem de disco.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
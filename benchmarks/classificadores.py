@@ -0,0 +1,94 @@
+"""
+Micro-benchmark dos classificadores de linha (capa, títulos, autor, ano...).
+
+Cada classificador roda sobre as linhas de um trabalho sintético
+(``benchmarks.gerador``) — separadamente as linhas curtas (capa, títulos,
+referências: até ``LIMITE_CURTA`` caracteres) e os parágrafos do corpo — e o
+resultado é o melhor tempo médio por linha. Para comparar duas versões do
+código, rode o script em cada uma.
+
+Os caches de ``normalizacao`` são esvaziados antes de cada rodada (como na
+primeira passada sobre um documento novo); com ``--cache-quente`` eles ficam
+cheios, como num reenvio do mesmo documento.
+
+    python -m benchmarks.classificadores
+    python -m benchmarks.classificadores --paginas 100 --repeticoes 20
+    python -m benchmarks.classificadores --cache-quente
+"""
+import argparse
+import io
+import sys
+import time
+
+from docx import Document
+
+from benchmarks.gerador import gerar_documento
+
+import app
+import normalizacao
+
+REPETICOES = 10
+LIMITE_CURTA = 120
+
+CLASSIFICADORES = (
+    ("classificar_texto", lambda t: app.classificar_texto(t, False)),
+    ("classificar_capa", app.classificar_capa),
+    ("eh_cidade", app.eh_cidade),
+    ("eh_curso", app.eh_curso),
+    ("eh_instituicao", app.eh_instituicao),
+    ("eh_autor", app.eh_autor),
+    ("eh_ano", app.eh_ano),
+    ("eh_subtitulo", lambda t: app.eh_subtitulo(t, True)),
+    ("_normalizar_para_busca", app._normalizar_para_busca),
+)
+
+
+def linhas_do_documento(paginas):
+    doc = Document(io.BytesIO(gerar_documento(paginas)))
+    return [p.text.strip() for p in doc.paragraphs if p.text.strip()]
+
+
+def limpar_caches():
+    normalizacao.sem_acentos.cache_clear()
+    normalizacao.dobrado.cache_clear()
+
+
+def melhor_por_linha(classificador, linhas, repeticoes, cache_quente):
+    melhor = None
+    classificador(linhas[0])  # aquece os imports e padrões sob demanda
+    for _ in range(repeticoes):
+        if cache_quente:
+            for linha in linhas:
+                classificador(linha)
+        else:
+            limpar_caches()
+        inicio = time.perf_counter()
+        for linha in linhas:
+            classificador(linha)
+        decorrido = time.perf_counter() - inicio
+        melhor = decorrido if melhor is None else min(melhor, decorrido)
+    return melhor / len(linhas)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--paginas", type=int, default=50)
+    parser.add_argument("--repeticoes", type=int, default=REPETICOES)
+    parser.add_argument("--cache-quente", action="store_true", help="não esvazia os caches de normalização")
+    args = parser.parse_args()
+
+    linhas = linhas_do_documento(args.paginas)
+    curtas = [linha for linha in linhas if len(linha) <= LIMITE_CURTA]
+    longas = [linha for linha in linhas if len(linha) > LIMITE_CURTA]
+
+    cache = "quente" if args.cache_quente else "frio"
+    print(f"{args.paginas} páginas: {len(curtas)} linhas curtas, {len(longas)} parágrafos (ns/linha, cache {cache})")
+    print(f"     {'':<26}{'curtas':>10}{'parágrafos':>12}")
+    for nome, classificador in CLASSIFICADORES:
+        tempos = [melhor_por_linha(classificador, grupo, args.repeticoes, args.cache_quente) for grupo in (curtas, longas)]
+        print(f"     {nome:<26}{tempos[0] * 1e9:>10.0f}{tempos[1] * 1e9:>12.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+"""
+Teste de estresse com requisições simultâneas: /formatar e /verificar em
+várias threads do mesmo processo têm que devolver exatamente o que devolvem
+uma de cada vez.
+
+Gera alguns trabalhos sintéticos (``benchmarks.gerador``, sementes
+diferentes), grava a resposta de referência de cada um em série e depois
+dispara as mesmas requisições, embaralhadas, num pool de threads. Compara o
+conteúdo de cada membro do .docx formatado (o zip em si traz a hora da
+gravação) e o JSON do /verificar, e mostra a vazão nos dois casos. O cache
+de resultados fica desligado para que toda requisição passe pelo pipeline.
+Termina com código 1 se alguma resposta divergir.
+
+    python -m benchmarks.concorrencia
+    python -m benchmarks.concorrencia --threads 16 --requisicoes 200
+"""
+import argparse
+import hashlib
+import io
+import random
+import sys
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.gerador import gerar_documento
+
+import app
+
+THREADS = 8
+REQUISICOES = 96
+DOCUMENTOS = 6
+
+_local = threading.local()
+
+
+def cliente():
+    """Um test client por thread."""
+    if not hasattr(_local, "cliente"):
+        _local.cliente = app.criar_app().test_client()
+    return _local.cliente
+
+
+def requisitar(rota, dados):
+    resposta = cliente().post(rota, data={"arquivo": (io.BytesIO(dados), "tcc.docx")})
+    if resposta.status_code != 200:
+        return f"HTTP {resposta.status_code}"
+    if rota == "/verificar":
+        return resposta.get_data()
+    with zipfile.ZipFile(io.BytesIO(resposta.get_data())) as pacote:
+        return tuple(
+            (nome, hashlib.sha256(pacote.read(nome)).hexdigest()) for nome in pacote.namelist()
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--threads", type=int, default=THREADS)
+    parser.add_argument("--requisicoes", type=int, default=REQUISICOES)
+    parser.add_argument("--documentos", type=int, default=DOCUMENTOS)
+    parser.add_argument("--paginas", type=int, default=10)
+    args = parser.parse_args()
+
+    app.cache_resultados = None  # toda requisição passa pelo pipeline
+    documentos = [gerar_documento(args.paginas, semente) for semente in range(args.documentos)]
+    trabalhos = [(rota, i) for i in range(len(documentos)) for rota in ("/formatar", "/verificar")]
+    fila = [trabalhos[i % len(trabalhos)] for i in range(args.requisicoes)]
+    random.Random(0).shuffle(fila)
+
+    esperado = {(rota, i): requisitar(rota, documentos[i]) for rota, i in trabalhos}
+
+    inicio = time.perf_counter()
+    for rota, i in fila:
+        requisitar(rota, documentos[i])
+    serie = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        respostas = list(pool.map(lambda trabalho: requisitar(trabalho[0], documentos[trabalho[1]]), fila))
+    paralelo = time.perf_counter() - inicio
+
+    divergentes = [trabalho for trabalho, resposta in zip(fila, respostas) if resposta != esperado[trabalho]]
+
+    print(f"{args.requisicoes} requisições, {args.documentos} documentos de {args.paginas} páginas")
+    print(f"     em série           {serie:>8.2f} s   {args.requisicoes / serie:>7.1f} req/s")
+    print(f"     {args.threads:>2} threads         {paralelo:>8.2f} s   {args.requisicoes / paralelo:>7.1f} req/s")
+    if divergentes:
+        print(f"  ❌ {len(divergentes)} respostas diferentes da execução em série")
+        for rota, i in sorted(set(divergentes)):
+            print(f"     {rota} documento {i}")
+        return 1
+    print("  ✅ todas as respostas iguais às da execução em série")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+"""
+Compara os detectores da capa por linha ("janela" e "legado") entre si e
+com o padrão do formatar_capa ("classificar", classificar_linhas) num
+pequeno corpus de documentos sintéticos.
+
+Para cada documento mede o passo completo usado por formatar_capa
+(localizar_linhas_da_capa em cada modo), conta quantas vezes os
+classificadores de linha foram chamados, confere se "legado" e "janela"
+chegam aos mesmos índices e mostra se a janela chega aos mesmos do padrão —
+condição para ela virar o DETECTOR_CAPA.
+
+O legado lê o documento inteiro e pode marcar como capa uma linha do RESUMO
+ou do corpo; a janela nem chega a olhar essas linhas. Essas diferenças
+aparecem como "legado fora da capa" e não contam como divergência; qualquer
+outra termina o script com código 1.
+
+    python -m benchmarks.detector_capa
+"""
+import contextlib
+import functools
+import io
+import sys
+import time
+
+from docx import Document
+
+import app
+from documento import obter_snapshot
+
+CLASSIFICADORES = (
+    "detectar_tipo", "eh_ano", "eh_instituicao", "eh_curso",
+    "eh_titulo", "eh_subtitulo", "eh_autor", "eh_cidade",
+)
+
+CAPAS = (
+    ["UNIVERSIDADE ESTADUAL DE FEIRA DE SANTANA", "Curso de Engenharia Civil", "Maria Clara Souza",
+     "UM ESTUDO SOBRE A FORMATAÇÃO AUTOMÁTICA DE TRABALHOS ACADÊMICOS", "Feira de Santana", "2025"],
+    ["Aplicativo para auxílio na padronização de artigos acadêmicos segundo a abnt",
+     "Subtítulo Genérico Para ver se Identifica", "João Lucas Santana Silva Marques",
+     "Sistemas de informação", "UNEX – Centro Universitário de Excelência", "Feira de Santana", "2025"],
+    ["2024", "", "Salvador - BA", "Ana Beatriz", "", "Faculdade Pitágoras", "Bacharelado em Direito",
+     "ANÁLISE DE DADOS EDUCACIONAIS NO ENSINO SUPERIOR BRASILEIRO"],
+    ["ufba", "Pedagogia", "Carlos Eduardo Ferreira", "Jequié", "2019"],
+)
+TAMANHOS_CORPO = (0, 200, 2000)
+REPETICOES = 5
+
+
+def gerar_corpus():
+    for n_capa, capa in enumerate(CAPAS):
+        for tamanho in TAMANHOS_CORPO:
+            doc = Document()
+            for linha in capa:
+                doc.add_paragraph(linha)
+            doc.add_paragraph("RESUMO: Texto do resumo.")
+            for i in range(tamanho):
+                doc.add_paragraph("Parágrafo do corpo do trabalho. Feira de Santana, 2020." if i % 7 else "1 Seção")
+            buffer = io.BytesIO()
+            doc.save(buffer)
+            yield f"capa{n_capa}-corpo{tamanho}", buffer.getvalue()
+
+
+@contextlib.contextmanager
+def contar_chamadas():
+    contagem = dict.fromkeys(CLASSIFICADORES, 0)
+    originais = {nome: getattr(app, nome) for nome in CLASSIFICADORES}
+
+    def contado(nome, funcao):
+        @functools.wraps(funcao)
+        def envolta(*args, **kwargs):
+            contagem[nome] += 1
+            return funcao(*args, **kwargs)
+        return envolta
+
+    for nome, funcao in originais.items():
+        setattr(app, nome, contado(nome, funcao))
+    try:
+        yield contagem
+    finally:
+        for nome, funcao in originais.items():
+            setattr(app, nome, funcao)
+
+
+def executar(dados, modo):
+    doc = Document(io.BytesIO(dados))
+    snap = obter_snapshot(doc)
+    linhas = snap.brutos[:snap.secoes()["capa"][1]]
+
+    inicio = time.perf_counter()
+    resultado = app.localizar_linhas_da_capa(doc, linhas, modo)
+    return resultado, time.perf_counter() - inicio
+
+
+def comparar(legado, janela, fim_capa):
+    """"igual", "legado fora da capa" (só o legado marcou linhas depois da capa) ou "DIFERENTE"."""
+    if legado == janela:
+        return "igual"
+    diferentes = [chave for chave in legado if legado[chave] != janela[chave]]
+    if all(janela[chave] is None and legado[chave] >= fim_capa for chave in diferentes):
+        return "legado fora da capa"
+    return "DIFERENTE"
+
+
+def main():
+    divergencias = 0
+    iguais_ao_padrao = 0
+    print(f"{'documento':<18}{'padrão':>12}{'legado':>12}{'janela':>12}{'chamadas':>18}  {'= padrão':<10}resultado")
+
+    for nome, dados in gerar_corpus():
+        tempos, chamadas, resultados = {}, {}, {}
+        for modo in ("classificar", "legado", "janela"):
+            with contar_chamadas() as contagem:
+                resultados[modo], _ = executar(dados, modo)
+            chamadas[modo] = sum(contagem.values())
+            tempos[modo] = min(executar(dados, modo)[1] for _ in range(REPETICOES))
+
+        fim_capa = obter_snapshot(Document(io.BytesIO(dados))).secoes()["capa"][1]
+        resultado = comparar(resultados["legado"], resultados["janela"], fim_capa)
+        divergencias += resultado == "DIFERENTE"
+        igual_ao_padrao = resultados["janela"] == resultados["classificar"]
+        iguais_ao_padrao += igual_ao_padrao
+        print(
+            f"{nome:<18}{tempos['classificar'] * 1000:>10.2f}ms"
+            f"{tempos['legado'] * 1000:>10.2f}ms{tempos['janela'] * 1000:>10.2f}ms"
+            f"{chamadas['legado']:>9} → {chamadas['janela']:<6}  {'sim' if igual_ao_padrao else 'não':<10}{resultado}"
+        )
+
+    total = len(CAPAS) * len(TAMANHOS_CORPO)
+    print(f"janela igual ao padrão (classificar_linhas) em {iguais_ao_padrao} de {total} documentos")
+    if divergencias:
+        print(f"⚠️ {divergencias} documento(s) com capa identificada de forma diferente entre os modos.")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""
+Regressão de escalabilidade das etapas que percorriam o documento com
+``doc.paragraphs[idx]`` (formatar_capa, formatar_resumo e formatar_abstract).
+
+Gera documentos sintéticos de até 5.000 parágrafos e mede o tempo de cada
+etapa. Como no /formatar, o snapshot do documento é montado antes das etapas
+e aparece numa linha própria. Com custo linear, o tempo cresce na mesma
+proporção que o documento: o script compara os dois crescimentos entre o
+menor e o maior tamanho e termina com código 1 quando alguma etapa passa de
+``LIMITE_CRESCIMENTO`` (1,0 = linear; um custo quadrático fica perto de 8,0).
+
+    python -m benchmarks.escala_paragrafos
+"""
+import gc
+import io
+import sys
+import time
+
+from docx import Document
+
+import app
+from documento import obter_snapshot
+
+TAMANHOS = (625, 1250, 2500, 5000)
+LIMITE_CRESCIMENTO = 1.6
+REPETICOES = 5
+
+ETAPAS = (
+    ("SnapshotDocumento", obter_snapshot),
+    ("formatar_capa", app.formatar_capa),
+    ("formatar_resumo", app.formatar_resumo),
+    ("formatar_abstract", app.formatar_abstract),
+)
+
+
+def gerar_documento(total_paragrafos):
+    """Capa + RESUMO + ABSTRACT + corpo até completar ``total_paragrafos``."""
+    doc = Document()
+    for linha in (
+        "UNIVERSIDADE ESTADUAL DE FEIRA DE SANTANA",
+        "Curso de Engenharia Civil",
+        "Maria Clara Souza",
+        "UM ESTUDO SOBRE A FORMATAÇÃO AUTOMÁTICA DE TRABALHOS ACADÊMICOS",
+        "Feira de Santana",
+        "2025",
+    ):
+        doc.add_paragraph(linha)
+
+    doc.add_paragraph("RESUMO: Texto do resumo na mesma linha do título.")
+    doc.add_paragraph("ABSTRACT: Abstract text on the same line as the heading.")
+
+    secao = 1
+    for i in range(8, total_paragrafos):
+        if i % 50 == 0:
+            doc.add_paragraph(f"{secao}. SEÇÃO DE TESTE")
+            secao += 1
+        else:
+            doc.add_paragraph("Parágrafo do corpo do trabalho com texto suficiente para ocupar uma linha inteira.")
+
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def medir(dados, etapa):
+    melhor = None
+    for _ in range(REPETICOES):
+        doc = Document(io.BytesIO(dados))
+        if etapa is not obter_snapshot:
+            obter_snapshot(doc)
+        gc.collect()
+        gc.disable()
+        try:
+            inicio = time.perf_counter()
+            etapa(doc)
+            decorrido = time.perf_counter() - inicio
+        finally:
+            gc.enable()
+        melhor = decorrido if melhor is None else min(melhor, decorrido)
+    return melhor
+
+
+def main():
+    tempos = {nome: [] for nome, _ in ETAPAS}
+
+    for tamanho in TAMANHOS:
+        dados = gerar_documento(tamanho)
+        for nome, etapa in ETAPAS:
+            tempos[nome].append(medir(dados, etapa))
+
+    falhou = False
+    escala = TAMANHOS[-1] / TAMANHOS[0]
+    print(f"{'etapa':<20}" + "".join(f"{t:>10}" for t in TAMANHOS) + "   crescimento")
+    for nome, valores in tempos.items():
+        crescimento = (valores[-1] / valores[0]) / escala if valores[0] > 0 else 0.0
+        linha = f"{nome:<20}" + "".join(f"{v * 1000:>8.1f}ms" for v in valores)
+        print(f"{linha}   {crescimento:.2f}")
+        if crescimento > LIMITE_CRESCIMENTO:
+            falhou = True
+            print(f"  ❌ {nome} cresce mais rápido que o documento — possível custo quadrático.")
+
+    if not falhou:
+        print("✅ Todas as etapas escalam linearmente.")
+    return 1 if falhou else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
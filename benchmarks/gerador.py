@@ -0,0 +1,215 @@
+"""
+Gerador de trabalhos acadêmicos sintéticos (.docx) a partir de uma semente.
+
+Cada documento tem capa, RESUMO, Palavras-chave, ABSTRACT, Keywords, seções
+numeradas (com subseções), tabelas e REFERÊNCIAS, com o corpo ajustado para
+o número de páginas pedido. A mesma semente gera sempre o mesmo arquivo,
+então os tempos de execuções diferentes são comparáveis.
+
+    python -m benchmarks.gerador --paginas 50 --semente 7 --saida tcc.docx
+"""
+import argparse
+import io
+import random
+
+from docx import Document
+from docx.shared import Pt
+
+# Aproximação de uma página ABNT (fonte 12, espaçamento 1,5): cinco
+# parágrafos de ~70 palavras
+PARAGRAFOS_POR_PAGINA = 5
+PAGINAS_POR_SECAO = 6
+PAGINAS_POR_TABELA = 8
+
+INSTITUICOES = (
+    "UNIVERSIDADE ESTADUAL DE FEIRA DE SANTANA",
+    "UNIVERSIDADE FEDERAL DA BAHIA",
+    "INSTITUTO FEDERAL DE EDUCAÇÃO, CIÊNCIA E TECNOLOGIA DA BAHIA",
+    "UNIVERSIDADE DO ESTADO DA BAHIA",
+)
+CURSOS = (
+    "Curso de Engenharia Civil",
+    "Curso de Bacharelado em Ciência da Computação",
+    "Licenciatura em Matemática",
+    "Curso de Administração",
+)
+CIDADES = ("Feira de Santana", "Salvador", "Vitória da Conquista", "Ilhéus", "Juazeiro")
+NOMES = ("Maria", "João", "Ana", "Pedro", "Juliana", "Carlos", "Fernanda", "Lucas")
+SOBRENOMES = ("Souza", "Santos", "Oliveira", "Almeida", "Pereira", "Costa", "Ribeiro", "Carvalho")
+SECOES = (
+    "INTRODUÇÃO", "REFERENCIAL TEÓRICO", "METODOLOGIA", "ESTUDO DE CASO",
+    "RESULTADOS", "DISCUSSÃO", "TRABALHOS RELACIONADOS", "CONSIDERAÇÕES FINAIS",
+)
+SUBSECOES = ("Contextualização", "Objetivos", "Justificativa", "Procedimentos", "Análise dos dados")
+PALAVRAS = (
+    "análise", "estrutura", "processo", "sistema", "resultado", "método", "ensino",
+    "pesquisa", "desenvolvimento", "aplicação", "modelo", "avaliação", "dados",
+    "formação", "tecnologia", "qualidade", "estudo", "projeto", "conceito", "gestão",
+    "de", "da", "do", "com", "para", "em", "que", "uma", "os", "as", "no", "na",
+)
+FONTES = ("Times New Roman", "Arial", "Calibri")
+
+
+def _frase(rnd, minimo, maximo):
+    palavras = [rnd.choice(PALAVRAS) for _ in range(rnd.randint(minimo, maximo))]
+    return " ".join(palavras).capitalize() + "."
+
+
+def _paragrafo(rnd, palavras=70):
+    frases = []
+    total = 0
+    while total < palavras:
+        frase = _frase(rnd, 8, 18)
+        frases.append(frase)
+        total += frase.count(" ") + 1
+    return " ".join(frases)
+
+
+def _autor(rnd):
+    return f"{rnd.choice(NOMES)} {rnd.choice(SOBRENOMES)} {rnd.choice(SOBRENOMES)}"
+
+
+def _adicionar_corpo(doc, rnd, texto):
+    """Parágrafo do corpo com runs de fonte/tamanho variados, como em arquivos reais."""
+    p = doc.add_paragraph()
+    fonte = rnd.choice(FONTES)
+    for pedaco in texto.split(". "):
+        run = p.add_run(pedaco + ". ")
+        run.font.name = fonte
+        run.font.size = Pt(rnd.choice((11, 12, 12, 12, 14)))
+        run.bold = rnd.random() < 0.05
+    return p
+
+
+def _adicionar_tabela(doc, rnd, numero):
+    doc.add_paragraph(f"Tabela {numero} – {_frase(rnd, 3, 6)[:-1]}")
+    linhas, colunas = rnd.randint(3, 6), rnd.randint(2, 4)
+    tabela = doc.add_table(rows=linhas, cols=colunas)
+    for i, linha in enumerate(tabela.rows):
+        for celula in linha.cells:
+            celula.text = rnd.choice(PALAVRAS).capitalize() if i == 0 else f"{rnd.uniform(0, 100):.1f}"
+    doc.add_paragraph("Fonte: elaborado pelo autor.")
+
+
+def _referencia(rnd):
+    sobrenome = rnd.choice(SOBRENOMES).upper()
+    return (
+        f"{sobrenome}, {rnd.choice(NOMES)}. {_frase(rnd, 4, 9)[:-1]}. "
+        f"{rnd.choice(CIDADES)}: Editora {rnd.choice(SOBRENOMES)}, {rnd.randint(1990, 2025)}."
+    )
+
+
+def _referencia_online(rnd):
+    sobrenome = rnd.choice(SOBRENOMES).upper()
+    return (
+        f"{sobrenome}, {rnd.choice(NOMES)}. {_frase(rnd, 4, 9)[:-1]}. Disponível em: "
+        f"<https://www.exemplo.edu.br/{rnd.choice(PALAVRAS)}/{rnd.randint(1, 999)}>. "
+        f"Acesso em: {rnd.randint(1, 28)} mar. {rnd.randint(2015, 2025)}."
+    )
+
+
+def _referencia_artigo(rnd):
+    return (
+        f"{rnd.choice(SOBRENOMES).upper()}, {rnd.choice(NOMES)}; {rnd.choice(SOBRENOMES).upper()}, "
+        f"{rnd.choice(NOMES)}. {_frase(rnd, 5, 10)[:-1]}. Revista de {rnd.choice(PALAVRAS).capitalize()}, "
+        f"v. {rnd.randint(1, 40)}, n. {rnd.randint(1, 12)}, p. {rnd.randint(1, 90)}-{rnd.randint(91, 200)}."
+    )
+
+
+def _norma(rnd):
+    return (
+        f"ASSOCIAÇÃO BRASILEIRA DE NORMAS TÉCNICAS. NBR {rnd.randint(6000, 15000)}: "
+        f"{_frase(rnd, 3, 6)[:-1]}. Rio de Janeiro: ABNT, {rnd.randint(2002, 2024)}."
+    )
+
+
+def gerar_bibliografia(entradas, semente=0):
+    """
+    Textos de uma lista de REFERÊNCIAS com ``entradas`` linhas: livros,
+    páginas da internet, artigos e normas, e uma linha em cada vinte que
+    não é referência (nota, "Fonte: ...", trecho de texto).
+    """
+    rnd = random.Random(f"{semente}-bibliografia-{entradas}")
+    tipos = (_referencia, _referencia, _referencia_online, _referencia_artigo, _norma)
+    linhas = []
+    for i in range(entradas):
+        if i % 20 == 19:
+            linhas.append(rnd.choice(("Fonte: elaborado pelo autor.", _frase(rnd, 3, 8), _paragrafo(rnd, 30))))
+        else:
+            linhas.append(rnd.choice(tipos)(rnd))
+    return linhas
+
+
+def gerar_documento(paginas, semente=0):
+    """Devolve os bytes de um .docx com aproximadamente ``paginas`` páginas."""
+    rnd = random.Random(f"{semente}-{paginas}")
+    doc = Document()
+
+    # -------- CAPA --------
+    for linha in (
+        rnd.choice(INSTITUICOES),
+        rnd.choice(CURSOS),
+        "",
+        _autor(rnd),
+        "",
+        _frase(rnd, 6, 12)[:-1].upper(),
+        _frase(rnd, 4, 8)[:-1],
+        "",
+        rnd.choice(CIDADES),
+        str(rnd.randint(2015, 2025)),
+    ):
+        doc.add_paragraph(linha)
+
+    # -------- PRÉ-TEXTUAIS --------
+    doc.add_paragraph("RESUMO")
+    doc.add_paragraph(_paragrafo(rnd, 200))
+    doc.add_paragraph("Palavras-chave: " + "; ".join(rnd.sample(PALAVRAS[:20], 4)) + ".")
+    doc.add_paragraph("ABSTRACT")
+    doc.add_paragraph(_paragrafo(rnd, 200))
+    doc.add_paragraph("Keywords: analysis; system; model; evaluation.")
+
+    # -------- CORPO --------
+    total_paragrafos = max(paginas - 3, 1) * PARAGRAFOS_POR_PAGINA
+    por_secao = PAGINAS_POR_SECAO * PARAGRAFOS_POR_PAGINA
+    por_tabela = PAGINAS_POR_TABELA * PARAGRAFOS_POR_PAGINA
+    secao = subsecao = tabela = 0
+
+    for i in range(total_paragrafos):
+        if i % por_secao == 0:
+            secao += 1
+            subsecao = 0
+            doc.add_paragraph(f"{secao} {SECOES[(secao - 1) % len(SECOES)]}")
+        elif i % por_secao == por_secao // 2:
+            subsecao += 1
+            doc.add_paragraph(f"{secao}.{subsecao} {rnd.choice(SUBSECOES)}")
+
+        _adicionar_corpo(doc, rnd, _paragrafo(rnd))
+
+        if i % por_tabela == por_tabela - 1:
+            tabela += 1
+            _adicionar_tabela(doc, rnd, tabela)
+
+    # -------- REFERÊNCIAS --------
+    doc.add_paragraph("REFERÊNCIAS")
+    for _ in range(max(5, paginas // 2)):
+        doc.add_paragraph(_referencia(rnd))
+
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--paginas", type=int, default=50)
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--saida", default="sintetico.docx")
+    args = parser.parse_args()
+
+    with open(args.saida, "wb") as arquivo:
+        arquivo.write(gerar_documento(args.paginas, args.semente))
+    print(f"{args.saida}: ~{args.paginas} páginas (semente {args.semente})")
+
+
+if __name__ == "__main__":
+    main()
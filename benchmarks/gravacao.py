@@ -0,0 +1,109 @@
+"""
+Gravação do .docx formatado: ``doc.save`` vs. ``pacote.salvar_pacote``.
+
+Usa um trabalho sintético (``benchmarks.gerador``) com N figuras — PNGs de
+ruído, que como fotos e capturas de tela quase não comprimem — e mede o
+melhor tempo de cada gravação depois de formatar o documento. Confere
+também que os dois pacotes têm os mesmos membros com o mesmo conteúdo.
+
+    python -m benchmarks.gravacao
+    python -m benchmarks.gravacao --paginas 150 --figuras 40 --kb 800
+"""
+import argparse
+import io
+import random
+import struct
+import sys
+import time
+import zipfile
+import zlib
+
+from docx import Document
+from docx.shared import Cm
+
+from benchmarks.gerador import gerar_documento
+
+import app
+from pacote import salvar_pacote
+
+REPETICOES = 3
+
+
+def png_ruido(kb, semente):
+    """PNG em tons de cinza com ~``kb`` KB de ruído (incompressível)."""
+    rnd = random.Random(semente)
+    lado = max(int((kb * 1024) ** 0.5), 8)
+    linhas = b"".join(b"\x00" + rnd.randbytes(lado) for _ in range(lado))
+
+    def bloco(tipo, dados):
+        return struct.pack(">I", len(dados)) + tipo + dados + struct.pack(">I", zlib.crc32(tipo + dados))
+
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + bloco(b"IHDR", struct.pack(">2I5B", lado, lado, 8, 0, 0, 0, 0))
+        + bloco(b"IDAT", zlib.compress(linhas))
+        + bloco(b"IEND", b"")
+    )
+
+
+def documento_com_figuras(paginas, figuras, kb):
+    doc = Document(io.BytesIO(gerar_documento(paginas)))
+    paragrafos = doc.paragraphs
+    passo = max(len(paragrafos) // (figuras + 1), 1)
+    for i in range(figuras):
+        run = paragrafos[(i + 1) * passo].add_run()
+        run.add_picture(io.BytesIO(png_ruido(kb, i)), width=Cm(12))
+    saida = io.BytesIO()
+    doc.save(saida)
+    return saida.getvalue()
+
+
+def com_python_docx(doc, dados):
+    saida = io.BytesIO()
+    doc.save(saida)
+    return saida.getvalue()
+
+
+def com_pacote(doc, dados):
+    saida = io.BytesIO()
+    salvar_pacote(doc, io.BytesIO(dados), saida)
+    return saida.getvalue()
+
+
+def conteudo(dados):
+    with zipfile.ZipFile(io.BytesIO(dados)) as pacote:
+        return {nome: pacote.read(nome) for nome in pacote.namelist()}
+
+
+def melhor_tempo(gravar, doc, dados):
+    melhor = None
+    for _ in range(REPETICOES):
+        inicio = time.perf_counter()
+        gravar(doc, dados)
+        decorrido = time.perf_counter() - inicio
+        melhor = decorrido if melhor is None else min(melhor, decorrido)
+    return melhor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--paginas", type=int, default=50)
+    parser.add_argument("--figuras", type=int, default=30)
+    parser.add_argument("--kb", type=int, default=500, help="tamanho de cada figura")
+    args = parser.parse_args()
+
+    dados = documento_com_figuras(args.paginas, args.figuras, args.kb)
+    doc = Document(io.BytesIO(dados))
+    app.formatar_documento(doc)
+
+    iguais = conteudo(com_python_docx(doc, dados)) == conteudo(com_pacote(doc, dados))
+    print(f"{args.paginas} páginas, {args.figuras} figuras: {len(dados) / 1024 / 1024:.1f} MB")
+    for nome, gravar in (("doc.save", com_python_docx), ("salvar_pacote", com_pacote)):
+        print(f"     {nome:<16}{melhor_tempo(gravar, doc, dados) * 1000:>10.1f} ms")
+    if not iguais:
+        print("  ❌ os pacotes gravados têm conteúdo diferente")
+    return 0 if iguais else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
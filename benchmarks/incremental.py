@@ -0,0 +1,99 @@
+"""
+Reformatação incremental: tempo do formatar_documento numa nova versão do
+mesmo trabalho, do zero e com a memória de parágrafos da versão anterior.
+
+Formata um trabalho sintético (``benchmarks.gerador``) guardando a memória,
+depois gera versões em que uma fração dos parágrafos do corpo foi editada e
+formata cada uma das duas formas. O .docx das duas tem que ser o mesmo
+(membro a membro); o script termina com código 1 se algum divergir.
+
+    python -m benchmarks.incremental
+    python -m benchmarks.incremental --paginas 200 --repeticoes 5
+"""
+import argparse
+import hashlib
+import io
+import random
+import sys
+import time
+import zipfile
+
+from docx import Document
+
+from benchmarks.gerador import gerar_documento
+
+import app
+from incremental import MemoriaParagrafos
+
+REPETICOES = 3
+FRACOES = (0.0, 0.01, 0.05, 0.2, 0.5, 1.0)
+
+
+def nova_versao(dados, fracao, semente=0):
+    """Acrescenta uma frase a ``fracao`` dos parágrafos com texto."""
+    doc = Document(io.BytesIO(dados))
+    paragrafos = [p for p in doc.paragraphs if p.runs and p.text.strip()]
+    for p in random.Random(semente).sample(paragrafos, round(len(paragrafos) * fracao)):
+        p.runs[-1].text += " Trecho revisado."
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def conteudo(formatado):
+    with zipfile.ZipFile(io.BytesIO(formatado)) as pacote:
+        return {nome: hashlib.sha256(pacote.read(nome)).digest() for nome in pacote.namelist()}
+
+
+def formatar(dados, memoria_anterior=None):
+    """(segundos, .docx formatado, memória) de uma formatação."""
+    doc = Document(io.BytesIO(dados))
+    memoria = MemoriaParagrafos.de_bytes(memoria_anterior) if memoria_anterior is not None else MemoriaParagrafos()
+    inicio = time.perf_counter()
+    app.formatar_documento(doc, memoria=memoria)
+    decorrido = time.perf_counter() - inicio
+    return decorrido, app.documento_em_bytes(doc, io.BytesIO(dados)), memoria
+
+
+def melhor(dados, memoria_anterior, repeticoes):
+    execucoes = [formatar(dados, memoria_anterior) for _ in range(repeticoes)]
+    return min(execucoes, key=lambda execucao: execucao[0])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--paginas", type=int, default=100)
+    parser.add_argument("--repeticoes", type=int, default=REPETICOES)
+    args = parser.parse_args()
+
+    original = gerar_documento(args.paginas)
+    divergentes = []
+
+    _, _, memoria = formatar(original)
+    anterior = memoria.em_bytes()
+
+    linhas = []
+    for fracao in FRACOES:
+        versao = nova_versao(original, fracao)
+        completo, esperado, _ = melhor(versao, None, args.repeticoes)
+        incremental, obtido, usada = melhor(versao, anterior, args.repeticoes)
+        if conteudo(obtido) != conteudo(esperado):
+            divergentes.append(fracao)
+        linhas.append((fracao, completo, incremental, usada))
+
+    print(f"{args.paginas} páginas, memória da versão anterior: {len(anterior) / 1024:.0f} KiB")
+    print(f"     {'editados':>9}{'do zero':>11}{'incremental':>13}{'reaproveitados':>16}{'formatados':>12}")
+    for fracao, completo, incremental, usada in linhas:
+        print(f"     {fracao:>9.0%}{completo * 1000:>9.0f}ms{incremental * 1000:>11.0f}ms"
+              f"{usada.reaproveitados:>16}{usada.processados:>12}")
+
+    if divergentes:
+        print("  ❌ .docx diferente do formatado do zero com "
+              + ", ".join(f"{fracao:.0%}" for fracao in divergentes) + " editados")
+        return 1
+    print("  ✅ mesmo .docx que a formatação do zero")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+"""
+Custo de inicialização por worker: sem e com o preload do wsgi.py.
+
+Sem preload, cada worker importa o app sozinho e paga a primeira
+requisição fria. Com preload, o mestre importa e aquece tudo uma vez e os
+workers nascem por fork. O script mede os dois casos (processos novos para
+o import frio; ``os.fork`` depois de importar o ``wsgi`` para o preload),
+mostra a memória privada e compartilhada de cada worker e os módulos mais
+caros do import (``python -X importtime``).
+
+    python -m benchmarks.inicializacao
+    python -m benchmarks.inicializacao --workers 4 --repeticoes 5
+"""
+import argparse
+import io
+import json
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.gerador import gerar_documento
+
+REPETICOES = 3
+WORKERS = 4
+MODULOS_MAIS_CAROS = 10
+
+# Roda num processo novo: tempos do import, do precarregar() e da primeira
+# requisição sem aquecimento
+_FRIO = """
+import io, json, sys, time
+from benchmarks.inicializacao import _memoria_kb
+inicio = time.perf_counter()
+import app
+importado = time.perf_counter()
+cliente = app.criar_app().test_client()
+dados = open(sys.argv[1], "rb").read()
+antes = time.perf_counter()
+cliente.post("/formatar", data={"arquivo": (io.BytesIO(dados), "tcc.docx")}).get_data()
+fim = time.perf_counter()
+app.precarregar()
+aquecido = time.perf_counter()
+print(json.dumps({
+    "import": importado - inicio,
+    "primeira": fim - antes,
+    "precarregar": aquecido - fim,
+    "memoria": _memoria_kb(),
+}))
+"""
+
+
+def _memoria_kb():
+    """(privada, compartilhada) do processo atual, em KB."""
+    campos = {}
+    with open("/proc/self/smaps_rollup") as arquivo:
+        for linha in arquivo:
+            partes = linha.split()
+            if len(partes) == 3 and partes[2] == "kB":
+                campos[partes[0].rstrip(":")] = int(partes[1])
+    privada = campos.get("Private_Clean", 0) + campos.get("Private_Dirty", 0)
+    compartilhada = campos.get("Shared_Clean", 0) + campos.get("Shared_Dirty", 0)
+    return privada, compartilhada
+
+
+def medir_frio(caminho, repeticoes):
+    medidas = []
+    for _ in range(repeticoes):
+        saida = subprocess.run(
+            [sys.executable, "-c", _FRIO, caminho], capture_output=True, text=True, check=True,
+        ).stdout
+        medidas.append(json.loads(saida.splitlines()[-1]))
+    return {chave: min(m[chave] for m in medidas) for chave in medidas[0]}
+
+
+def medir_preload(dados, workers):
+    """
+    Forka ``workers`` processos depois do preload; cada um atende uma
+    requisição. Os workers ficam vivos até o último terminar (a memória
+    compartilhada é dividida entre eles) mas rodam um de cada vez, para
+    que o tempo não dependa do número de CPUs.
+    """
+    import wsgi
+
+    resultados = []
+    filhos = []
+    for _ in range(workers):
+        leitura, escrita = os.pipe()
+        liberar_leitura, liberar = os.pipe()
+        sys.stdout.flush()
+        pid = os.fork()
+        if pid == 0:
+            os.close(leitura)
+            os.close(liberar)
+            for _, anterior in filhos:
+                os.close(anterior)
+            sys.stdout = io.StringIO()
+            cliente = wsgi.app.test_client()
+            inicio = time.perf_counter()
+            cliente.post("/formatar", data={"arquivo": (io.BytesIO(dados), "tcc.docx")}).get_data()
+            decorrido = time.perf_counter() - inicio
+            os.write(escrita, json.dumps([decorrido, *_memoria_kb()]).encode())
+            os.close(escrita)
+            os.read(liberar_leitura, 1)  # espera o fim da medição
+            os._exit(0)
+        os.close(escrita)
+        os.close(liberar_leitura)
+        with os.fdopen(leitura) as canal:
+            resultados.append(json.loads(canal.read()))
+        filhos.append((pid, liberar))
+
+    for pid, liberar in filhos:
+        os.close(liberar)
+        os.waitpid(pid, 0)
+    return resultados
+
+
+def modulos_mais_caros(quantidade):
+    """(módulo, ms acumulados) dos imports mais caros de ``import app``."""
+    saida = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"],
+        capture_output=True, text=True, check=True,
+    ).stderr
+    custos = []
+    for linha in saida.splitlines():
+        if not linha.startswith("import time:") or "cumulative" in linha:
+            continue
+        _, acumulado, modulo = linha[len("import time:"):].split("|")
+        custos.append((modulo.strip(), int(acumulado) / 1000))
+    custos.sort(key=lambda item: -item[1])
+    return custos[:quantidade]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--paginas", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument("--repeticoes", type=int, default=REPETICOES)
+    args = parser.parse_args()
+
+    # Sem o cache: a requisição tem que passar pelo pipeline em todo worker
+    os.environ["ABNT_CACHE"] = "desligado"
+    dados = gerar_documento(args.paginas)
+    caminho = f"/tmp/inicializacao-{os.getpid()}.docx"
+    with open(caminho, "wb") as arquivo:
+        arquivo.write(dados)
+    try:
+        frio = medir_frio(caminho, args.repeticoes)
+    finally:
+        os.remove(caminho)
+
+    print(f"Sem preload (cada worker, processo novo; {args.paginas} páginas)")
+    print(f"     import app                {frio['import'] * 1000:>9.1f} ms")
+    print(f"     primeira requisição       {frio['primeira'] * 1000:>9.1f} ms")
+    print(f"     precarregar() depois dela {frio['precarregar'] * 1000:>9.1f} ms")
+    privada, compartilhada = frio["memoria"]
+    print(f"     memória privada {privada / 1024:>6.1f} MB   compartilhada {compartilhada / 1024:>6.1f} MB")
+
+    print(f"\nCom preload ({args.workers} workers por fork)")
+    for i, (decorrido, privada, compartilhada) in enumerate(medir_preload(dados, args.workers), 1):
+        print(f"     worker {i}: primeira requisição {decorrido * 1000:>7.1f} ms   "
+              f"memória privada {privada / 1024:>6.1f} MB   compartilhada {compartilhada / 1024:>6.1f} MB")
+
+    print("\nImports mais caros (acumulado)")
+    for modulo, ms in modulos_mais_caros(MODULOS_MAIS_CAROS):
+        print(f"     {modulo:<40}{ms:>9.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+"""
+Detecção da lista de REFERÊNCIAS (``referencias``) contra a forma linha a
+linha, em bibliografias de 500 entradas ou mais.
+
+Monta um trabalho sintético (``benchmarks.gerador``) e troca a lista de
+referências dele por ``gerar_bibliografia(entradas)``. Mede:
+
+- o título: a busca do início para o fim (como era) contra
+  ``localizar_titulo``, que procura do fim para o começo;
+- a pontuação: a de ``formatar_referencias`` como era (linha a linha:
+  texto sem acentos, termos um a um e quatro expressões) contra
+  ``referencias.pontuar`` (a pontuação de todas as linhas de uma vez) e
+  ``referencias.entradas`` (só as referências, parando cedo).
+
+Os pontos e as linhas escolhidas têm que ser os mesmos; o script termina
+com código 1 se algum divergir.
+
+    python -m benchmarks.referencias
+    python -m benchmarks.referencias --entradas 500 5000 --paginas 200
+"""
+import argparse
+import io
+import sys
+import time
+
+from docx import Document
+
+from benchmarks.gerador import gerar_bibliografia, gerar_documento
+
+import referencias
+from normalizacao import sem_acentos
+from padroes import (
+    padrao_ano, padrao_local_editora, padrao_referencias, padrao_sigla_inicial, padrao_sobrenome_inicial,
+)
+
+ENTRADAS = (500, 2000)
+REPETICOES = 5
+
+
+def titulo_do_inicio(textos):
+    for i, texto in enumerate(textos):
+        if texto and padrao_referencias.match(" ".join(texto.upper().split())):
+            return i
+    return None
+
+
+def pontos_por_linha(t):
+    """A pontuação como era feita no formatar_referencias."""
+    tn = sem_acentos(t).strip().lower()
+    pontos = 0
+    if "http" in tn or "doi" in tn:
+        pontos += 2
+    if padrao_ano.search(t):
+        pontos += 1
+    if any(k in tn for k in referencias.TERMOS_REFERENCIA):
+        pontos += 1
+    if padrao_local_editora.search(t):
+        pontos += 1
+    if padrao_sigla_inicial.match(t):
+        pontos += 1
+    if padrao_sobrenome_inicial.match(t):
+        pontos += 1
+    return pontos
+
+
+def melhor(funcao, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        sem_acentos.cache_clear()
+        inicio = time.perf_counter()
+        resultado = funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos), resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--entradas", type=int, nargs="+", default=list(ENTRADAS))
+    parser.add_argument("--paginas", type=int, default=100)
+    parser.add_argument("--repeticoes", type=int, default=REPETICOES)
+    args = parser.parse_args()
+
+    doc = Document(io.BytesIO(gerar_documento(args.paginas)))
+    corpo = [p.text.strip() for p in doc.paragraphs]
+    corpo = corpo[:corpo.index("REFERÊNCIAS") + 1]
+
+    divergentes = []
+    for total in args.entradas:
+        lista = gerar_bibliografia(total)
+        textos = corpo + lista
+
+        tempo_inicio, esperado = melhor(lambda: titulo_do_inicio(textos), args.repeticoes)
+        tempo_fim, obtido = melhor(lambda: referencias.localizar_titulo(textos), args.repeticoes)
+        if obtido != esperado:
+            divergentes.append(f"título ({total})")
+
+        tempo_linha, esperados = melhor(lambda: [pontos_por_linha(t) for t in lista], args.repeticoes)
+        tempo_lote, pontos = melhor(lambda: referencias.pontuar(lista), args.repeticoes)
+        tempo_entradas, escolhidas = melhor(lambda: referencias.entradas(lista), args.repeticoes)
+        if pontos != esperados:
+            divergentes.append(f"pontos ({total})")
+        if escolhidas != [i for i, t in enumerate(lista) if len(t) >= 8 and esperados[i] >= 2]:
+            divergentes.append(f"entradas ({total})")
+
+        print(f"{total:>5} entradas ({len(escolhidas)} referências) depois de {len(corpo)} parágrafos")
+        print(f"     {'título, do início':<28}{tempo_inicio * 1000:>10.2f} ms")
+        print(f"     {'título, do fim':<28}{tempo_fim * 1000:>10.2f} ms")
+        print(f"     {'pontos, como era':<28}{tempo_linha * 1000:>10.2f} ms")
+        print(f"     {'pontuar':<28}{tempo_lote * 1000:>10.2f} ms")
+        print(f"     {'entradas':<28}{tempo_entradas * 1000:>10.2f} ms")
+
+    if divergentes:
+        print("  ❌ resultados diferentes: " + ", ".join(divergentes))
+        return 1
+    print("  ✅ mesmos pontos e mesmas referências")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
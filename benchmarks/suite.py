@@ -0,0 +1,153 @@
+"""
+Suíte de desempenho das etapas do formatador sobre documentos sintéticos.
+
+Gera trabalhos de 5 a 500 páginas com ``benchmarks.gerador`` (mesma
+semente → mesmos arquivos), mede cada etapa isolada e a chamada completa ao
+/formatar pelo test client do Flask, e grava os tempos (melhor de N
+repetições) em JSON. Com ``--comparar`` os tempos são confrontados com uma
+execução anterior: o script termina com código 1 quando alguma medida fica
+mais lenta que ``--limite`` (padrão 20%).
+
+    python -m benchmarks.suite --saida base.json
+    python -m benchmarks.suite --comparar base.json --saida atual.json
+"""
+import argparse
+import datetime
+import gc
+import io
+import json
+import platform
+import sys
+import time
+
+from docx import Document
+
+from benchmarks.gerador import gerar_documento
+
+import app
+from documento import obter_snapshot
+
+PAGINAS = (5, 50, 150, 500)
+REPETICOES = 5
+LIMITE_REGRESSAO = 0.20
+
+# Diferenças menores que isso (em segundos) são ruído de medição
+DIFERENCA_MINIMA = 0.005
+
+ETAPAS = (
+    ("detectar_fonte_principal", app.detectar_fonte_principal),
+    ("formatar_capa", app.formatar_capa),
+    ("formatar_paragrafos_abnt", app.formatar_paragrafos_abnt),
+    ("formatar_referencias", app.formatar_referencias),
+    ("fonte_preta", app.fonte_preta),
+)
+
+
+def _cronometrar(funcao):
+    gc.collect()
+    gc.disable()
+    try:
+        inicio = time.perf_counter()
+        funcao()
+        return time.perf_counter() - inicio
+    finally:
+        gc.enable()
+
+
+def medir_etapa(dados, etapa, repeticoes):
+    """Melhor tempo da etapa, sempre sobre uma cópia nova do documento."""
+    melhor = None
+    for _ in range(repeticoes):
+        doc = Document(io.BytesIO(dados))
+        obter_snapshot(doc)  # como no /formatar, o snapshot já existe quando a etapa roda
+        decorrido = _cronometrar(lambda: etapa(doc))
+        melhor = decorrido if melhor is None else min(melhor, decorrido)
+    return melhor
+
+
+def medir_formatar(dados, repeticoes):
+    """Melhor tempo da requisição completa ao /formatar (sem o cache de resultados)."""
+    cliente = app.criar_app().test_client()
+    melhor = None
+    for _ in range(repeticoes):
+        def requisitar():
+            resposta = cliente.post("/formatar", data={"arquivo": (io.BytesIO(dados), "tcc.docx")})
+            assert resposta.status_code == 200, resposta.status_code
+            resposta.get_data()
+        decorrido = _cronometrar(requisitar)
+        melhor = decorrido if melhor is None else min(melhor, decorrido)
+    return melhor
+
+
+def executar(paginas, semente, repeticoes):
+    resultados = {}
+    for total in paginas:
+        dados = gerar_documento(total, semente)
+        tempos = {nome: medir_etapa(dados, etapa, repeticoes) for nome, etapa in ETAPAS}
+        tempos["/formatar"] = medir_formatar(dados, repeticoes)
+        resultados[str(total)] = tempos
+
+        print(f"{total:>4} páginas ({len(dados) // 1024} KB)")
+        for nome, segundos in tempos.items():
+            print(f"     {nome:<28}{segundos * 1000:>10.1f} ms")
+    return resultados
+
+
+def comparar(atual, anterior, limite):
+    """Lista de (páginas, etapa, antes, depois) que pioraram mais que ``limite``."""
+    regressoes = []
+    for paginas, tempos in atual.items():
+        for nome, depois in tempos.items():
+            antes = anterior.get(paginas, {}).get(nome)
+            if antes is None:
+                continue
+            if depois - antes > DIFERENCA_MINIMA and depois > antes * (1 + limite):
+                regressoes.append((paginas, nome, antes, depois))
+    return regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--paginas", type=int, nargs="+", default=list(PAGINAS))
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--repeticoes", type=int, default=REPETICOES)
+    parser.add_argument("--saida", help="grava os resultados neste JSON")
+    parser.add_argument("--comparar", help="JSON de uma execução anterior")
+    parser.add_argument("--limite", type=float, default=LIMITE_REGRESSAO,
+                        help="piora tolerada (0.20 = 20%%)")
+    args = parser.parse_args()
+
+    # Sem cache: cada requisição repetida precisa passar pelo pipeline
+    app.cache_resultados = None
+
+    resultados = executar(args.paginas, args.semente, args.repeticoes)
+
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as arquivo:
+            json.dump({
+                "gerado_em": datetime.datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "semente": args.semente,
+                "repeticoes": args.repeticoes,
+                "resultados": resultados,
+            }, arquivo, ensure_ascii=False, indent=2)
+
+    if not args.comparar:
+        return 0
+
+    with open(args.comparar, encoding="utf-8") as arquivo:
+        anterior = json.load(arquivo)
+    if anterior.get("semente") != args.semente:
+        print(f"⚠️ Semente diferente da execução anterior ({anterior.get('semente')}): documentos não são os mesmos.")
+
+    regressoes = comparar(resultados, anterior["resultados"], args.limite)
+    for paginas, nome, antes, depois in regressoes:
+        print(f"❌ {nome} ({paginas} páginas): {antes * 1000:.1f} ms → {depois * 1000:.1f} ms "
+              f"(+{(depois / antes - 1) * 100:.0f}%)")
+    if not regressoes:
+        print(f"✅ Nenhuma medida piorou mais que {args.limite:.0%}.")
+    return 1 if regressoes else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
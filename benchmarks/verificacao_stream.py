@@ -0,0 +1,101 @@
+"""
+Tempo e pico de memória do /verificar: python-docx vs. leitura em streaming.
+
+Para cada tamanho de documento sintético (``benchmarks.gerador``) mede o
+melhor tempo das duas implementações e o quanto a memória residente do
+processo cresce durante uma verificação (cada medida roda num processo
+novo, para que o pico de uma não esconda o da outra). Confere também que
+os dois relatórios são iguais.
+
+    python -m benchmarks.verificacao_stream
+    python -m benchmarks.verificacao_stream --paginas 50 500 2000
+"""
+import argparse
+import io
+import multiprocessing
+import sys
+import time
+
+from docx import Document
+
+from benchmarks.gerador import gerar_documento
+
+import app
+from verificacao import verificar_stream
+
+PAGINAS = (50, 500, 2000)
+REPETICOES = 3
+
+
+def via_python_docx(dados):
+    return app.verificar_documento(Document(io.BytesIO(dados)))
+
+
+def via_stream(dados):
+    return verificar_stream(io.BytesIO(dados))
+
+
+def _status_kb(campo):
+    with open("/proc/self/status") as arquivo:
+        for linha in arquivo:
+            if linha.startswith(campo + ":"):
+                return int(linha.split()[1])
+    raise KeyError(campo)
+
+
+def _medir_memoria(funcao, dados, fila):
+    # zera o pico (VmHWM) do processo: o ru_maxrss sobrevive ao exec e
+    # traria o pico do processo pai
+    with open("/proc/self/clear_refs", "w") as arquivo:
+        arquivo.write("5")
+    inicio = _status_kb("VmRSS")
+    funcao(dados)
+    fila.put(_status_kb("VmHWM") - inicio)
+
+
+def pico_memoria_kb(funcao, dados):
+    # processo novo (spawn): um fork herdaria o heap já inflado pelo gerador
+    contexto = multiprocessing.get_context("spawn")
+    fila = contexto.Queue()
+    processo = contexto.Process(target=_medir_memoria, args=(funcao, dados, fila))
+    processo.start()
+    resultado = fila.get()
+    processo.join()
+    return resultado
+
+
+def melhor_tempo(funcao, dados):
+    melhor = None
+    for _ in range(REPETICOES):
+        inicio = time.perf_counter()
+        funcao(dados)
+        decorrido = time.perf_counter() - inicio
+        melhor = decorrido if melhor is None else min(melhor, decorrido)
+    return melhor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--paginas", type=int, nargs="+", default=list(PAGINAS))
+    args = parser.parse_args()
+
+    print(f"{'páginas':>8}{'KB':>8}   {'python-docx':>22}   {'streaming':>22}")
+    iguais = True
+    for paginas in args.paginas:
+        dados = gerar_documento(paginas)
+        if via_python_docx(dados) != via_stream(dados):
+            iguais = False
+            print(f"  ❌ relatórios diferentes com {paginas} páginas")
+
+        colunas = []
+        for funcao in (via_python_docx, via_stream):
+            tempo = melhor_tempo(funcao, dados)
+            memoria = pico_memoria_kb(funcao, dados)
+            colunas.append(f"{tempo * 1000:>9.1f} ms {memoria / 1024:>7.1f} MB")
+        print(f"{paginas:>8}{len(dados) // 1024:>8}   {colunas[0]:>22}   {colunas[1]:>22}")
+
+    return 0 if iguais else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+"""
+Todos os parágrafos do documento numa única passada: corpo, células de
+tabela (inclusive tabelas aninhadas), cabeçalhos, rodapés e notas.
+
+``doc.paragraphs`` só enxerga o corpo e ``doc.tables`` só as tabelas do
+corpo; cabeçalhos, rodapés e notas ficam em outras partes do pacote. Em vez
+de uma varredura para cada lugar, ``iterar_blocos`` desce o XML uma vez e
+diz, para cada ``w:p``, em que tipo de contêiner ele está. Os mesmos
+contêineres valem para o XML lido em streaming (``conteiner``), de modo que
+o /verificar com e sem python-docx examina os mesmos parágrafos.
+
+Caixas de texto e controles de conteúdo ficam de fora, como no python-docx.
+"""
+from docx.opc.constants import CONTENT_TYPE as CT, RELATIONSHIP_TYPE as RT
+from docx.opc.part import PartFactory, XmlPart
+from docx.oxml.ns import qn
+
+# Tipos de contêiner
+CORPO = "corpo"
+TABELA = "tabela"
+CABECALHO = "cabecalho"
+RODAPE = "rodape"
+NOTA_RODAPE = "nota_rodape"
+NOTA_FIM = "nota_fim"
+
+W_P = qn("w:p")
+W_TBL = qn("w:tbl")
+W_TR = qn("w:tr")
+W_TC = qn("w:tc")
+W_BODY = qn("w:body")
+W_HDR = qn("w:hdr")
+W_FTR = qn("w:ftr")
+W_FOOTNOTE = qn("w:footnote")
+W_ENDNOTE = qn("w:endnote")
+W_TYPE = qn("w:type")
+
+# Elemento que contém os parágrafos → tipo de contêiner
+_RAIZES = {
+    W_BODY: CORPO,
+    W_HDR: CABECALHO,
+    W_FTR: RODAPE,
+    W_FOOTNOTE: NOTA_RODAPE,
+    W_ENDNOTE: NOTA_FIM,
+}
+
+# Partes relacionadas ao documento principal, na ordem em que são percorridas
+PARTES_SECUNDARIAS = {
+    RT.HEADER: CABECALHO,
+    RT.FOOTER: RODAPE,
+    RT.FOOTNOTES: NOTA_RODAPE,
+    RT.ENDNOTES: NOTA_FIM,
+}
+
+# O python-docx carrega notas de rodapé e de fim como bytes opacos; como
+# XmlPart elas viram XML editável (e são regravadas a partir dele)
+PartFactory.part_type_for.setdefault(CT.WML_FOOTNOTES, XmlPart)
+PartFactory.part_type_for.setdefault(CT.WML_ENDNOTES, XmlPart)
+
+
+def iterar_blocos(doc):
+    """
+    ``(conteiner, w:p)`` de cada parágrafo do documento: o corpo na ordem
+    do documento (as células de uma tabela no ponto em que ela aparece),
+    depois cabeçalhos, rodapés, notas de rodapé e notas de fim.
+    """
+    yield from _blocos(doc.element.body, CORPO)
+
+    vistas = set()
+    for rel in doc.part.rels.values():
+        tipo = PARTES_SECUNDARIAS.get(rel.reltype)
+        if tipo is None or rel.is_external or id(rel.target_part) in vistas:
+            continue
+        parte = rel.target_part
+        vistas.add(id(parte))
+        elemento = getattr(parte, "element", None)
+        if elemento is None:
+            continue  # parte que o python-docx não carregou como XML
+        if tipo in (NOTA_RODAPE, NOTA_FIM):
+            for nota in elemento:
+                if nota.tag in (W_FOOTNOTE, W_ENDNOTE) and nota.get(W_TYPE) is None:
+                    yield from _blocos(nota, tipo)
+        else:
+            yield from _blocos(elemento, tipo)
+
+
+def _blocos(elemento, tipo):
+    for filho in elemento:
+        if filho.tag == W_P:
+            yield tipo, filho
+        elif filho.tag == W_TBL:
+            for tr in filho.iterchildren(W_TR):
+                for tc in tr.iterchildren(W_TC):
+                    yield from _blocos(tc, TABELA)
+
+
+def conteiner(p):
+    """
+    Tipo do contêiner de ``p`` (um ``w:p`` de qualquer parte), ou None
+    quando ``iterar_blocos`` não o visitaria (caixa de texto, separador de
+    notas...). Só sobe pelos ancestrais: serve para o XML em streaming.
+    """
+    pai = p.getparent()
+    em_tabela = False
+    while pai is not None and pai.tag == W_TC:
+        tr = pai.getparent()
+        tbl = tr.getparent() if tr is not None and tr.tag == W_TR else None
+        if tbl is None or tbl.tag != W_TBL:
+            return None
+        pai = tbl.getparent()
+        em_tabela = True
+
+    if pai is None:
+        return None
+    tipo = _RAIZES.get(pai.tag)
+    if tipo in (NOTA_RODAPE, NOTA_FIM) and pai.get(W_TYPE) is not None:
+        return None
+    if tipo is not None and em_tabela:
+        return TABELA
+    return tipo
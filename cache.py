@@ -0,0 +1,248 @@
+import hashlib
+import os
+import stat
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+
+def sha256_stream(stream, tamanho_bloco=1024 * 1024):
+    """
+    SHA-256 do arquivo enviado. O stream é lido em blocos (não precisa
+    caber na memória) e volta para o início.
+    """
+    stream.seek(0)
+    sha = hashlib.sha256()
+    for bloco in iter(lambda: stream.read(tamanho_bloco), b""):
+        sha.update(bloco)
+    stream.seek(0)
+    return sha.hexdigest()
+
+
+class DiretorioInseguro(Exception):
+    """O diretório do cache em disco pertence a outro usuário."""
+
+
+def preparar_diretorio(diretorio):
+    """
+    Cria ``diretorio`` só para o usuário do servidor (0o700) e confere que
+    ele (e o link, se for um) pertence a esse usuário: o que estiver lá
+    dentro volta como resposta e é lido de volta nos documentos. Um
+    diretório do próprio usuário aberto para os outros é fechado.
+    """
+    os.makedirs(diretorio, mode=0o700, exist_ok=True)
+    if not hasattr(os, "getuid"):
+        return  # sem dono de arquivo no estilo POSIX (Windows)
+
+    usuario = os.getuid()
+    if os.lstat(diretorio).st_uid != usuario or os.stat(diretorio).st_uid != usuario:
+        raise DiretorioInseguro(f"{diretorio} pertence a outro usuário")
+    if stat.S_IMODE(os.stat(diretorio).st_mode) & 0o077:
+        os.chmod(diretorio, 0o700)
+
+
+class CacheMemoria:
+    """
+    Cache LRU dentro do processo, limitado pelo total de bytes guardados e
+    com validade (TTL) por item.
+    """
+
+    def __init__(self, max_bytes=256 * 1024 * 1024, validade=3600):
+        self.max_bytes = max_bytes
+        self.validade = validade
+        self.total_bytes = 0
+        self._itens = OrderedDict()
+        self._trava = threading.Lock()
+
+    def obter(self, chave):
+        with self._trava:
+            item = self._itens.get(chave)
+            if item is None:
+                return None
+
+            expira, dados = item
+            if expira <= time.monotonic():
+                self._remover(chave)
+                return None
+
+            self._itens.move_to_end(chave)
+            return dados
+
+    def guardar(self, chave, dados):
+        if len(dados) > self.max_bytes:
+            return
+
+        with self._trava:
+            if chave in self._itens:
+                self._remover(chave)
+
+            self._itens[chave] = (time.monotonic() + self.validade, dados)
+            self.total_bytes += len(dados)
+
+            while self.total_bytes > self.max_bytes:
+                self._remover(next(iter(self._itens)))
+
+    def _remover(self, chave):
+        _, dados = self._itens.pop(chave)
+        self.total_bytes -= len(dados)
+
+
+class CacheDisco:
+    """
+    Cache num diretório compartilhado, para que todos os workers do
+    gunicorn aproveitem o mesmo resultado.
+
+    Cada item é um arquivo gravado de forma atômica (arquivo temporário +
+    ``os.replace``). O horário de modificação marca o último uso: serve
+    para a validade (TTL) e para descartar os menos usados quando o
+    diretório passa de ``max_bytes``.
+    """
+
+    def __init__(self, diretorio, max_bytes=1024 * 1024 * 1024, validade=24 * 3600):
+        self.diretorio = diretorio
+        self.max_bytes = max_bytes
+        self.validade = validade
+        preparar_diretorio(diretorio)
+
+    def _caminho(self, chave):
+        return os.path.join(self.diretorio, chave + ".bin")
+
+    def obter(self, chave):
+        caminho = self._caminho(chave)
+        try:
+            if os.path.getmtime(caminho) + self.validade <= time.time():
+                os.remove(caminho)
+                return None
+
+            with open(caminho, "rb") as arquivo:
+                dados = arquivo.read()
+            os.utime(caminho)  # marca como usado recentemente
+            return dados
+        except FileNotFoundError:
+            return None
+
+    def guardar(self, chave, dados):
+        if len(dados) > self.max_bytes:
+            return
+
+        descritor, temporario = tempfile.mkstemp(dir=self.diretorio, suffix=".tmp")
+        try:
+            with os.fdopen(descritor, "wb") as arquivo:
+                arquivo.write(dados)
+            os.replace(temporario, self._caminho(chave))
+        except BaseException:
+            try:
+                os.remove(temporario)
+            except FileNotFoundError:
+                pass
+            raise
+
+        self._descartar_excedente()
+
+    def _descartar_excedente(self):
+        itens = []
+        total = 0
+        agora = time.time()
+
+        for entrada in os.scandir(self.diretorio):
+            if not entrada.name.endswith(".bin"):
+                continue
+            try:
+                info = entrada.stat()
+            except FileNotFoundError:
+                continue  # outro worker já removeu
+
+            if info.st_mtime + self.validade <= agora:
+                self._apagar(entrada.path)
+                continue
+
+            itens.append((info.st_mtime, info.st_size, entrada.path))
+            total += info.st_size
+
+        # Remove os menos usados até caber no limite
+        for _, tamanho, caminho in sorted(itens):
+            if total <= self.max_bytes:
+                break
+            self._apagar(caminho)
+            total -= tamanho
+
+    @staticmethod
+    def _apagar(caminho):
+        try:
+            os.remove(caminho)
+        except FileNotFoundError:
+            pass
+
+
+class CacheResultados:
+    """
+    Fachada usada pelas rotas: monta as chaves, delega ao backend e conta
+    acertos e falhas.
+
+    A chave junta o tipo do resultado ("formatado", "relatorio"...), a
+    versão do pipeline e o SHA-256 do arquivo enviado; mudar a versão
+    invalida tudo o que foi gerado pelas regras antigas.
+    """
+
+    def __init__(self, backend, versao):
+        self.backend = backend
+        self.versao = versao
+        self.acertos = 0
+        self.falhas = 0
+        self._trava = threading.Lock()
+
+    def chave(self, tipo, sha):
+        return f"{tipo}-{self.versao}-{sha}"
+
+    def obter(self, chave):
+        dados = self.backend.obter(chave)
+        with self._trava:
+            if dados is None:
+                self.falhas += 1
+            else:
+                self.acertos += 1
+        return dados
+
+    def guardar(self, chave, dados):
+        self.backend.guardar(chave, dados)
+
+    def estatisticas(self):
+        with self._trava:
+            return {
+                "backend": type(self.backend).__name__,
+                "acertos": self.acertos,
+                "falhas": self.falhas,
+            }
+
+
+def diretorio_cache():
+    """
+    Diretório do cache em disco (ABNT_CACHE_DIR); o estado compartilhado
+    entre workers fica em subdiretórios dele. O padrão, no diretório
+    temporário, leva o uid no nome e é conferido por preparar_diretorio.
+    """
+    padrao = f"abnt-cache-{os.getuid()}" if hasattr(os, "getuid") else "abnt-cache"
+    return os.environ.get("ABNT_CACHE_DIR", os.path.join(tempfile.gettempdir(), padrao))
+
+
+def criar_cache(versao):
+    """
+    Monta o cache a partir das variáveis de ambiente:
+    - ABNT_CACHE: "memoria" (padrão), "disco" ou "desligado"
+    - ABNT_CACHE_DIR: diretório do cache em disco (do usuário do servidor,
+      fechado para os outros; ver preparar_diretorio)
+    - ABNT_CACHE_MAX_MB: limite total em MB
+    - ABNT_CACHE_TTL: validade dos itens em segundos
+    """
+    tipo = os.environ.get("ABNT_CACHE", "memoria")
+    if tipo == "desligado":
+        return None
+
+    max_bytes = int(os.environ.get("ABNT_CACHE_MAX_MB", "256")) * 1024 * 1024
+    validade = int(os.environ.get("ABNT_CACHE_TTL", "3600"))
+
+    if tipo == "disco":
+        return CacheResultados(CacheDisco(diretorio_cache(), max_bytes, validade), versao)
+
+    return CacheResultados(CacheMemoria(max_bytes, validade), versao)
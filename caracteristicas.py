@@ -0,0 +1,127 @@
+"""
+Matriz de características dos parágrafos: uma linha por parágrafo, uma
+coluna (``array``) por característica — número de palavras, RESUMO,
+numeração de seção... — calculada uma única vez e consultada por todas as
+etapas.
+
+Cada classificador recalculava as suas características linha a linha, com
+uma chamada de função Python por parágrafo e por teste. Aqui uma coluna é
+montada de uma vez, encadeando funções sobre a lista de textos com ``map``
+(``str.split``, ``padrao.match``, ``bool``... rodam sem voltar ao
+interpretador a cada linha), e só quando alguma etapa a pede. As decisões
+(título numerado, o que o corpo pula) viram máscaras: um
+``bytes`` com 0 ou 1 por linha, combinadas com ``e`` / ``ou`` / ``nao`` em
+operações inteiras sobre a máscara toda.
+
+O NumPy não é dependência do projeto; ``array`` e ``bytes`` da biblioteca
+padrão bastam para colunas de inteiros e booleanos.
+"""
+from array import array
+from itertools import compress
+
+from padroes import padrao_numerado, padrao_resumo_ou_titulo, padrao_resumo_secao
+
+# Colunas conhecidas: nome → (typecode do array, funções aplicadas em
+# sequência ao texto do parágrafo)
+COLUNAS = {
+    "palavras": ("I", (str.split, len)),
+    "resumo": ("B", (padrao_resumo_secao.match, bool)),
+    "numerado": ("B", (padrao_numerado.match, bool)),
+    "resumo_ou_titulo": ("B", (padrao_resumo_ou_titulo.match, bool)),
+}
+
+
+def _aplicar(funcoes, textos):
+    valores = textos
+    for funcao in funcoes:
+        valores = map(funcao, valores)
+    return valores
+
+
+class MatrizParagrafos:
+    """
+    Colunas de características sobre ``textos`` (a lista é lida, não
+    copiada: o snapshot avisa por ``atualizar`` / ``inserir`` quando ela
+    muda, e as colunas já montadas são refeitas só naquela linha).
+    """
+
+    def __init__(self, textos):
+        self.textos = textos
+        self._colunas = {}
+
+    def __len__(self):
+        return len(self.textos)
+
+    def coluna(self, nome):
+        """A coluna ``nome`` de COLUNAS (um ``array``), montada na primeira consulta."""
+        valores = self._colunas.get(nome)
+        if valores is None:
+            tipo, funcoes = COLUNAS[nome]
+            valores = self._colunas[nome] = array(tipo, _aplicar(funcoes, self.textos))
+        return valores
+
+    def mascara(self, nome):
+        """Coluna booleana como máscara (``bytes`` de 0 e 1)."""
+        return self.coluna(nome).tobytes()
+
+    def faixa(self, nome, minimo=None, maximo=None):
+        """Máscara das linhas em que a coluna numérica ``nome`` fica entre ``minimo`` e ``maximo``."""
+        valores = self.coluna(nome)
+        mascara = uns(len(valores))
+        if minimo is not None:
+            mascara = e(mascara, bytes(map(minimo.__le__, valores)))
+        if maximo is not None:
+            mascara = e(mascara, bytes(map(maximo.__ge__, valores)))
+        return mascara
+
+    # ---------------------------------------------------------
+    # Sincronia com o snapshot
+    # ---------------------------------------------------------
+    def atualizar(self, idx):
+        for nome, valores in self._colunas.items():
+            valores[idx] = next(_aplicar(COLUNAS[nome][1], (self.textos[idx],)))
+
+    def inserir(self, idx):
+        for nome, valores in self._colunas.items():
+            valores.insert(idx, next(_aplicar(COLUNAS[nome][1], (self.textos[idx],))))
+
+
+# -----------------------------------------------------------
+# Operações sobre máscaras
+# -----------------------------------------------------------
+# Cada máscara vira um inteiro (um byte por linha) e a operação é uma só
+# sobre o inteiro inteiro, em vez de um laço por linha.
+def _inteiro(mascara):
+    return int.from_bytes(mascara, "big")
+
+
+def _mascara(valor, tamanho):
+    return valor.to_bytes(tamanho, "big")
+
+
+def uns(tamanho):
+    return b"\x01" * tamanho
+
+
+def e(primeira, *outras):
+    valor = _inteiro(primeira)
+    for outra in outras:
+        valor &= _inteiro(outra)
+    return _mascara(valor, len(primeira))
+
+
+def ou(primeira, *outras):
+    valor = _inteiro(primeira)
+    for outra in outras:
+        valor |= _inteiro(outra)
+    return _mascara(valor, len(primeira))
+
+
+def nao(mascara):
+    return _mascara(_inteiro(mascara) ^ _inteiro(uns(len(mascara))), len(mascara))
+
+
+def indices(mascara, inicio=0, fim=None):
+    """Índices das linhas marcadas entre ``inicio`` e ``fim``."""
+    fim = len(mascara) if fim is None else fim
+    return compress(range(inicio, fim), mascara[inicio:fim])
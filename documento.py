@@ -0,0 +1,156 @@
+from caracteristicas import MatrizParagrafos
+from padroes import padrao_keywords, padrao_palavras_chave, padrao_resumo_secao
+from referencias import localizar_titulo
+
+
+class SnapshotDocumento:
+    """
+    Retrato indexado do corpo do documento, montado com UMA leitura de
+    ``doc.paragraphs`` e compartilhado por todas as etapas do /formatar.
+
+    Guarda:
+    - os objetos Paragraph (na ordem do documento)
+    - o texto bruto e o texto sem espaços nas pontas
+    - a matriz de características dos textos (caracteristicas.py), com as
+      colunas montadas sob demanda
+    - as âncoras (resumo, abstract, palavras-chave, keywords, referências)
+    - os limites das seções (capa, pré-textual, corpo, referências)
+
+    As etapas que alteram o texto de um parágrafo devem avisar o snapshot
+    (``atualizar`` / ``definir_texto``) e as que criam parágrafos devem usar
+    ``inserir_antes`` / ``adicionar``, para que os índices continuem válidos.
+    """
+
+    def __init__(self, doc):
+        self.doc = doc
+        self.paragrafos = doc.paragraphs
+        self.brutos = [p.text for p in self.paragrafos]
+        self.textos = [t.strip() for t in self.brutos]
+        self._ancoras = None
+        self._matriz = None
+
+    def __len__(self):
+        return len(self.paragrafos)
+
+    # ---------------------------------------------------------
+    # TEXTO
+    # ---------------------------------------------------------
+    def caracteristicas(self):
+        """MatrizParagrafos sobre os textos (sem espaços nas pontas)."""
+        if self._matriz is None:
+            self._matriz = MatrizParagrafos(self.textos)
+        return self._matriz
+
+    def atualizar(self, idx):
+        """Relê o texto do parágrafo ``idx`` depois de uma etapa alterá-lo."""
+        bruto = self.paragrafos[idx].text
+        self.brutos[idx] = bruto
+        self.textos[idx] = bruto.strip()
+        self._ancoras = None
+        if self._matriz is not None:
+            self._matriz.atualizar(idx)
+
+    def definir_texto(self, idx, texto):
+        self.paragrafos[idx].text = texto
+        self.atualizar(idx)
+
+    # ---------------------------------------------------------
+    # INSERÇÃO DE PARÁGRAFOS
+    # ---------------------------------------------------------
+    def inserir_antes(self, idx, texto=""):
+        """Insere um parágrafo antes de ``idx`` e desloca os índices seguintes."""
+        novo = self.paragrafos[idx].insert_paragraph_before(texto)
+        self._inserir(idx, novo)
+        return novo
+
+    def adicionar(self, texto=""):
+        novo = self.doc.add_paragraph(texto)
+        self._inserir(len(self.paragrafos), novo)
+        return novo
+
+    def _inserir(self, idx, paragrafo):
+        bruto = paragrafo.text
+        self.paragrafos.insert(idx, paragrafo)
+        self.brutos.insert(idx, bruto)
+        self.textos.insert(idx, bruto.strip())
+        self._ancoras = None
+        if self._matriz is not None:
+            self._matriz.inserir(idx)
+
+    # ---------------------------------------------------------
+    # ÂNCORAS E SEÇÕES
+    # ---------------------------------------------------------
+    def ancora(self, nome):
+        """
+        Índice do primeiro parágrafo que abre o bloco ``nome`` (ou None):
+        - "resumo": texto começa com "resumo" (usado pela capa e pelo RESUMO)
+        - "resumo_secao": "resumo" como palavra inteira (usado pelo corpo)
+        - "abstract", "palavras_chave", "keywords"
+        - "referencias": o ÚLTIMO título REFERÊNCIAS, procurado a partir do
+          fim (referencias.localizar_titulo)
+        """
+        if self._ancoras is None:
+            self._ancoras = self._localizar_ancoras()
+        return self._ancoras[nome]
+
+    def _localizar_ancoras(self):
+        ancoras = dict.fromkeys(
+            ("resumo", "resumo_secao", "abstract", "palavras_chave", "keywords", "referencias")
+        )
+
+        for i, texto in enumerate(self.textos):
+            if not texto:
+                continue
+
+            minusculo = texto.lower()
+
+            if ancoras["resumo"] is None and minusculo.startswith("resumo"):
+                ancoras["resumo"] = i
+            if ancoras["resumo_secao"] is None and padrao_resumo_secao.match(texto):
+                ancoras["resumo_secao"] = i
+            if ancoras["abstract"] is None and minusculo.startswith("abstract"):
+                ancoras["abstract"] = i
+            if ancoras["palavras_chave"] is None and padrao_palavras_chave.match(texto):
+                ancoras["palavras_chave"] = i
+            if ancoras["keywords"] is None and padrao_keywords.match(texto):
+                ancoras["keywords"] = i
+
+        ancoras["referencias"] = localizar_titulo(self.textos)
+        return ancoras
+
+    def secoes(self):
+        """
+        Limites (início, fim) de cada seção, no formato de ``range``:
+        - "capa": do início até o RESUMO
+        - "pre_textual": do RESUMO até a linha RESUMO da seção ("resumo"
+          como palavra inteira), inclusive
+        - "corpo": depois da linha RESUMO da seção até o título de REFERÊNCIAS
+        - "referencias": depois do título de REFERÊNCIAS até o fim
+        """
+        total = len(self.paragrafos)
+        resumo = self.ancora("resumo")
+        resumo_secao = self.ancora("resumo_secao")
+        referencias = self.ancora("referencias")
+
+        fim_capa = resumo if resumo is not None else total
+        inicio_corpo = resumo_secao + 1 if resumo_secao is not None else total
+        fim_corpo = referencias if referencias is not None else total
+
+        return {
+            "capa": (0, fim_capa),
+            "pre_textual": (fim_capa, inicio_corpo),
+            "corpo": (inicio_corpo, max(inicio_corpo, fim_corpo)),
+            "referencias": (referencias + 1, total) if referencias is not None else (total, total),
+        }
+
+
+def obter_snapshot(doc):
+    """
+    Devolve o snapshot do documento, criando-o na primeira chamada.
+    Todas as etapas do pipeline compartilham o mesmo objeto.
+    """
+    snap = getattr(doc, "_snapshot_abnt", None)
+    if snap is None:
+        snap = SnapshotDocumento(doc)
+        doc._snapshot_abnt = snap
+    return snap
@@ -0,0 +1,97 @@
+"""
+Validação do arquivo enviado antes da leitura cara (python-docx, lxml).
+
+Três barreiras, da mais barata para a mais cara:
+
+1. o tamanho da requisição (``MAX_CONTENT_LENGTH`` do Flask): com
+   Content-Length acima do limite o corpo nem é lido; sem ele, a leitura
+   para quando passa do limite;
+2. a assinatura: um .docx é um ZIP e começa com ``PK\\x03\\x04`` —
+   ``ArquivoEnviado`` recusa o envio no primeiro bloco recebido, sem
+   esperar o resto do arquivo;
+3. o diretório central do ZIP (``conferir_docx``): número de membros,
+   tamanho total descompactado e um documento principal do Word. O
+   ``zipfile`` nunca entrega mais bytes de um membro do que o tamanho
+   declarado no diretório central, então somar os tamanhos declarados
+   basta para limitar o que o python-docx vai descompactar (zip bomb).
+"""
+import tempfile
+import zipfile
+import zlib
+
+from lxml import etree
+
+from verificacao import VerificacaoIndisponivel, parte_principal
+
+ASSINATURA_ZIP = b"PK\x03\x04"
+
+# Limites de um .docx depois de descompactado
+MAX_DESCOMPACTADO = 256 * 1024 * 1024
+MAX_MEMBROS = 10000
+
+# Tamanho máximo do [Content_Types].xml e do _rels/.rels, lidos aqui
+MAX_XML_PACOTE = 1024 * 1024
+
+
+class EnvioRecusado(Exception):
+    """Arquivo recusado antes do processamento; vira ``{"erro": ...}`` com ``status``."""
+
+    def __init__(self, mensagem, status=400):
+        super().__init__(mensagem)
+        self.mensagem = mensagem
+        self.status = status
+
+
+class ArquivoEnviado(tempfile.SpooledTemporaryFile):
+    """
+    Destino do upload (em memória até ``max_size``, depois em disco) que
+    confere a assinatura do ZIP já nos primeiros bytes gravados.
+    """
+
+    def __init__(self, max_size):
+        super().__init__(max_size=max_size, mode="rb+")
+        self._inicio = b""
+
+    def write(self, dados):
+        if len(self._inicio) < len(ASSINATURA_ZIP):
+            self._inicio += bytes(dados[:len(ASSINATURA_ZIP) - len(self._inicio)])
+            if not ASSINATURA_ZIP.startswith(self._inicio):
+                raise EnvioRecusado("O arquivo enviado não é um .docx", 415)
+        return super().write(dados)
+
+
+def conferir_docx(stream, max_descompactado=MAX_DESCOMPACTADO, max_membros=MAX_MEMBROS):
+    """
+    Confere, pelo diretório central, que ``stream`` é um .docx que cabe nos
+    limites; levanta EnvioRecusado se não for. Só lê o diretório central,
+    o [Content_Types].xml e o _rels/.rels. Devolve o stream ao início.
+    """
+    stream.seek(0)
+    if stream.read(len(ASSINATURA_ZIP)) != ASSINATURA_ZIP:
+        stream.seek(0)
+        raise EnvioRecusado("O arquivo enviado não é um .docx", 415)
+
+    try:
+        with zipfile.ZipFile(stream) as pacote:
+            membros = pacote.infolist()
+            if len(membros) > max_membros:
+                raise EnvioRecusado(f"O .docx tem mais de {max_membros} partes", 413)
+
+            total = sum(membro.file_size for membro in membros)
+            if total > max_descompactado:
+                raise EnvioRecusado(
+                    f"O .docx descompactado passa do limite de {max_descompactado // (1024 * 1024)} MB", 413
+                )
+
+            for nome in ("[Content_Types].xml", "_rels/.rels"):
+                if pacote.getinfo(nome).file_size > MAX_XML_PACOTE:
+                    raise EnvioRecusado("O arquivo enviado não é um .docx válido")
+            parte_principal(pacote, etree.fromstring(pacote.read("[Content_Types].xml")))
+    except EnvioRecusado:
+        raise
+    except (zipfile.BadZipFile, zlib.error, RuntimeError, NotImplementedError, KeyError,
+            etree.XMLSyntaxError, VerificacaoIndisponivel) as erro:
+        # ZIP corrompido, criptografado ou sem as partes de um documento do Word
+        raise EnvioRecusado("O arquivo enviado não é um .docx válido") from erro
+    finally:
+        stream.seek(0)
@@ -0,0 +1,41 @@
+"""
+Configuração do gunicorn (``gunicorn -c gunicorn.conf.py``).
+
+Variáveis de ambiente:
+- ABNT_BIND: endereço (padrão 0.0.0.0:8000)
+- ABNT_WORKERS: processos (padrão: número de CPUs)
+- ABNT_THREADS: threads por processo (padrão 4)
+- ABNT_TIMEOUT: segundos até um worker travado ser reiniciado (padrão 120)
+
+O /formatar, o /verificar e o /processar rodam o pipeline (CPU) na thread
+da requisição, e o GIL deixa cada worker em um núcleo só: é o número de
+workers que acompanha as CPUs. As threads só ajudam enquanto a requisição
+espera rede ou disco; mais threads não fazem esse trabalho render mais.
+
+Cada worker tem o seu pool, o seu cache em memória, os seus downloads do
+/processar e as suas /tarefas. Com mais de um worker, este arquivo:
+- divide as CPUs entre os pools (ABNT_TAREFAS_WORKERS), em vez de cada
+  worker abrir um processo por CPU;
+- guarda cache, downloads e tarefas em ABNT_CACHE_DIR (ABNT_CACHE=disco,
+  ABNT_ESTADO=disco), para que o acompanhamento e o download feitos pelo
+  script.js funcionem em qualquer worker.
+Valores já definidos no ambiente são respeitados.
+"""
+import multiprocessing
+import os
+
+wsgi_app = "wsgi:app"
+bind = os.environ.get("ABNT_BIND", "0.0.0.0:8000")
+
+workers = int(os.environ.get("ABNT_WORKERS", "0")) or multiprocessing.cpu_count()
+threads = int(os.environ.get("ABNT_THREADS", "4"))
+worker_class = "gthread"
+timeout = int(os.environ.get("ABNT_TIMEOUT", "120"))
+
+if workers > 1:
+    os.environ.setdefault("ABNT_TAREFAS_WORKERS", str(max(1, multiprocessing.cpu_count() // workers)))
+    os.environ.setdefault("ABNT_CACHE", "disco")
+    os.environ.setdefault("ABNT_ESTADO", "disco")
+
+# Importa e aquece o app uma vez no mestre, antes do fork (ver wsgi.py)
+preload_app = True
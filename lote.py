@@ -0,0 +1,153 @@
+import io
+import json
+import os
+import posixpath
+import zipfile
+import zlib
+
+from envio import EnvioRecusado, conferir_docx
+
+
+# Entradas de ZIP que não são documentos do usuário: lixo do macOS e
+# arquivos ocultos ou de lock do Word
+PASTAS_IGNORADAS = ("__MACOSX",)
+PREFIXOS_IGNORADOS = ("~$", ".")
+
+
+def nome_seguro(nome):
+    """Caminho relativo sem ``..`` nem barra inicial, para usar dentro do ZIP de saída."""
+    partes = [
+        parte for parte in posixpath.normpath(nome.replace("\\", "/")).split("/")
+        if parte not in ("", ".", "..")
+    ]
+    return "/".join(partes) or "documento.docx"
+
+
+def eh_docx(nome):
+    partes = nome.replace("\\", "/").split("/")
+    return (
+        nome.lower().endswith(".docx")
+        and not partes[-1].startswith(PREFIXOS_IGNORADOS)
+        and not any(parte in PASTAS_IGNORADAS for parte in partes)
+    )
+
+
+def motivo_recusa(dados):
+    """Por que ``dados`` não vai para o pool (``envio.conferir_docx``), ou None."""
+    try:
+        conferir_docx(io.BytesIO(dados))
+    except EnvioRecusado as erro:
+        return erro.mensagem
+    return None
+
+
+def entradas_do_zip(stream, max_documento):
+    """
+    Percorre os membros do ZIP enviado e devolve (nome, dados, motivo).
+    Os dados são lidos um a um, conforme o lote avança; entradas que não
+    vão para o pool vêm com ``dados`` None e o ``motivo``. Membros que
+    declaram mais de ``max_documento`` bytes nem são extraídos.
+    """
+    with zipfile.ZipFile(stream) as pacote:
+        for info in pacote.infolist():
+            if info.is_dir():
+                continue
+            if not eh_docx(info.filename):
+                yield info.filename, None, "Não é um arquivo .docx"
+                continue
+            if info.file_size > max_documento:
+                yield info.filename, None, f"Maior que o limite de {max_documento // (1024 * 1024)} MB"
+                continue
+            try:
+                dados = pacote.read(info)
+            except (zipfile.BadZipFile, zlib.error, RuntimeError, NotImplementedError) as erro:
+                # membro corrompido, criptografado ou com compressão desconhecida
+                yield info.filename, None, f"Não foi possível extrair do ZIP: {erro}"
+                continue
+            motivo = motivo_recusa(dados)
+            yield info.filename, None if motivo else dados, motivo
+
+
+def entradas_dos_arquivos(arquivos):
+    """
+    Mesmo formato de ``entradas_do_zip`` para um multipart com vários
+    arquivos, recebidos como pares (nome, stream).
+    """
+    for nome, stream in arquivos:
+        nome = nome or "documento.docx"
+        if not eh_docx(nome):
+            yield nome, None, "Não é um arquivo .docx"
+            continue
+        stream.seek(0)
+        dados = stream.read()
+        motivo = motivo_recusa(dados)
+        yield nome, None if motivo else dados, motivo
+
+
+def assumir_stream(arquivo):
+    """
+    Tira o stream do upload das mãos da requisição. O Werkzeug fecha os
+    arquivos enviados quando a view retorna, mas a resposta em streaming
+    continua lendo depois disso; quem assume o stream passa a fechá-lo.
+    """
+    stream = arquivo.stream
+    arquivo.stream = io.BytesIO()
+    return stream
+
+
+class NomesUnicos:
+    """Evita que dois documentos com o mesmo nome se sobrescrevam no ZIP de saída."""
+
+    def __init__(self):
+        self._usados = set()
+
+    def __call__(self, nome):
+        nome = nome_seguro(nome)
+        raiz, extensao = os.path.splitext(nome)
+        candidato, contador = nome, 2
+        while candidato in self._usados:
+            candidato = f"{raiz} ({contador}){extensao}"
+            contador += 1
+        self._usados.add(candidato)
+        return candidato
+
+
+class _Buffer(io.RawIOBase):
+    """Destino do zipfile que só acumula os bytes até a próxima ``drenar``."""
+
+    def __init__(self):
+        self._partes = []
+
+    def writable(self):
+        return True
+
+    def write(self, dados):
+        self._partes.append(bytes(dados))
+        return len(dados)
+
+    def drenar(self):
+        dados = b"".join(self._partes)
+        self._partes.clear()
+        return dados
+
+
+class ZipStream:
+    """
+    Monta o ZIP de saída aos poucos: cada ``adicionar`` devolve os bytes
+    já prontos para enviar ao cliente, sem manter o ZIP inteiro na memória.
+    """
+
+    def __init__(self):
+        self._buffer = _Buffer()
+        self._zip = zipfile.ZipFile(self._buffer, "w", compression=zipfile.ZIP_DEFLATED)
+
+    def adicionar(self, nome, dados):
+        self._zip.writestr(nome, dados)
+        return self._buffer.drenar()
+
+    def adicionar_json(self, nome, conteudo):
+        return self.adicionar(nome, json.dumps(conteudo, ensure_ascii=False, indent=2).encode("utf-8"))
+
+    def fechar(self):
+        self._zip.close()
+        return self._buffer.drenar()
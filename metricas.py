@@ -0,0 +1,161 @@
+import io
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+
+# Limites (em segundos) dos histogramas do /metrics
+FAIXAS_TEMPO = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+class MedicaoPipeline:
+    """
+    Tempos de cada etapa de um único documento: tempo de relógio e
+    parágrafos no documento ao fim da etapa.
+
+    A memória não é medida por etapa: com o worker gthread outras threads
+    alocam ao mesmo tempo, e tanto ``sys.getallocatedblocks`` quanto o
+    tracemalloc contam o processo inteiro. Ela aparece em /metrics como
+    ``abnt_blocos_alocados``, do processo.
+    """
+
+    def __init__(self):
+        self.etapas = []
+
+    @contextmanager
+    def etapa(self, nome, contar_paragrafos=None):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            duracao = time.perf_counter() - inicio
+            self.etapas.append({
+                "etapa": nome,
+                "segundos": duracao,
+                "paragrafos": contar_paragrafos() if contar_paragrafos else None,
+            })
+
+    def total(self):
+        return sum(etapa["segundos"] for etapa in self.etapas)
+
+    def resumo(self):
+        """Tempos em segundos por etapa, para JSON (ex.: manifest do /lote)."""
+        return {etapa["etapa"]: round(etapa["segundos"], 4) for etapa in self.etapas}
+
+    def server_timing(self):
+        """Valor do cabeçalho ``Server-Timing`` (durações em milissegundos)."""
+        partes = [f'{etapa["etapa"]};dur={etapa["segundos"] * 1000:.2f}' for etapa in self.etapas]
+        partes.append(f"pipeline;dur={self.total() * 1000:.2f}")
+        return ", ".join(partes)
+
+
+class _Histograma:
+    def __init__(self):
+        self.faixas = [0] * len(FAIXAS_TEMPO)
+        self.soma = 0.0
+        self.contagem = 0
+
+    def observar(self, valor):
+        self.soma += valor
+        self.contagem += 1
+        for i, limite in enumerate(FAIXAS_TEMPO):
+            if valor <= limite:
+                self.faixas[i] += 1
+
+
+class RegistroMetricas:
+    """
+    Acumula as medições do processo e as exporta no formato texto do
+    Prometheus. Cada worker do gunicorn tem o seu registro; o Prometheus
+    soma as séries de cada worker.
+    """
+
+    def __init__(self):
+        self._trava = threading.Lock()
+        self._etapas = defaultdict(_Histograma)
+        self._paragrafos = defaultdict(lambda: [0, 0])
+        self._requisicoes = defaultdict(int)
+        self._duracao_rotas = defaultdict(_Histograma)
+
+    def registrar_medicao(self, medicao):
+        with self._trava:
+            for etapa in medicao.etapas:
+                nome = etapa["etapa"]
+                self._etapas[nome].observar(etapa["segundos"])
+                if etapa["paragrafos"] is not None:
+                    self._paragrafos[nome][0] += etapa["paragrafos"]
+                    self._paragrafos[nome][1] += 1
+
+    def registrar_requisicao(self, rota, status, segundos):
+        with self._trava:
+            self._requisicoes[(rota, status)] += 1
+            self._duracao_rotas[rota].observar(segundos)
+
+    def exportar(self):
+        linhas = []
+        with self._trava:
+            linhas += _histograma(
+                "abnt_etapa_segundos", "Tempo de cada etapa do pipeline.", "etapa", self._etapas)
+            linhas += _resumo(
+                "abnt_etapa_paragrafos", "Parágrafos no documento ao fim da etapa.", "etapa", self._paragrafos)
+
+            linhas.append("# HELP abnt_blocos_alocados Blocos de memória alocados pelo interpretador (processo inteiro).")
+            linhas.append("# TYPE abnt_blocos_alocados gauge")
+            linhas.append(f"abnt_blocos_alocados {sys.getallocatedblocks()}")
+
+            linhas.append("# HELP abnt_requisicoes_total Requisições atendidas por rota e status.")
+            linhas.append("# TYPE abnt_requisicoes_total counter")
+            for (rota, status), total in sorted(self._requisicoes.items()):
+                linhas.append(f'abnt_requisicoes_total{{rota="{rota}",status="{status}"}} {total}')
+
+            linhas += _histograma(
+                "abnt_requisicao_segundos", "Tempo total da requisição por rota.", "rota", self._duracao_rotas)
+        return "\n".join(linhas) + "\n"
+
+
+def _histograma(nome, ajuda, rotulo, series):
+    linhas = [f"# HELP {nome} {ajuda}", f"# TYPE {nome} histogram"]
+    for valor, hist in sorted(series.items()):
+        for limite, quantidade in zip(FAIXAS_TEMPO, hist.faixas):
+            linhas.append(f'{nome}_bucket{{{rotulo}="{valor}",le="{limite}"}} {quantidade}')
+        linhas.append(f'{nome}_bucket{{{rotulo}="{valor}",le="+Inf"}} {hist.contagem}')
+        linhas.append(f'{nome}_sum{{{rotulo}="{valor}"}} {hist.soma:.6f}')
+        linhas.append(f'{nome}_count{{{rotulo}="{valor}"}} {hist.contagem}')
+    return linhas
+
+
+def _resumo(nome, ajuda, rotulo, series):
+    linhas = [f"# HELP {nome} {ajuda}", f"# TYPE {nome} summary"]
+    for valor, (soma, contagem) in sorted(series.items()):
+        linhas.append(f'{nome}_sum{{{rotulo}="{valor}"}} {soma}')
+        linhas.append(f'{nome}_count{{{rotulo}="{valor}"}} {contagem}')
+    return linhas
+
+
+def relatorio_perfil(perfil, formato="texto", limite=60):
+    """
+    Saída do cProfile de uma requisição: texto ordenado pelo tempo
+    acumulado, ou o dump binário do pstats (``formato="prof"``), que abre
+    no snakeviz / ``python -m pstats``.
+    """
+    import marshal
+    import pstats
+
+    if formato == "prof":
+        # mesmo formato de pstats.Stats.dump_stats, sem passar pelo disco
+        return marshal.dumps(pstats.Stats(perfil).stats)
+
+    saida = io.StringIO()
+    pstats.Stats(perfil, stream=saida).sort_stats("cumulative").print_stats(limite)
+    return saida.getvalue().encode("utf-8")
+
+
+def novo_perfil():
+    # cProfile/pstats só são importados com ABNT_PERFIL=1 e ?perfil
+    import cProfile
+
+    perfil = cProfile.Profile()
+    perfil.enable()
+    return perfil
@@ -0,0 +1,61 @@
+"""
+Formas normalizadas do texto (sem acentos, minúsculo e sem acentos...),
+calculadas uma vez por texto e compartilhadas pelos classificadores.
+
+A mesma linha passa por vários testes seguidos — ``classificar_texto`` tira
+os acentos dela e chama ``eh_cidade`` e ``eh_curso``, que tiravam de novo —
+e tirar acentos é um laço em Python sobre cada caractere. Aqui cada forma
+fica num cache LRU limitado, indexado pelo próprio texto: o segundo teste
+sobre a mesma linha (e a mesma linha num reenvio do documento) só faz a
+consulta ao dicionário.
+"""
+import re
+import unicodedata
+from functools import lru_cache
+
+from Condicoes import remover_acentos
+
+# Entradas de cada cache: cobre a capa e os parágrafos de um trabalho
+# grande sem guardar o texto de documentos antigos para sempre
+TAMANHO_CACHE = 4096
+
+
+@lru_cache(maxsize=TAMANHO_CACHE)
+def sem_acentos(texto):
+    """``remover_acentos(texto)``, com cache."""
+    return remover_acentos(texto)
+
+
+@lru_cache(maxsize=TAMANHO_CACHE)
+def dobrado(texto):
+    """Sem espaços nas pontas, minúsculo e sem acentos (cidades, cursos, capa)."""
+    return sem_acentos(texto.strip().lower())
+
+
+# Separa os textos de sem_acentos_em_bloco (o XML não admite NUL, então
+# nunca aparece no texto de um parágrafo)
+SEPARADOR = "\x00"
+
+
+def sem_acentos_em_bloco(textos):
+    """
+    ``[sem_acentos(t) for t in textos]`` numa passada só, para uma coluna
+    inteira: os textos viram um bloco, decomposto (NFD) e sem as marcas
+    combinantes por uma expressão regular — sem o laço por caractere do
+    ``remover_acentos`` nem o cache, pequeno para um documento inteiro.
+    """
+    bloco = SEPARADOR.join(textos)
+    if bloco.count(SEPARADOR) != max(len(textos) - 1, 0):
+        return [remover_acentos(t) for t in textos]
+    if bloco.isascii():
+        return list(textos)
+    bloco = unicodedata.normalize("NFD", bloco)
+    marcas = "".join(re.escape(c) for c in set(bloco) if unicodedata.category(c) == "Mn")
+    if marcas:
+        bloco = re.sub(f"[{marcas}]", "", bloco)
+    return bloco.split(SEPARADOR)
+
+
+def estatisticas():
+    """Acertos e faltas de cada cache (``functools._CacheInfo``)."""
+    return {"sem_acentos": sem_acentos.cache_info(), "dobrado": dobrado.cache_info()}
@@ -0,0 +1,196 @@
+"""
+Gravação do .docx formatado reaproveitando o pacote original.
+
+O ``doc.save`` do python-docx recomprime todas as partes do pacote, inclusive
+as imagens de ``word/media`` — num trabalho cheio de figuras isso é quase
+todo o tempo (e a memória) da gravação, embora o formatador só mexa no
+``document.xml`` e no ``styles.xml``. Aqui o pacote é escrito com as mesmas
+partes, na mesma ordem, mas cada membro cujo conteúdo não mudou (mesmo CRC-32
+e tamanho do membro original) é copiado comprimido, byte a byte, do zip
+enviado; só as partes alteradas passam pelo deflate.
+
+O zip é escrito sem ZIP64: os uploads ficam muito abaixo de 4 GB.
+"""
+import struct
+import time
+import zipfile
+import zlib
+
+from docx.opc.packuri import CONTENT_TYPES_URI, PACKAGE_URI
+from docx.opc.pkgwriter import _ContentTypesItem
+
+# Cópias do original são lidas em blocos deste tamanho
+TAMANHO_BLOCO = 1024 * 1024
+
+_LIMITE_ZIP32 = 0xFFFFFFFF
+_FLAG_UTF8 = 0x800
+
+_CABECALHO_LOCAL = struct.Struct("<4s5H3L2H")
+_CABECALHO_CENTRAL = struct.Struct("<4s6H3L5H2L")
+_FIM_DIRETORIO = struct.Struct("<4s4H2LH")
+
+
+class _Membro:
+    __slots__ = ("nome", "metodo", "versao", "crc", "comprimido", "tamanho", "data", "hora", "posicao")
+
+    def __init__(self, nome, metodo, versao, crc, comprimido, tamanho, data, hora, posicao):
+        self.nome = nome
+        self.metodo = metodo
+        self.versao = versao
+        self.crc = crc
+        self.comprimido = comprimido
+        self.tamanho = tamanho
+        self.data = data
+        self.hora = hora
+        self.posicao = posicao
+
+
+def _data_hora_dos(data_hora):
+    ano, mes, dia, hora, minuto, segundo = data_hora[:6]
+    return (ano - 1980) << 9 | mes << 5 | dia, hora << 11 | minuto << 5 | segundo // 2
+
+
+class EscritorPacote:
+    """
+    Escreve um zip em ``destino`` (qualquer arquivo com ``write``), copiando
+    sem recomprimir os membros que continuam iguais aos de ``original``.
+
+    Tem a mesma interface do ``PhysPkgWriter`` do python-docx
+    (``write(pack_uri, blob)`` / ``close()``).
+    """
+
+    def __init__(self, destino, original):
+        self._destino = destino
+        self._original = original
+        self._zip_original = zipfile.ZipFile(original)
+        self._membros = []
+        self._posicao = 0
+        self._data, self._hora = _data_hora_dos(time.localtime())
+        self.copiados = 0
+        self.comprimidos = 0
+
+    # ---------------------------------------------------------
+    # API do PhysPkgWriter
+    # ---------------------------------------------------------
+    def write(self, pack_uri, blob):
+        nome = pack_uri.membername
+        info = self._reaproveitavel(nome, blob)
+        if info is not None:
+            self._copiar(nome, info)
+        else:
+            self._comprimir(nome, blob)
+
+    def close(self):
+        inicio = self._posicao
+        for membro in self._membros:
+            nome = membro.nome.encode("utf-8")
+            self._escrever(_CABECALHO_CENTRAL.pack(
+                b"PK\x01\x02", 20, membro.versao, self._flags(membro.nome), membro.metodo,
+                membro.hora, membro.data, membro.crc, membro.comprimido, membro.tamanho,
+                len(nome), 0, 0, 0, 0, 0, membro.posicao,
+            ))
+            self._escrever(nome)
+
+        tamanho = self._posicao - inicio
+        if len(self._membros) > 0xFFFF or self._posicao > _LIMITE_ZIP32:
+            raise zipfile.LargeZipFile("o pacote precisaria de ZIP64")
+        self._escrever(_FIM_DIRETORIO.pack(
+            b"PK\x05\x06", 0, 0, len(self._membros), len(self._membros), tamanho, inicio, 0,
+        ))
+        self._zip_original.close()
+
+    # ---------------------------------------------------------
+    # MEMBROS
+    # ---------------------------------------------------------
+    def _reaproveitavel(self, nome, blob):
+        """ZipInfo do membro original com o mesmo conteúdo, ou None."""
+        try:
+            info = self._zip_original.getinfo(nome)
+        except KeyError:
+            return None
+        if info.flag_bits & 0x1 or info.file_size != len(blob):
+            return None  # criptografado ou de outro tamanho
+        if info.CRC != zlib.crc32(blob):
+            return None
+        return info
+
+    def _copiar(self, nome, info):
+        # posição dos dados: depois do cabeçalho local (cujo "extra" pode
+        # ser diferente do que está no diretório central)
+        self._original.seek(info.header_offset)
+        cabecalho = self._original.read(_CABECALHO_LOCAL.size)
+        campos = _CABECALHO_LOCAL.unpack(cabecalho)
+        if campos[0] != b"PK\x03\x04":
+            raise zipfile.BadZipFile(f"cabeçalho local inválido: {nome}")
+        self._original.seek(campos[-2] + campos[-1], 1)
+
+        data, hora = _data_hora_dos(info.date_time)
+        self._cabecalho_local(_Membro(
+            nome, info.compress_type, max(info.extract_version, 20), info.CRC,
+            info.compress_size, info.file_size, data, hora, self._posicao,
+        ))
+
+        restante = info.compress_size
+        while restante:
+            bloco = self._original.read(min(restante, TAMANHO_BLOCO))
+            if not bloco:
+                raise zipfile.BadZipFile(f"membro truncado: {nome}")
+            self._escrever(bloco)
+            restante -= len(bloco)
+        self.copiados += 1
+
+    def _comprimir(self, nome, blob):
+        compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+        comprimido = compressor.compress(blob) + compressor.flush()
+        self._cabecalho_local(_Membro(
+            nome, zipfile.ZIP_DEFLATED, 20, zlib.crc32(blob),
+            len(comprimido), len(blob), self._data, self._hora, self._posicao,
+        ))
+        self._escrever(comprimido)
+        self.comprimidos += 1
+
+    def _cabecalho_local(self, membro):
+        if membro.comprimido > _LIMITE_ZIP32 or membro.tamanho > _LIMITE_ZIP32:
+            raise zipfile.LargeZipFile(f"membro grande demais sem ZIP64: {membro.nome}")
+        nome = membro.nome.encode("utf-8")
+        self._escrever(_CABECALHO_LOCAL.pack(
+            b"PK\x03\x04", membro.versao, self._flags(membro.nome), membro.metodo,
+            membro.hora, membro.data, membro.crc, membro.comprimido, membro.tamanho,
+            len(nome), 0,
+        ))
+        self._escrever(nome)
+        self._membros.append(membro)
+
+    @staticmethod
+    def _flags(nome):
+        return 0 if nome.isascii() else _FLAG_UTF8
+
+    def _escrever(self, dados):
+        self._destino.write(dados)
+        self._posicao += len(dados)
+
+
+def salvar_pacote(doc, original, destino):
+    """
+    Equivale a ``doc.save(destino)``, com ``original`` (o .docx de onde
+    ``doc`` foi aberto, num arquivo com ``seek``) como fonte dos membros
+    que não mudaram. Devolve o escritor (contagem de membros copiados e
+    comprimidos).
+    """
+    pacote = doc.part.package
+    partes = list(pacote.parts)
+    for parte in partes:
+        parte.before_marshal()
+
+    original.seek(0)
+    escritor = EscritorPacote(destino, original)
+
+    # Mesma ordem do PackageWriter do python-docx
+    escritor.write(CONTENT_TYPES_URI, _ContentTypesItem.from_parts(partes).blob)
+    escritor.write(PACKAGE_URI.rels_uri, pacote.rels.xml)
+    for parte in partes:
+        escritor.write(parte.partname, parte.blob)
+        if len(parte.rels):
+            escritor.write(parte.partname.rels_uri, parte.rels.xml)
+    escritor.close()
+    return escritor
@@ -0,0 +1,81 @@
+"""
+Expressões regulares dos classificadores e das etapas de formatação,
+compiladas uma única vez na importação.
+
+``re.match("padrão", texto)`` passa pelo cache interno do ``re`` a cada
+chamada, e os classificadores rodam para cada linha do documento. Onde a
+mesma linha passava por vários testes seguidos, eles viraram uma única
+alternância com grupos nomeados: o grupo que casou diz qual teste passou.
+"""
+import re
+
+# -----------------------------------------------------------
+# 🔹 Âncoras do documento (documento.SnapshotDocumento)
+# -----------------------------------------------------------
+padrao_resumo_secao = re.compile(r"^\s*resumo\b", re.IGNORECASE)
+padrao_palavras_chave = re.compile(r"^(palavras[\s\-]*chaves?|palavraschave)(:)?\s*(.*)$", re.IGNORECASE)
+padrao_keywords = re.compile(r"^(keywords?)(:)?\s*(.*)$", re.IGNORECASE)
+padrao_referencias = re.compile(r"^\s*\d*\.?\s*REFERÊNCIAS\s*$", re.IGNORECASE)
+
+# Separador dos termos de "Palavras-chave:" / "Keywords:"
+padrao_separador_termos = re.compile(r"[;,.\n]\s*")
+
+# -----------------------------------------------------------
+# 🔹 Normalização para busca
+# -----------------------------------------------------------
+# Sufixos "- ba", "/bahia", ", BA", " BAHIA". Continuam separados: aplicados
+# em sequência, o " ba" que sobra depois de tirar um "/bahia" leva junto o
+# espaço anterior, o que uma alternância única não faria.
+padrao_sufixo_barra_uf = re.compile(r"[-/]\s*ba(hia)?\b")
+padrao_sufixo_virgula_uf = re.compile(r",\s*ba(hia)?\b")
+padrao_sufixo_espaco_uf = re.compile(r"\s+ba(hia)?\b")
+padrao_estado_da_bahia = re.compile(r"\bestado da bahia\b")
+padrao_pontuacao = re.compile(r"[^0-9a-zà-ú\s]", re.IGNORECASE)
+padrao_espacos = re.compile(r"\s+")
+
+# -----------------------------------------------------------
+# 🔹 Capa
+# -----------------------------------------------------------
+# Ano de 1900 a 2099. O \b do início vai num lookbehind depois de "19|20":
+# começando pelos dígitos, o search pula direto para os "1" e "2" do texto
+# (mesmo resultado, mesmos grupos)
+padrao_ano = re.compile(r"(19|20)(?<=\b\d\d)\d{2}\b")
+padrao_quatro_digitos = re.compile(r"\d{4}")  # usar com fullmatch
+padrao_digito_inicial = re.compile(r"^\d")
+padrao_nome_e_sobrenome = re.compile(r"^[A-ZÁÀÃÂÉÍÓÚ][a-z].+ [A-ZÁÀÃÂÉÍÓÚ][a-z].+")
+
+# Nome de pessoa: 2 a 5 palavras com iniciais maiúsculas (usar com fullmatch)
+padrao_autor = re.compile(r"([A-ZÁÉÍÓÚÂÊÔÃÕ][a-záéíóúâêôãõç]+)(\s+[A-ZÁÉÍÓÚÂÊÔÃÕ][a-záéíóúâêôãõç]+){1,4}")
+
+# Duas ou mais palavras com iniciais maiúsculas (o subtítulo não pode ser um nome)
+padrao_nome_proprio = re.compile(r"^[A-ZÁÉÍÓÚÂÊÔÃÕ][a-záéíóúâêôãõç]+(\s+[A-ZÁÉÍÓÚÂÊÔÃÕ][a-záéíóúâêôãõç]+)+$")
+
+# -----------------------------------------------------------
+# 🔹 Títulos numerados
+# -----------------------------------------------------------
+# classificar_texto: "1 INTRODUÇÃO" → principal, "2.1 Objetivos" → subsecao
+padrao_numero_secao = re.compile(
+    r"^(?:(?P<principal>\d+)|(?P<subsecao>\d+\.\d+(?:\.\d+)*))\s+[A-ZÁÉÍÓÚÂÊÔÃÕ]"
+)
+
+# formatar_titulos_numerados: título numerado ("2.1 Objetivos", "3. MÉTODO").
+# Vira uma coluna da matriz de características, ao lado da do RESUMO
+# (padrao_resumo_secao): as duas nunca casam na mesma linha
+padrao_numerado = re.compile(r"^\s*\d+(?:\.\d+)*\s*\.?\s*[A-Za-zÀ-ÿ]")
+padrao_numeracao_e_titulo = re.compile(r"^(\d+(?:\.\d+)*)(?:\.)?\s*(.*)$")
+
+# formatar_paragrafos_abnt: linha do RESUMO ou título ("1)", "2.3." ...)
+padrao_resumo_ou_titulo = re.compile(
+    r"^\s*(?:(?P<resumo>(?i:resumo)\b)|(?P<titulo>\d+(?:\.\d+)*\s*[\).]?\s*[A-Za-zÀ-ÿ]))"
+)
+
+# -----------------------------------------------------------
+# 🔹 Referências
+# -----------------------------------------------------------
+padrao_titulo_apos_referencias = re.compile(r"^\s*\d+(\.\d+)*\s+[A-Za-zÀ-ÿ]")
+# "Salvador: Editora". Só importa se há ou não (``search``): basta uma letra
+# de cada lado dos dois-pontos, sem o ``+`` que refazia a varredura das
+# letras a partir de cada posição
+padrao_local_editora = re.compile(r"[A-Za-zÀ-ÿ ]:\s*[A-Za-zÀ-ÿ ]")
+padrao_sigla_inicial = re.compile(r"^[A-Z]{2,}\b")
+padrao_sobrenome_inicial = re.compile(r"^[A-ZÀ-Ý]{2,}\s*,")  # "SILVA, ..."
@@ -0,0 +1,109 @@
+"""
+Lista de REFERÊNCIAS: onde ela começa e quais linhas são referências.
+
+O título REFERÊNCIAS fica quase sempre no fim do trabalho, então é
+procurado do último parágrafo para o primeiro: a busca para assim que o
+encontra, depois de olhar só a lista (e os apêndices), e não casa com a
+linha "REFERÊNCIAS" de um sumário no começo do documento.
+
+Uma linha é referência quando tem MIN_CARACTERES e soma MIN_PONTOS: link
+(2 pontos), ano, termo bibliográfico, "Local: Editora", sigla ou
+"SOBRENOME," no início (1 ponto cada). Link e termos são procurados no
+texto sem acentos e minúsculo, com uma única expressão em árvore de
+prefixos (``padrao_link_ou_termo``) no lugar dos 18 ``in``.
+
+A lista é tratada de uma vez (``pontuar`` / ``entradas``): cada
+característica é um ``map`` da expressão sobre todas as linhas, e os
+acentos saem de todas juntas (normalizacao.sem_acentos_em_bloco).
+``entradas`` ainda para cedo: as características do texto original vêm
+primeiro, e só as linhas que ainda não somaram os pontos passam pelo
+teste seguinte — a maior parte das referências ("SILVA, J. ... 2020.")
+nem chega a ter os acentos tirados.
+"""
+import re
+from itertools import compress
+
+from Condicoes import padrao_trie
+from normalizacao import sem_acentos_em_bloco
+from padroes import (
+    padrao_ano, padrao_local_editora, padrao_referencias, padrao_sigla_inicial, padrao_sobrenome_inicial,
+)
+
+# Termos que contam ponto para uma referência (comparados com o texto
+# minúsculo e sem acentos; os dois últimos têm acento e nunca casam, como
+# no eh_referencia original)
+TERMOS_REFERENCIA = (
+    "disponivel em", "acesso em", "editora", "vol", "v.", "n.",
+    "nbr", "issn", "isbn", "revista", "congresso", "artigo",
+    "tecnologia da informação", "internet", "pesquisa", "relatório",
+)
+
+# Uma referência tem pelo menos MIN_CARACTERES e MIN_PONTOS
+MIN_CARACTERES = 8
+MIN_PONTOS = 2
+
+# Testes de 1 ponto sobre o texto original, dos mais baratos (ancorados no
+# início) para os mais caros
+TESTES_ORIGINAL = (
+    padrao_sobrenome_inicial.match,
+    padrao_sigla_inicial.match,
+    padrao_ano.search,
+    padrao_local_editora.search,
+)
+
+padrao_link = re.compile(r"http|doi")
+padrao_termo = re.compile(padrao_trie(TERMOS_REFERENCIA))
+padrao_link_ou_termo = re.compile(rf"http|doi|{padrao_termo.pattern}")
+
+
+def _coluna(teste, textos):
+    return bytes(map(bool, map(teste, textos)))
+
+
+def _minusculos(textos):
+    return list(map(str.lower, sem_acentos_em_bloco(textos)))
+
+
+def pontuar(textos):
+    """Pontuação de cada linha de ``textos`` como referência (sem olhar o tamanho)."""
+    minusculos = _minusculos(textos)
+    link = _coluna(padrao_link.search, minusculos)
+    colunas = [_coluna(teste, textos) for teste in TESTES_ORIGINAL]
+    colunas.append(_coluna(padrao_termo.search, minusculos))
+    # o link entra duas vezes: vale 2 pontos
+    return list(map(sum, zip(link, link, *colunas)))
+
+
+def pontos(texto):
+    return pontuar([texto])[0]
+
+
+def entradas(textos):
+    """Índices das linhas de ``textos`` que são referências."""
+    totais = [0] * len(textos)
+    pendentes = [i for i, texto in enumerate(textos) if len(texto) >= MIN_CARACTERES]
+
+    for teste in TESTES_ORIGINAL:
+        for i in compress(pendentes, map(teste, map(textos.__getitem__, pendentes))):
+            totais[i] += 1
+        pendentes = [i for i in pendentes if totais[i] < MIN_PONTOS]
+
+    # Falta o texto sem acentos: com 1 ponto basta link ou termo; sem
+    # nenhum, só o link (2 pontos) completa
+    minusculos = _minusculos([textos[i] for i in pendentes])
+    for i, texto in zip(pendentes, minusculos):
+        if (padrao_link_ou_termo if totais[i] else padrao_link).search(texto):
+            totais[i] = MIN_PONTOS
+
+    return [i for i, total in enumerate(totais) if total >= MIN_PONTOS]
+
+
+def localizar_titulo(textos):
+    """Índice do último título REFERÊNCIAS em ``textos`` (ou None), procurado do fim."""
+    for i in range(len(textos) - 1, -1, -1):
+        # O título, em maiúsculas, termina em "S": as outras linhas nem
+        # chegam a ser convertidas e testadas pela expressão
+        texto = textos[i].rstrip()
+        if texto[-1:].upper().endswith("S") and padrao_referencias.match(" ".join(texto.upper().split())):
+            return i
+    return None
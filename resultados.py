@@ -0,0 +1,81 @@
+import re
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+from cache import CacheDisco
+
+# Formato dos identificadores (secrets.token_urlsafe)
+padrao_identificador = re.compile(r"[A-Za-z0-9_-]+")
+
+
+class ArmazemResultados:
+    """
+    Guarda por pouco tempo os .docx já formatados pelo /processar, para que
+    o botão de download busque o arquivo pelo identificador devolvido no
+    relatório, sem reenviar nem reprocessar o documento.
+
+    Os itens expiram depois de ``validade`` segundos e, passando de
+    ``max_bytes`` no total, os mais antigos são descartados primeiro (o
+    último guardado fica sempre, mesmo sozinho acima do limite, para que o
+    download que acabou de ser oferecido funcione).
+    """
+
+    def __init__(self, validade=600, max_bytes=256 * 1024 * 1024):
+        self.validade = validade
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._itens = OrderedDict()
+        self._trava = threading.Lock()
+
+    def guardar(self, dados):
+        """Guarda os bytes do arquivo e devolve o identificador para o download."""
+        identificador = secrets.token_urlsafe(16)
+        with self._trava:
+            self._limpar_expirados()
+            self._itens[identificador] = (time.monotonic() + self.validade, dados)
+            self.total_bytes += len(dados)
+            while self.total_bytes > self.max_bytes and len(self._itens) > 1:
+                self._remover(next(iter(self._itens)))
+        return identificador
+
+    def obter(self, identificador):
+        """Bytes do arquivo, ou None se o identificador não existir ou tiver expirado."""
+        with self._trava:
+            self._limpar_expirados()
+            item = self._itens.get(identificador)
+        return item[1] if item else None
+
+    def _limpar_expirados(self):
+        agora = time.monotonic()
+        while self._itens:
+            identificador, (expira, _) = next(iter(self._itens.items()))
+            if expira > agora:
+                break
+            self._remover(identificador)
+
+    def _remover(self, identificador):
+        _, dados = self._itens.pop(identificador)
+        self.total_bytes -= len(dados)
+
+
+class ArmazemDisco:
+    """
+    Como ArmazemResultados, mas com os arquivos num diretório compartilhado
+    (CacheDisco): o download funciona em qualquer worker do gunicorn, não só
+    no que formatou o documento.
+    """
+
+    def __init__(self, diretorio, validade=600, max_bytes=512 * 1024 * 1024):
+        self._disco = CacheDisco(diretorio, max_bytes, validade)
+
+    def guardar(self, dados):
+        identificador = secrets.token_urlsafe(16)
+        self._disco.guardar(identificador, dados)
+        return identificador
+
+    def obter(self, identificador):
+        if not padrao_identificador.fullmatch(identificador):
+            return None
+        return self._disco.obter(identificador)
@@ -9,6 +9,17 @@ const downloadButton = document.getElementById('downloadButton');
 const resetButton = document.getElementById('resetButton');
 const loadingMessage = document.getElementById('loadingMessage');
 
+const API_URL = "http://127.0.0.1:5000";
+
+// Intervalo entre as consultas ao andamento da tarefa (ms)
+const INTERVALO_CONSULTA = 1000;
+
+// Endereço do arquivo já formatado, devolvido quando a tarefa conclui
+let downloadUrl = null;
+
+// Erro com a mensagem que deve aparecer na caixa de status
+class ErroServidor extends Error {}
+
 // Quando seleciona arquivo
 fileInput.addEventListener('change', () => {
   if (fileInput.files.length > 0) {
@@ -25,6 +36,7 @@ fileInput.addEventListener('change', () => {
     loadingMessage.classList.remove("hidden");
 
     // esconder resultados anteriores (se houver)
+    downloadUrl = null;
     resultSection.classList.add('hidden');
     downloadButton.classList.add('hidden');
     fileNameResult.textContent = "";
@@ -40,17 +52,27 @@ processButton.addEventListener('click', () => {
   const formData = new FormData();
   formData.append("arquivo", fileInput.files[0]);
 
-  // chamada ao backend
-  fetch("http://127.0.0.1:5000/verificar", {
+  // chamada ao backend: cria a tarefa (verifica e formata com um único
+  // envio) e acompanha o andamento até concluir
+  fetch(`${API_URL}/tarefas`, {
     method: "POST",
     body: formData
   })
   .then(response => {
+    if (response.status === 429) {
+      throw new ErroServidor("⏳ Servidor ocupado — tente novamente em alguns segundos.");
+    }
+    // Arquivo recusado antes do processamento (não é .docx, grande demais...)
+    if ([400, 413, 415].includes(response.status)) {
+      return response.json().then(dados => { throw new ErroServidor(`❌ ${dados.erro}`); });
+    }
     if (!response.ok) throw new Error("Resposta do servidor não OK");
     return response.json();
   })
+  .then(tarefa => acompanharTarefa(tarefa.status))
   .then(data => {
     console.log("💬 RECEBIDO DO PYTHON:", data);  // DEBUG
+    downloadUrl = data.download || null;
     const margensEl = document.getElementById("analise-margens");
     if (data.margens_corretas !== undefined) {
       margensEl.innerHTML = data.margens_corretas
@@ -97,7 +119,9 @@ processButton.addEventListener('click', () => {
   })
   .catch(err => {
     // Erro de rede/servidor
-    loadingMessage.textContent = "❌ Erro ao verificar — verifique o backend.";
+    loadingMessage.textContent = err instanceof ErroServidor
+      ? err.message
+      : "❌ Erro ao verificar — verifique o backend.";
     loadingMessage.style.backgroundColor = "#ff4d4d";
     loadingMessage.style.color = "white";
     console.error(err);
@@ -107,18 +131,36 @@ processButton.addEventListener('click', () => {
   });
 });
 
+// Consulta o andamento da tarefa até ela concluir; resolve com o relatório
+function acompanharTarefa(statusUrl) {
+  return fetch(`${API_URL}${statusUrl}`)
+  .then(response => {
+    if (response.status === 404) throw new ErroServidor("❌ Tarefa expirada — envie o documento novamente.");
+    if (!response.ok) throw new Error("Resposta do servidor não OK");
+    return response.json();
+  })
+  .then(data => {
+    if (data.estado === "concluida") return data;
+    if (data.estado === "erro") {
+      throw new ErroServidor(`❌ Não foi possível processar o documento: ${data.erro}`);
+    }
+
+    loadingMessage.textContent = data.estado === "na_fila"
+      ? "Aguardando na fila..."
+      : "Processando o documento...";
+    return new Promise(resolve => setTimeout(resolve, INTERVALO_CONSULTA))
+      .then(() => acompanharTarefa(statusUrl));
+  });
+}
+
 // Quando clica em "Baixar já formatado"
+// (o arquivo já foi formatado pela tarefa; aqui só é baixado)
 downloadButton.addEventListener("click", () => {
-  if (!fileInput.files.length) return;
+  if (!downloadUrl) return;
 
-  const formData = new FormData();
-  formData.append("arquivo", fileInput.files[0]);
-
-  fetch("http://127.0.0.1:5000/formatar", {
-    method: "POST",
-    body: formData
-  })
+  fetch(`${API_URL}${downloadUrl}`)
   .then(response => {
+    if (response.status === 404) throw new Error("Arquivo expirado — processe o documento novamente");
     if (!response.ok) throw new Error("Erro ao gerar arquivo");
     return response.blob();
   })
@@ -145,6 +187,7 @@ resetButton.addEventListener('click', () => {
   uploadSection.classList.remove('hidden');
   processingSection.classList.add('hidden');
   fileInput.value = "";
+  downloadUrl = null;
   fileName.textContent = "";
   fileNameResult.textContent = "";
   loadingMessage.textContent = "Aguarde um momento...";
@@ -0,0 +1,246 @@
+import itertools
+import json
+import os
+import secrets
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+
+from cache import CacheDisco
+from resultados import padrao_identificador
+
+
+class FilaCheia(Exception):
+    """Todos os workers ocupados e a fila de espera no limite."""
+
+
+class RegistroTarefas:
+    """
+    Estado das tarefas num diretório compartilhado (CacheDisco), para que
+    qualquer worker do gunicorn responda pelo andamento e pelo resultado de
+    uma tarefa criada em outro. Cada tarefa é um registro com "estado" e,
+    conforme o estado, "resultado" ou "erro".
+
+    Nada é lido de volta com pickle: o estado, o erro e o relatório vão num
+    JSON, e o .docx formatado, em bytes, num arquivo à parte. Por isso o
+    resultado tem que ser o par (relatório, bytes) de ``processar_bytes``.
+    """
+
+    def __init__(self, diretorio, validade=600, max_bytes=1024 * 1024 * 1024):
+        self._disco = CacheDisco(diretorio, max_bytes, validade)
+
+    def gravar(self, identificador, estado, resultado=None, erro=None):
+        tarefa = {"estado": estado, "erro": erro}
+        if resultado is not None:
+            tarefa["relatorio"], formatado = resultado
+            # o "." não aparece nos identificadores: não colide com outra tarefa
+            self._disco.guardar(identificador + ".docx", formatado)
+        self._disco.guardar(identificador, json.dumps(tarefa, ensure_ascii=False).encode("utf-8"))
+
+    def ler(self, identificador):
+        if not padrao_identificador.fullmatch(identificador):
+            return None
+        dados = self._disco.obter(identificador)
+        if dados is None:
+            return None
+
+        tarefa = json.loads(dados)
+        if "relatorio" in tarefa:
+            formatado = self._disco.obter(identificador + ".docx")
+            if formatado is None:
+                return None  # o .docx já foi descartado
+            tarefa["resultado"] = (tarefa.pop("relatorio"), formatado)
+        return tarefa
+
+
+def _executar_registrando(registro, identificador, funcao, *args):
+    """Roda no processo do pool: marca a tarefa como "processando" para os outros workers."""
+    registro.gravar(identificador, estado="processando")
+    return funcao(*args)
+
+
+class GerenciadorTarefas:
+    """
+    Executa o pipeline fora da thread da requisição, num ProcessPoolExecutor
+    com fila limitada.
+
+    - ``submeter`` devolve o identificador da tarefa (ou levanta FilaCheia);
+      ``contexto`` não vai para o processo, só para ``ao_concluir``
+    - ``consultar`` devolve o estado: "na_fila", "processando", "concluida"
+      ou "erro"
+    - ``resultado`` devolve o valor calculado pela ``funcao``
+
+    O pool só é criado no primeiro envio, depois do fork dos workers do
+    gunicorn. Tarefas terminadas ficam disponíveis por ``validade`` segundos.
+
+    Cada worker do gunicorn tem o seu gerenciador e o seu pool: com mais de
+    um worker, ``max_workers`` deve ser a parte de cada um nas CPUs (ver
+    gunicorn.conf.py) e ``registro`` (RegistroTarefas) deixa o estado das
+    tarefas visível para todos eles.
+    """
+
+    def __init__(self, funcao, max_workers=None, max_fila=16, validade=600, ao_concluir=None, registro=None):
+        self.funcao = funcao
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_fila = max_fila
+        self.validade = validade
+        self.ao_concluir = ao_concluir
+        self.registro = registro
+        self._executor = None
+        self._tarefas = {}
+        self._ativas = 0
+        self._trava = threading.Lock()
+
+    def _obter_executor(self):
+        if self._executor is None:
+            # importado só aqui: o módulo traz o multiprocessing inteiro e
+            # a maioria dos processos nunca chega a usar o pool
+            from concurrent.futures import ProcessPoolExecutor
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def submeter(self, *args, contexto=None):
+        with self._trava:
+            self._limpar_expiradas()
+
+            if self._ativas >= self.max_workers + self.max_fila:
+                raise FilaCheia()
+
+            identificador = secrets.token_urlsafe(12)
+            tarefa = {"future": None, "resultado": None, "erro": None, "expira": None}
+            self._tarefas[identificador] = tarefa
+            self._ativas += 1
+
+            if self.registro is None:
+                tarefa["future"] = self._obter_executor().submit(self.funcao, *args)
+            else:
+                self.registro.gravar(identificador, estado="na_fila")
+                tarefa["future"] = self._obter_executor().submit(
+                    _executar_registrando, self.registro, identificador, self.funcao, *args
+                )
+
+        tarefa["future"].add_done_callback(lambda future: self._concluir(identificador, contexto, future))
+        return identificador
+
+    def registrar_concluida(self, resultado):
+        """Registra uma tarefa que já nasce pronta (ex.: resultado vindo do cache)."""
+        identificador = secrets.token_urlsafe(12)
+        with self._trava:
+            self._limpar_expiradas()
+            self._tarefas[identificador] = {
+                "future": None, "resultado": resultado, "erro": None,
+                "expira": time.monotonic() + self.validade,
+            }
+        if self.registro is not None:
+            self.registro.gravar(identificador, estado="concluida", resultado=resultado)
+        return identificador
+
+    def _concluir(self, identificador, contexto, future):
+        erro = future.exception()
+        if erro is not None:
+            erro = str(erro) or type(erro).__name__
+
+        with self._trava:
+            self._ativas -= 1
+            tarefa = self._tarefas.get(identificador)
+            if tarefa is not None:
+                tarefa["future"] = None
+                tarefa["expira"] = time.monotonic() + self.validade
+                if erro is not None:
+                    tarefa["erro"] = erro
+                else:
+                    tarefa["resultado"] = future.result()
+
+        if self.registro is not None:
+            if erro is not None:
+                self.registro.gravar(identificador, estado="erro", erro=erro)
+            else:
+                self.registro.gravar(identificador, estado="concluida", resultado=future.result())
+
+        if erro is None and self.ao_concluir is not None:
+            self.ao_concluir(contexto, future.result())
+
+    def executar_lote(self, funcao, argumentos):
+        """
+        Roda ``funcao`` para cada tupla de ``argumentos`` no mesmo pool e
+        devolve (índice, future) conforme os itens terminam.
+
+        O lote mantém no máximo ``max_workers`` itens em andamento, então
+        tarefas avulsas continuam entrando na fila enquanto ele roda; os
+        argumentos só são consumidos quando há vaga. Levanta FilaCheia se o
+        pool já estiver lotado antes de começar.
+        """
+        with self._trava:
+            if self._ativas >= self.max_workers + self.max_fila:
+                raise FilaCheia()
+        return self._gerar_lote(funcao, iter(argumentos))
+
+    def _gerar_lote(self, funcao, argumentos):
+        pendentes = {}
+        indices = itertools.count()
+
+        def enviar():
+            while len(pendentes) < self.max_workers:
+                args = next(argumentos, None)
+                if args is None:
+                    return
+                with self._trava:
+                    future = self._obter_executor().submit(funcao, *args)
+                    self._ativas += 1
+                pendentes[future] = next(indices)
+
+        try:
+            enviar()
+            while pendentes:
+                terminados, _ = wait(pendentes, return_when=FIRST_COMPLETED)
+                for future in terminados:
+                    indice = pendentes.pop(future)
+                    with self._trava:
+                        self._ativas -= 1
+                    yield indice, future
+                enviar()
+        finally:
+            # Cliente desistiu no meio do lote: libera as vagas
+            for future in pendentes:
+                future.cancel()
+            with self._trava:
+                self._ativas -= len(pendentes)
+
+    def consultar(self, identificador):
+        with self._trava:
+            tarefa = self._tarefas.get(identificador)
+            if tarefa is not None:
+                future = tarefa["future"]
+                if future is not None:
+                    return "processando" if future.running() else "na_fila"
+                return "erro" if tarefa["erro"] is not None else "concluida"
+
+        # Tarefa criada por outro worker
+        registrada = self._registrada(identificador)
+        return registrada["estado"] if registrada else None
+
+    def resultado(self, identificador):
+        with self._trava:
+            tarefa = self._tarefas.get(identificador)
+            if tarefa is not None:
+                return tarefa["resultado"]
+        return (self._registrada(identificador) or {}).get("resultado")
+
+    def erro(self, identificador):
+        with self._trava:
+            tarefa = self._tarefas.get(identificador)
+            if tarefa is not None:
+                return tarefa["erro"]
+        return (self._registrada(identificador) or {}).get("erro")
+
+    def _registrada(self, identificador):
+        return self.registro.ler(identificador) if self.registro is not None else None
+
+    def _limpar_expiradas(self):
+        agora = time.monotonic()
+        expiradas = [
+            identificador for identificador, tarefa in self._tarefas.items()
+            if tarefa["expira"] is not None and tarefa["expira"] <= agora
+        ]
+        for identificador in expiradas:
+            del self._tarefas[identificador]
@@ -0,0 +1,96 @@
+"""
+Acesso direto aos runs (``w:r``) do documento.
+
+Cada ``p.runs`` / ``run.font`` do python-docx cria objetos novos a cada
+acesso; nas etapas que tocam todos os runs do documento isso é a maior
+parte do tempo. Aqui o trabalho é feito sobre os elementos do XML, pelos
+mesmos métodos de ``docx.oxml`` que os proxies usam — o XML gerado é o
+mesmo byte a byte.
+"""
+from docx.oxml.ns import nsmap, qn
+from docx.shared import Pt
+from lxml import etree
+
+W_R = qn("w:r")
+W_ASCII = qn("w:ascii")
+W_HANSI = qn("w:hAnsi")
+W_VAL = qn("w:val")
+
+PRETO = "000000"
+
+# Mesma expressão de ``CT_R.text``, compilada uma única vez (o
+# ``element.xpath`` monta um avaliador novo a cada chamada)
+_CONTEUDO_RUN = etree.XPath(
+    "w:br | w:cr | w:noBreakHyphen | w:ptab | w:t | w:tab", namespaces={"w": nsmap["w"]}
+)
+
+
+def runs(p):
+    """Runs diretos do parágrafo (mesmos de ``Paragraph.runs``)."""
+    return p._p.iterchildren(W_R)
+
+
+def texto(r):
+    """Texto do run, como ``run.text``."""
+    return "".join(str(e) for e in _CONTEUDO_RUN(r))
+
+
+def contar_fontes(paragrafos, fonte_padrao):
+    """
+    Caracteres de texto por fonte (``w:rFonts/@w:ascii``); runs sem fonte
+    própria contam para ``fonte_padrao`` (ou Arial).
+    """
+    contagem = {}
+    for p in paragrafos:
+        for r in runs(p):
+            rPr = r.rPr
+            fonte = (rPr.rFonts_ascii if rPr is not None else None) or fonte_padrao or "Arial"
+            fonte = fonte.strip()
+            contagem[fonte] = contagem.get(fonte, 0) + len(texto(r))
+    return contagem
+
+
+def pintar_de_preto(r, rPr=None):
+    """Equivale a ``run.font.color.rgb = RGBColor(0, 0, 0)``."""
+    rPr = rPr if rPr is not None else r.get_or_add_rPr()
+    rPr._remove_color()
+    rPr.get_or_add_color().set(W_VAL, PRETO)
+
+
+def definir_fonte(r, fonte, rPr=None):
+    """Equivale a ``run.font.name = fonte`` (``w:ascii`` e ``w:hAnsi``)."""
+    rPr = rPr if rPr is not None else r.get_or_add_rPr()
+    rFonts = rPr.get_or_add_rFonts()
+    rFonts.set(W_ASCII, fonte)
+    rFonts.set(W_HANSI, fonte)
+
+
+def definir_tamanho(p, tamanho=12, negrito=False):
+    """``run.font.size = Pt(tamanho)`` e ``run.font.bold = negrito`` em todos os runs do parágrafo."""
+    tamanho = Pt(tamanho)
+    for r in runs(p):
+        rPr = r.get_or_add_rPr()
+        rPr.sz_val = tamanho
+        rPr._set_bool_val("b", negrito)
+
+
+def tamanhos(p):
+    """Tamanhos explícitos (em pt) dos runs do parágrafo."""
+    for r in runs(p):
+        rPr = r.rPr
+        tamanho = rPr.sz_val if rPr is not None else None
+        if tamanho is not None:
+            yield tamanho.pt
+
+
+def normalizar_trechos(paragrafos, fonte):
+    """
+    Uma passada por todos os runs de ``paragrafos`` (elementos ``w:p``):
+    cor preta nos que têm texto e a ``fonte`` principal em todos.
+    """
+    for p in paragrafos:
+        for r in p.iterchildren(W_R):
+            rPr = r.get_or_add_rPr()
+            if texto(r).strip():
+                pintar_de_preto(r, rPr)
+            definir_fonte(r, fonte, rPr)
@@ -0,0 +1,397 @@
+"""
+Verificação ABNT lendo o ``document.xml`` em streaming.
+
+O /verificar só precisa das margens da primeira seção e das propriedades
+dos parágrafos; não há por que montar o documento inteiro no python-docx.
+Aqui o XML é lido com ``iterparse`` direto do zip, cada elemento do corpo é
+descartado assim que foi examinado (memória constante, qualquer que seja o
+tamanho do trabalho) e a leitura para assim que o resultado não pode mais
+mudar. Depois do ``document.xml`` vêm cabeçalhos, rodapés e notas: os
+parágrafos examinados são os mesmos de ``blocos.iterar_blocos``.
+
+As regras violadas vão para um ``achados.Achados``; com ``detalhar`` a
+leitura vai até o fim e guarda cada ocorrência (regra, parágrafo, valores
+esperado e encontrado) para o /verificar detalhado.
+
+As conversões de unidades são as do próprio python-docx, então o relatório
+é o mesmo de ``verificar_margens`` / ``verificar_formatacao``. Quando o
+arquivo foge do esperado, ``verificar_stream`` levanta
+VerificacaoIndisponivel e quem chamou volta para o caminho com python-docx.
+"""
+import posixpath
+import zipfile
+
+from docx.enum.text import WD_ALIGN_PARAGRAPH, WD_LINE_SPACING
+from docx.opc.constants import CONTENT_TYPE, RELATIONSHIP_TYPE
+from docx.oxml.simpletypes import ST_HpsMeasure, ST_SignedTwipsMeasure, ST_TwipsMeasure
+from docx.oxml.ns import qn
+from docx.shared import Length, Pt
+from lxml import etree
+
+from achados import Achados
+from blocos import CORPO, PARTES_SECUNDARIAS, conteiner
+
+# Padrão ABNT (cm): superior, inferior, esquerda, direita
+PADRAO_MARGENS = {
+    "superior": 3,
+    "inferior": 2,
+    "esquerda": 3,
+    "direita": 2
+}
+
+ERRO_FONTE = "❌ Um ou mais parágrafos do corpo estão com fonte diferente de 12."
+AVISO_ALINHAMENTO = "⚠️ Um ou mais parágrafos do corpo não estão justificados."
+
+# Regras dos parágrafos do corpo e a mensagem de cada uma no relatório
+MENSAGENS_FORMATACAO = {
+    "fonte_12": ERRO_FONTE,
+    "alinhamento_justificado": AVISO_ALINHAMENTO,
+}
+REGRAS_FORMATACAO = frozenset(MENSAGENS_FORMATACAO)
+
+W_BODY = qn("w:body")
+W_P = qn("w:p")
+W_R = qn("w:r")
+W_HYPERLINK = qn("w:hyperlink")
+W_PPR = qn("w:pPr")
+W_RPR = qn("w:rPr")
+W_SECTPR = qn("w:sectPr")
+W_PGMAR = qn("w:pgMar")
+W_IND = qn("w:ind")
+W_SPACING = qn("w:spacing")
+W_JC = qn("w:jc")
+W_SZ = qn("w:sz")
+W_VAL = qn("w:val")
+W_FOOTNOTE = qn("w:footnote")
+W_ENDNOTE = qn("w:endnote")
+
+# Texto equivalente dos elementos de um run (como em docx.oxml.text.run)
+_TEXTO_FIXO = {
+    qn("w:tab"): "\t",
+    qn("w:ptab"): "\t",
+    qn("w:cr"): "\n",
+    qn("w:noBreakHyphen"): "-",
+}
+W_T = qn("w:t")
+W_BR = qn("w:br")
+W_TYPE = qn("w:type")
+
+# Filhos do corpo que são examinados e descartados durante a leitura
+_ELEMENTOS_CORPO = (W_P, W_SECTPR, qn("w:tbl"), qn("w:sdt"))
+
+# Tipo de conteúdo esperado de cada parte secundária
+_TIPOS_SECUNDARIOS = {
+    RELATIONSHIP_TYPE.HEADER: CONTENT_TYPE.WML_HEADER,
+    RELATIONSHIP_TYPE.FOOTER: CONTENT_TYPE.WML_FOOTER,
+    RELATIONSHIP_TYPE.FOOTNOTES: CONTENT_TYPE.WML_FOOTNOTES,
+    RELATIONSHIP_TYPE.ENDNOTES: CONTENT_TYPE.WML_ENDNOTES,
+}
+
+
+class VerificacaoIndisponivel(Exception):
+    """O arquivo não pôde ser verificado em streaming; use o python-docx."""
+
+
+# -----------------------------------------------------------
+# Regras (compartilhadas com verificar_margens/verificar_formatacao)
+# -----------------------------------------------------------
+def mensagens_margens(margens):
+    """``margens``: lado → valor arredondado em cm."""
+    erros = []
+    for lado, valor in margens.items():
+        esperado = PADRAO_MARGENS[lado]
+        if valor != esperado:
+            erros.append(
+                f"❌ Margem {lado} incorreta: {valor} cm (deveria ser {esperado} cm)."
+            )
+
+    if not erros:
+        return ["✅ Margens estão corretas conforme ABNT."]
+
+    return erros
+
+
+def registrar_margens(margens, achados):
+    for lado, valor in margens.items():
+        esperado = PADRAO_MARGENS[lado]
+        if valor != esperado:
+            achados.registrar(f"margem_{lado}", esperado=esperado, obtido=valor)
+
+
+def eh_corpo(recuo, espacamento):
+    """Parágrafo de corpo de texto: recuo de ~1,25 cm e espaçamento ≥ 1,5."""
+    return (
+        recuo is not None and
+        round(recuo.pt) >= 35 and   # ~1,25 cm
+        espacamento is not None and
+        round(espacamento, 1) >= 1.5
+    )
+
+
+def mensagens_formatacao(regras):
+    """``regras``: ids das regras violadas (as que não são do corpo são ignoradas)."""
+    erros = {MENSAGENS_FORMATACAO[regra] for regra in regras if regra in MENSAGENS_FORMATACAO}
+    if not erros:
+        return ["✅ Formatação dos parágrafos do corpo está correta conforme ABNT."]
+
+    return sorted(erros)
+
+
+def verificar_tamanhos(tamanhos, achados, tipo, indice):
+    """Primeiro tamanho explícito (pt) diferente de 12, se houver."""
+    for tamanho in tamanhos:
+        if tamanho != 12:
+            achados.registrar("fonte_12", tipo, indice, esperado=12, obtido=tamanho)
+            return
+
+
+def verificar_alinhamento(alinhamento, achados, tipo, indice):
+    if alinhamento is not None and alinhamento != WD_ALIGN_PARAGRAPH.JUSTIFY:
+        achados.registrar(
+            "alinhamento_justificado", tipo, indice,
+            esperado=WD_ALIGN_PARAGRAPH.JUSTIFY.name, obtido=alinhamento.name,
+        )
+
+
+# -----------------------------------------------------------
+# Leitura em streaming
+# -----------------------------------------------------------
+def verificar_stream(stream, achados=None):
+    """
+    Relatório de verificação (margens e formatação) lido direto do .docx.
+    As regras violadas também ficam em ``achados``, se vier.
+    """
+    achados = achados if achados is not None else Achados()
+    indices = {}  # contêiner → parágrafos já lidos
+    try:
+        with zipfile.ZipFile(stream) as pacote:
+            tipos = etree.fromstring(pacote.read("[Content_Types].xml"))
+            principal = parte_principal(pacote, tipos)
+            with pacote.open(principal) as xml:
+                margens = _verificar_xml(xml, achados, indices)
+            for nome in _partes_secundarias(pacote, tipos, principal):
+                if achados.completo(REGRAS_FORMATACAO):
+                    break
+                with pacote.open(nome) as xml:
+                    _verificar_parte(xml, achados, indices)
+    except VerificacaoIndisponivel:
+        raise
+    except Exception as erro:
+        raise VerificacaoIndisponivel(str(erro)) from erro
+    finally:
+        stream.seek(0)
+
+    registrar_margens(margens, achados)
+    return {
+        "margens": mensagens_margens(margens),
+        "formatacao": mensagens_formatacao(achados.regras)
+    }
+
+
+def parte_principal(pacote, tipos):
+    """Nome do document.xml no zip, confirmando que é um documento do Word."""
+    rels = etree.fromstring(pacote.read("_rels/.rels"))
+    alvo = next(
+        (rel.get("Target") for rel in rels if rel.get("Type") == RELATIONSHIP_TYPE.OFFICE_DOCUMENT),
+        None,
+    )
+    if alvo is None:
+        raise VerificacaoIndisponivel("pacote sem documento principal")
+    nome = posixpath.normpath(alvo.lstrip("/"))
+
+    tipo = _tipo_de_conteudo(tipos, nome)
+    if tipo != CONTENT_TYPE.WML_DOCUMENT_MAIN:
+        raise VerificacaoIndisponivel(f"tipo de conteúdo inesperado: {tipo}")
+    return nome
+
+
+def _tipo_de_conteudo(tipos, nome):
+    tipo = None
+    for item in tipos:
+        if item.get("PartName") == "/" + nome:
+            return item.get("ContentType")
+        if tipo is None and item.get("Extension", "").lower() == posixpath.splitext(nome)[1][1:].lower():
+            tipo = item.get("ContentType")
+    return tipo
+
+
+def _partes_secundarias(pacote, tipos, principal):
+    """Cabeçalhos, rodapés e notas do documento principal (nomes no zip)."""
+    pasta, arquivo = posixpath.split(principal)
+    try:
+        rels = etree.fromstring(pacote.read(posixpath.join(pasta, "_rels", arquivo + ".rels")))
+    except KeyError:
+        return []
+
+    nomes = []
+    for rel in rels:
+        tipo = rel.get("Type")
+        if tipo not in PARTES_SECUNDARIAS or rel.get("TargetMode") == "External":
+            continue
+        alvo = rel.get("Target", "")
+        nome = posixpath.normpath(alvo.lstrip("/") if alvo.startswith("/") else posixpath.join(pasta, alvo))
+        # o python-docx só carrega como XML as partes com o tipo esperado
+        if nome not in nomes and _tipo_de_conteudo(tipos, nome) == _TIPOS_SECUNDARIOS[tipo]:
+            nomes.append(nome)
+    return nomes
+
+
+def _verificar_xml(xml, achados, indices):
+    margens = None
+
+    for _, elem in etree.iterparse(xml, events=("end",), tag=_ELEMENTOS_CORPO, resolve_entities=False):
+        corpo = elem.getparent()
+        if corpo is None or corpo.tag != W_BODY:
+            # parágrafo de tabela: examinado aqui, descartado com a tabela
+            if elem.tag == W_P:
+                _examinar(elem, elem.find(W_PPR), conteiner(elem), achados, indices)
+            continue
+
+        if elem.tag == W_P:
+            pPr = elem.find(W_PPR)
+            _examinar(elem, pPr, CORPO, achados, indices)
+            # quebra de seção: a primeira seção termina neste parágrafo
+            if margens is None and pPr is not None and pPr.find(W_SECTPR) is not None:
+                margens = _margens(pPr.find(W_SECTPR))
+        elif elem.tag == W_SECTPR and margens is None:
+            margens = _margens(elem)
+
+        # libera o que já foi lido
+        elem.clear()
+        while elem.getprevious() is not None:
+            del corpo[0]
+
+        # nada mais pode mudar o relatório
+        if margens is not None and achados.completo(REGRAS_FORMATACAO):
+            break
+
+    if margens is None:
+        raise VerificacaoIndisponivel("documento sem seção")
+
+    return margens
+
+
+def _verificar_parte(xml, achados, indices):
+    """Parágrafos de um cabeçalho, rodapé ou arquivo de notas."""
+    for _, elem in etree.iterparse(
+        xml, events=("end",), tag=(W_P, W_FOOTNOTE, W_ENDNOTE), resolve_entities=False,
+    ):
+        if elem.tag == W_P:
+            _examinar(elem, elem.find(W_PPR), conteiner(elem), achados, indices)
+            if achados.completo(REGRAS_FORMATACAO):
+                break
+            continue
+
+        # nota inteira examinada: libera
+        elem.clear()
+        while elem.getprevious() is not None:
+            del elem.getparent()[0]
+
+
+def _margens(sectPr):
+    pgMar = sectPr.find(W_PGMAR)
+    if pgMar is None:
+        raise VerificacaoIndisponivel("seção sem margens")
+
+    valores = {}
+    for lado, atributo, tipo in (
+        ("superior", "w:top", ST_SignedTwipsMeasure),
+        ("inferior", "w:bottom", ST_SignedTwipsMeasure),
+        ("esquerda", "w:left", ST_TwipsMeasure),
+        ("direita", "w:right", ST_TwipsMeasure),
+    ):
+        valor = pgMar.get(qn(atributo))
+        if valor is None:
+            raise VerificacaoIndisponivel(f"margem {lado} ausente")
+        valores[lado] = round(tipo.convert_from_xml(valor).cm)
+    return valores
+
+
+def _texto_run(r):
+    partes = []
+    for filho in r:
+        if filho.tag == W_T:
+            partes.append(filho.text or "")
+        elif filho.tag == W_BR:
+            partes.append("\n" if filho.get(W_TYPE, "textWrapping") == "textWrapping" else "")
+        else:
+            partes.append(_TEXTO_FIXO.get(filho.tag, ""))
+    return "".join(partes)
+
+
+def _texto_paragrafo(p):
+    partes = []
+    for filho in p:
+        if filho.tag == W_R:
+            partes.append(_texto_run(filho))
+        elif filho.tag == W_HYPERLINK:
+            partes.extend(_texto_run(r) for r in filho.iterchildren(W_R))
+    return "".join(partes)
+
+
+def _recuo(pPr):
+    ind = pPr.find(W_IND) if pPr is not None else None
+    if ind is None:
+        return None
+    hanging = ind.get(qn("w:hanging"))
+    if hanging is not None:
+        return Length(-ST_TwipsMeasure.convert_from_xml(hanging))
+    first_line = ind.get(qn("w:firstLine"))
+    if first_line is None:
+        return None
+    return ST_TwipsMeasure.convert_from_xml(first_line)
+
+
+def _espacamento(pPr):
+    spacing = pPr.find(W_SPACING) if pPr is not None else None
+    if spacing is None:
+        return None
+    linha = spacing.get(qn("w:line"))
+    if linha is None:
+        return None
+    linha = ST_SignedTwipsMeasure.convert_from_xml(linha)
+    regra = spacing.get(qn("w:lineRule"))
+    regra = WD_LINE_SPACING.from_xml(regra) if regra is not None else WD_LINE_SPACING.MULTIPLE
+    if regra == WD_LINE_SPACING.MULTIPLE:
+        return linha / Pt(12)
+    return linha
+
+
+def _examinar(p, pPr, tipo, achados, indices):
+    """Conta o parágrafo no seu contêiner e o verifica enquanto isso ainda importa."""
+    if tipo is None:
+        return  # fora dos blocos (caixa de texto, separador de notas...)
+    indice = indices.get(tipo, 0)
+    indices[tipo] = indice + 1
+    if not achados.completo(REGRAS_FORMATACAO):
+        _verificar_paragrafo(p, pPr, achados, tipo, indice)
+
+
+def _verificar_paragrafo(p, pPr, achados, tipo, indice):
+    if not _texto_paragrafo(p).strip():
+        return
+
+    if not eh_corpo(_recuo(pPr), _espacamento(pPr)):
+        return
+
+    verificar_tamanhos(_tamanhos(p), achados, tipo, indice)
+
+    jc = pPr.find(W_JC)
+    if jc is not None:
+        valor = jc.get(W_VAL)
+        if valor is None:
+            raise VerificacaoIndisponivel("w:jc sem valor")
+        verificar_alinhamento(WD_ALIGN_PARAGRAPH.from_xml(valor), achados, tipo, indice)
+
+
+def _tamanhos(p):
+    """Tamanhos explícitos (pt) dos runs, na ordem (como ``trechos.tamanhos``)."""
+    for r in p.iterchildren(W_R):
+        rPr = r.find(W_RPR)
+        sz = rPr.find(W_SZ) if rPr is not None else None
+        if sz is None:
+            continue
+        valor = sz.get(W_VAL)
+        if valor is None:
+            raise VerificacaoIndisponivel("w:sz sem valor")
+        yield ST_HpsMeasure.convert_from_xml(valor).pt
@@ -0,0 +1,20 @@
+"""
+Ponto de entrada WSGI para produção.
+
+    gunicorn -c gunicorn.conf.py
+
+Com ``preload_app`` (gunicorn.conf.py) este módulo é importado uma única
+vez, no processo mestre: python-docx, lxml, os índices de ``Condicoes`` e
+os caches aquecidos por ``precarregar`` já existem quando os workers são
+criados e são compartilhados com eles (copy-on-write).
+"""
+import gc
+
+from app import criar_app, precarregar
+
+app = criar_app()
+precarregar()
+
+# O que existe até aqui é só lido pelos workers. Fora da coleta de lixo,
+# essas páginas de memória não são tocadas (nem copiadas) depois do fork.
+gc.freeze()